@@ -0,0 +1 @@
+"""Benchmarks and load-testing tools. Run modules with ``python -m benchmarks.<name>``."""
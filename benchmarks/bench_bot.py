@@ -0,0 +1,156 @@
+"""End-to-end load test of ``Poller`` and ``handle_update`` against fake services.
+
+Usage::
+
+    python -m benchmarks.bench_bot --users 500 --rate 50 --duration 30
+    python -m benchmarks.bench_bot --rate 100 --poll-concurrency 32 --queue-size 64
+
+Synthetic users send messages to an in-process fake Bot API (see
+``benchmarks/fake_telegram.py``), the bot polls them, handles them with
+the real handlers and database code, and replies through the outbound
+sender. Free text the fast path cannot map goes to an in-process fake LLM
+(see ``benchmarks/fake_llm.py``). The report shows reply latency from the
+moment an update is queued, 429 responses and the poller's metrics; raise
+``--rate`` until latency or the unanswered count grows to find capacity.
+The database defaults to a temporary SQLite file; pass ``--database-url`` to
+run against PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks import fake_llm, fake_telegram
+from benchmarks.stub_server import StubServer
+from tg_cal_reminder.bot.commands import register_commands
+from tg_cal_reminder.bot.polling import Poller
+from tg_cal_reminder.bot.sender import OutboundSender
+from tg_cal_reminder.bot.update import handle_update
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache
+from tg_cal_reminder.db.models import Base
+from tg_cal_reminder.llm.client import ResilientTranslator
+from tg_cal_reminder.llm.limiter import TranslationGate
+from tg_cal_reminder.llm.translator import translate_message
+
+TOKEN = "bench-token"
+
+
+async def run(args: argparse.Namespace, database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_cache = None
+    if args.user_cache:
+        user_cache = UserCache()
+        crud.add_change_listener(user_cache.on_change)
+
+    telegram = fake_telegram.from_arguments(args)
+    llm = fake_llm.from_arguments(args)
+    try:
+        async with (
+            StubServer(telegram) as telegram_server,
+            StubServer(llm) as llm_server,
+            httpx.AsyncClient(base_url=f"{telegram_server.url}/bot{TOKEN}/") as tg_client,
+            httpx.AsyncClient() as llm_client,
+            OutboundSender(tg_client) as sender,
+        ):
+            os.environ["LLM_API_URL"] = f"{llm_server.url}/v1/chat/completions"
+
+            async def translate(text: str, lang: str, tz: str) -> dict:
+                return await translate_message(llm_client, text, lang, tz, timeout=10.0)
+
+            translator = TranslationGate(
+                ResilientTranslator(translate), max_concurrency=args.llm_concurrency
+            )
+            await register_commands(tg_client)
+            poller = Poller(
+                TOKEN,
+                lambda u: handle_update(
+                    u,
+                    tg_client,
+                    session_factory,
+                    translator,
+                    sender=None if args.no_sender else sender,
+                    user_cache=user_cache,
+                    unit_of_work=args.unit_of_work,
+                ),
+                client=tg_client,
+                timeout=args.poll_timeout,
+                max_concurrency=args.poll_concurrency,
+                queue_size=args.queue_size,
+            )
+            polling = asyncio.create_task(poller.run())
+            started = time.perf_counter()
+            # ``translate_message`` prints every prompt; keep the report readable.
+            with contextlib.redirect_stdout(io.StringIO()):
+                await fake_telegram.replay(
+                    telegram,
+                    users=args.users,
+                    rate=args.rate,
+                    duration=args.duration,
+                    secret=args.secret,
+                    seed=args.seed,
+                )
+                drained = await telegram.drain(args.drain)
+            elapsed = time.perf_counter() - started
+            polling.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await polling
+    finally:
+        if user_cache is not None:
+            crud.remove_change_listener(user_cache.on_change)
+        await engine.dispose()
+
+    stats = telegram.stats
+    print(
+        f"offered: {args.rate:.1f} msg/s, answered: {stats.replies / elapsed:.1f} msg/s "
+        f"over {elapsed:.1f}s{'' if drained else ' (drain timed out)'}"
+    )
+    print(telegram.report())
+    metrics = poller.metrics
+    print(
+        f"poller: polls={metrics.polls} errors={metrics.errors} "
+        f"avg_dispatch_delay={metrics.avg_dispatch_delay * 1000:.0f}ms "
+        f"max_dispatch_delay={metrics.max_dispatch_delay * 1000:.0f}ms"
+    )
+    print(f"sender: {sender.metrics}")
+    print(f"llm: {llm.stats}")
+    print(f"gate: {translator.metrics}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    fake_telegram.add_arguments(parser)
+    parser.add_argument("--poll-timeout", type=int, default=30)
+    parser.add_argument("--poll-concurrency", type=int, default=8, help="POLL_CONCURRENCY")
+    parser.add_argument("--queue-size", type=int, default=0, help="POLL_QUEUE_SIZE")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM_MAX_CONCURRENCY")
+    parser.add_argument("--no-sender", action="store_true", help="reply without the sender")
+    parser.add_argument("--user-cache", action="store_true", help="enable the user cache")
+    parser.add_argument("--unit-of-work", action="store_true", help="commit each update once")
+    parser.add_argument("--database-url")
+    fake_llm.add_arguments(parser)
+    args = parser.parse_args()
+    os.environ["BOT_SECRET"] = args.secret
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        await run(args, url)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
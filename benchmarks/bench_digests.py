@@ -0,0 +1,129 @@
+"""Measure the batched digest engine against a per-user (N+1) baseline.
+
+Usage::
+
+    python -m benchmarks.bench_digests --users 100000 --events-per-user 3
+
+The database defaults to a temporary SQLite file; pass ``--database-url`` to
+run against PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from tg_cal_reminder.bot.digests import collect_digests, render_digest
+from tg_cal_reminder.bot.scheduler import morning_window
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.models import Base, Event, User
+
+NOW = datetime(2024, 3, 6, 12, 0, tzinfo=UTC)
+CHUNK = 10_000
+
+
+async def populate(engine: AsyncEngine, users: int, events_per_user: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for first in range(0, users, CHUNK):
+            ids = range(first + 1, min(users, first + CHUNK) + 1)
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        "id": i,
+                        "telegram_id": 1_000_000 + i,
+                        "language": "en",
+                        "timezone": "UTC",
+                        "is_authorized": True,
+                        "created_at": NOW,
+                    }
+                    for i in ids
+                ],
+            )
+            rows = []
+            for i in ids:
+                for _ in range(events_per_user):
+                    # Spread events over a week so about a seventh is due today.
+                    start = NOW + timedelta(minutes=random.randrange(-3 * 1440, 4 * 1440))
+                    rows.append(
+                        {
+                            "user_id": i,
+                            "start_time": start,
+                            "title": f"event {i}",
+                            "is_closed": False,
+                            "created_at": NOW,
+                        }
+                    )
+            await conn.execute(insert(Event), rows)
+
+
+async def batched(engine: AsyncEngine) -> tuple[int, float]:
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    start, end = morning_window(NOW)
+    started = time.perf_counter()
+    async with factory() as session:
+        digests = await collect_digests(session, "morning", start, end)
+    return len(digests), time.perf_counter() - started
+
+
+async def per_user(engine: AsyncEngine, sample: int) -> tuple[int, float]:
+    """Baseline: list users, then one ``get_events_between`` query per user."""
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    start, end = morning_window(NOW)
+    started = time.perf_counter()
+    count = 0
+    async with factory() as session:
+        users = (await session.execute(select(User).limit(sample))).scalars().all()
+        for user in users:
+            events = await crud.get_events_between(session, user.id, start, end)
+            if events:
+                render_digest("morning", user.language, events)
+                count += 1
+    return count, time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--events-per-user", type=int, default=3)
+    parser.add_argument("--baseline-sample", type=int, default=5_000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_async_engine(url)
+        try:
+            started = time.perf_counter()
+            await populate(engine, args.users, args.events_per_user)
+            print(f"populated {args.users} users in {time.perf_counter() - started:.1f}s")
+
+            digests, elapsed = await batched(engine)
+            print(
+                f"batched:  {digests} digests in {elapsed:.2f}s "
+                f"({digests / elapsed:,.0f} digests/s)"
+            )
+
+            sample = min(args.baseline_sample, args.users)
+            digests, elapsed = await per_user(engine, sample)
+            projected = elapsed * args.users / sample
+            print(
+                f"per-user: {digests} digests for {sample} users in {elapsed:.2f}s "
+                f"(~{projected:.0f}s projected for {args.users} users)"
+            )
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
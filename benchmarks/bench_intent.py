@@ -0,0 +1,78 @@
+"""Measure the fast-path intent parser: time per message and LLM coverage.
+
+Usage::
+
+    python -m benchmarks.bench_intent --repeat 10000
+    python -m benchmarks.bench_intent --messages sample.txt
+
+``--messages`` reads one free-text message per line, e.g. a sample of real
+traffic; without it a built-in mix of typical messages is used. Coverage is
+the share of messages answered without calling the LLM.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections import Counter
+
+from tg_cal_reminder.llm.intent import IntentParser
+
+SAMPLE = [
+    "help",
+    "Help!",
+    "list",
+    "my events",
+    "все события",
+    "close 5 7",
+    "done 12",
+    "lang ru",
+    "timezone Europe/Paris",
+    "2025-01-02 10:00 Dentist",
+    "2025-01-02 10:00 2025-01-02 11:00 Team sync",
+    "what do I have today",
+    "what do I have tomorrow?",
+    "dentist tomorrow at 10",
+    "move my meeting to friday",
+    "I moved to Berlin",
+    "что у меня сегодня",
+    "help me add a meeting",
+    "remind me to call mom at 6",
+    "cancel the standup",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--messages", help="file with one message per line")
+    args = parser.parse_args()
+
+    messages = SAMPLE
+    if args.messages:
+        with open(args.messages, encoding="utf-8") as fh:
+            messages = [line.strip() for line in fh if line.strip()]
+
+    intents = IntentParser()
+    commands: Counter[str] = Counter()
+    for text in messages:
+        result = intents.parse(text)
+        commands[result["command"] if result else "(llm)"] += 1
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in messages:
+            intents.parse(text)
+    elapsed = time.perf_counter() - started
+
+    per_message = elapsed / (args.repeat * len(messages))
+    print(f"messages: {len(messages)}")
+    skipped = len(messages) - commands["(llm)"]
+    print(f"coverage: {skipped}/{len(messages)} ({skipped / len(messages):.1%}) skip the LLM")
+    print(f"parse time: {per_message * 1e6:.1f} us/message")
+    for command, count in commands.most_common():
+        print(f"  {command:<18} {count}")
+
+
+if __name__ == "__main__":
+    main()
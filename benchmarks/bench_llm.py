@@ -0,0 +1,129 @@
+"""Load-test the LLM translation path against the fake chat-completions server.
+
+Usage::
+
+    python -m benchmarks.bench_llm --requests 2000 --concurrency 100 --error-rate 0.05
+    python -m benchmarks.bench_llm --latency fixed:0.2 --outage 2:5 --hedge
+
+Messages go through the same stack as in the bot: ``translate_message``,
+``ResilientTranslator`` and ``TranslationGate``. By default a
+:class:`~benchmarks.fake_llm.FakeLLM` runs in-process; ``--url`` targets
+another server instead, e.g. one started with ``python -m benchmarks.fake_llm``.
+``--distinct`` limits the number of different messages so that concurrent
+duplicates are coalesced.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks import fake_llm
+from benchmarks.stub_server import StubServer
+from tg_cal_reminder.llm.client import CircuitBreaker, LLMUnavailableError, ResilientTranslator
+from tg_cal_reminder.llm.limiter import TranslationGate, current_user
+from tg_cal_reminder.llm.translator import LLMRequestError, translate_message
+
+
+def quantile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run(args: argparse.Namespace, url: str) -> None:
+    os.environ["LLM_API_URL"] = url
+    limits = httpx.Limits(max_connections=args.max_concurrency * 2)
+    async with httpx.AsyncClient(limits=limits) as client:
+
+        async def translate(text: str, lang: str, tz: str) -> dict:
+            return await translate_message(client, text, lang, tz, timeout=args.attempt_timeout)
+
+        resilient = ResilientTranslator(
+            translate,
+            attempt_timeout=args.attempt_timeout,
+            total_timeout=args.total_timeout,
+            max_attempts=args.max_attempts,
+            hedge=args.hedge,
+            breaker=CircuitBreaker(reset_timeout=args.breaker_reset),
+        )
+        gate = TranslationGate(resilient, max_concurrency=args.max_concurrency)
+
+        outcomes: Counter[str] = Counter()
+        latencies: list[float] = []
+        pending = asyncio.Semaphore(args.concurrency)
+        distinct = args.distinct or args.requests
+
+        async def one(i: int) -> None:
+            async with pending:
+                current_user.set(i % args.users)
+                started = time.perf_counter()
+                try:
+                    await gate(f"meeting with team number {i % distinct}", "en", "UTC")
+                except LLMUnavailableError:
+                    outcomes["unavailable"] += 1
+                except (LLMRequestError, ValueError):
+                    outcomes["failed"] += 1
+                else:
+                    outcomes["ok"] += 1
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        # ``translate_message`` prints every prompt; keep the report readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests: {args.requests} in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())))
+    print(
+        "latency: "
+        + ", ".join(
+            f"{name}={quantile(latencies, q) * 1000:.0f}ms"
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        )
+    )
+    m = resilient.metrics
+    print(
+        f"client: attempts={m.attempts} retries={m.retries} hedges={m.hedges} "
+        f"hedge_wins={m.hedge_wins} failures={m.failures} short_circuits={m.short_circuits}"
+    )
+    print(f"breaker: {resilient.breaker.state}")
+    print(f"gate: {gate.metrics} avg_wait={gate.metrics.avg_wait * 1000:.0f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--distinct", type=int, help="number of different messages")
+    parser.add_argument("--url", help="use this endpoint instead of an in-process fake")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLM_MAX_CONCURRENCY")
+    parser.add_argument("--attempt-timeout", type=float, default=10.0)
+    parser.add_argument("--total-timeout", type=float, default=25.0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--breaker-reset", type=float, default=30.0)
+    parser.add_argument("--hedge", action="store_true")
+    fake_llm.add_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.url:
+        await run(args, args.url)
+        return
+    fake = fake_llm.from_arguments(args)
+    async with StubServer(fake) as server:
+        await run(args, f"{server.url}/v1/chat/completions")
+    print(f"server: {fake.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+"""Count database round-trips and time each bot command end to end.
+
+Usage::
+
+    python -m benchmarks.bench_roundtrips --repeat 200
+
+Every repetition plays a new user's session through ``handle_update``
+(first contact, authorization, settings, event commands) and records the
+SQL statements and commits issued per command. The database defaults to a
+temporary SQLite file; pass ``--database-url`` to run against PostgreSQL.
+On SQLite a new user or a changed username costs a second round-trip in
+``crud.upsert_user``, which PostgreSQL does in one statement.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import re
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from tg_cal_reminder.bot.update import handle_update
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache
+from tg_cal_reminder.db.models import Base
+
+SECRET = "bench-secret"
+
+# (label, message text); ``{id}`` is replaced by the id of the added event.
+SCRIPT = [
+    ("first contact", "/start"),
+    ("authorize", SECRET),
+    ("/lang", "/lang en"),
+    ("/timezone", "/timezone Europe/Paris"),
+    ("/add_event", "/add_event 2030-01-01 10:00 Planning"),
+    ("/edit_event", "/edit_event {id} 2030-01-01 11:00 Planning"),
+    ("/list_events", "/list_events"),
+    ("/list_all_events", "/list_all_events"),
+    ("/close_event", "/close_event {id}"),
+]
+_EVENT_ID_RE = re.compile(r"^Event (\d+) added")
+
+
+class RoundTripCounter:
+    """Count statements and commits issued through an engine."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_statement)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_statement(self, *args: object) -> None:
+        self.statements += 1
+
+    def _on_commit(self, *args: object) -> None:
+        self.commits += 1
+
+    def snapshot(self) -> tuple[int, int]:
+        return self.statements, self.commits
+
+
+async def run(
+    engine: AsyncEngine, repeat: int, user_cache: UserCache | None, unit_of_work: bool
+) -> None:
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    counter = RoundTripCounter(engine)
+    replies: list[str] = []
+
+    async def telegram(request: httpx.Request) -> httpx.Response:
+        fields = dict(httpx.QueryParams(request.content.decode()))
+        replies.append(fields["text"])
+        return httpx.Response(200, json={"ok": True})
+
+    totals: dict[str, list[float]] = defaultdict(lambda: [0, 0, 0.0])
+    update_id = 0
+    transport = httpx.MockTransport(telegram)
+    async with httpx.AsyncClient(transport=transport, base_url="https://bench/") as client:
+        for user in range(repeat):
+            event_id = ""
+            for label, text in SCRIPT:
+                update_id += 1
+                update = {
+                    "update_id": update_id,
+                    "message": {
+                        "text": text.format(id=event_id),
+                        "chat": {"id": 1_000 + user},
+                        "from": {"id": 1_000 + user, "username": f"user{user}"},
+                    },
+                }
+                statements, commits = counter.snapshot()
+                started = time.perf_counter()
+                await handle_update(
+                    update,
+                    client,
+                    factory,
+                    translator,
+                    user_cache=user_cache,
+                    unit_of_work=unit_of_work,
+                )
+                elapsed = time.perf_counter() - started
+                total = totals[label]
+                total[0] += counter.statements - statements
+                total[1] += counter.commits - commits
+                total[2] += elapsed
+                if match := _EVENT_ID_RE.match(replies[-1]):
+                    event_id = match.group(1)
+
+    print(f"{'command':<18} {'statements':>10} {'commits':>8} {'round-trips':>12} {'ms':>8}")
+    overall = [0.0, 0.0, 0.0]
+    for label, _ in SCRIPT:
+        statements, commits, elapsed = (value / repeat for value in totals[label])
+        overall = [overall[0] + statements, overall[1] + commits, overall[2] + elapsed]
+        print(
+            f"{label:<18} {statements:>10.1f} {commits:>8.1f} "
+            f"{statements + commits:>12.1f} {elapsed * 1000:>8.2f}"
+        )
+    statements, commits, elapsed = overall
+    print(
+        f"{'total':<18} {statements:>10.1f} {commits:>8.1f} "
+        f"{statements + commits:>12.1f} {elapsed * 1000:>8.2f}"
+    )
+
+
+async def translator(text: str, lang: str, tz: str) -> dict:
+    raise AssertionError("the benchmark script only sends commands")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--user-cache", action="store_true", help="enable the user cache")
+    parser.add_argument("--unit-of-work", action="store_true", help="commit each update once")
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    os.environ["BOT_SECRET"] = SECRET
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_async_engine(url)
+        user_cache = None
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+            if args.user_cache:
+                user_cache = UserCache()
+                crud.add_change_listener(user_cache.on_change)
+            await run(engine, args.repeat, user_cache, args.unit_of_work)
+        finally:
+            if user_cache is not None:
+                crud.remove_change_listener(user_cache.on_change)
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+"""Fake OpenAI-compatible chat-completions server for offline LLM load tests.
+
+Usage::
+
+    python -m benchmarks.fake_llm --port 8089 --latency lognormal:0.8,0.6 --error-rate 0.05
+    LLM_API_URL=http://127.0.0.1:8089/v1/chat/completions python -m tg_cal_reminder.main
+
+Answers are canned ``TranslatorResponse`` objects: ``--responses`` reads a
+JSON object mapping message text to the answer, other messages get the
+fast-path intent parser's answer or ``{"error": "Unrecognized"}``.
+
+``--latency`` takes ``fixed:S``, ``uniform:LOW,HIGH`` or
+``lognormal:MEDIAN,SIGMA`` (seconds). ``--error-rate``, ``--throttle-rate``
+and ``--hang-rate`` answer that share of requests with 500, 429 or not at
+all; ``--outage START:DURATION`` answers 503 for ``DURATION`` seconds after
+``START`` seconds of uptime and can be repeated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import random
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from benchmarks.stub_server import StubServer
+from tg_cal_reminder.llm.intent import IntentParser
+
+UNRECOGNIZED = {
+    "error": "Unrecognized",
+    "error_reason": "The fake LLM has no canned answer for this message.",
+}
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Return a sampler for the latency distribution described by ``spec``."""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        low, high = values
+        return lambda: rng.uniform(low, high)
+    if kind == "lognormal" and len(values) == 2:
+        mu, sigma = math.log(values[0]), values[1]
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Invalid latency distribution: {spec!r}")
+
+
+def parse_outage(spec: str) -> tuple[float, float]:
+    start, _, duration = spec.partition(":")
+    return float(start), float(duration)
+
+
+@dataclass
+class FakeLLMStats:
+    """Requests answered by the fake server, by outcome."""
+
+    requests: int = 0
+    ok: int = 0
+    errors: int = 0
+    throttled: int = 0
+    hung: int = 0
+    outages: int = 0
+
+
+class FakeLLM:
+    """Request handler imitating an OpenAI-compatible chat-completions API."""
+
+    def __init__(
+        self,
+        *,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        outages: Sequence[tuple[float, float]] = (),
+        responses: dict[str, dict[str, Any]] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self._random = random.Random(seed)
+        self.latency = parse_latency(latency, self._random)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.hang_rate = hang_rate
+        self.outages = list(outages)
+        self.responses = responses or {}
+        self.intents = IntentParser()
+        self.stats = FakeLLMStats()
+        self.started = time.monotonic()
+
+    def answer(self, text: str) -> dict[str, Any]:
+        """Return the canned ``TranslatorResponse`` for ``text``."""
+        if text in self.responses:
+            return self.responses[text]
+        return self.intents.parse(text) or UNRECOGNIZED
+
+    async def __call__(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        if method != "POST" or not target.split("?")[0].endswith("/chat/completions"):
+            return 404, {"error": {"message": f"No route for {method} {target}"}}
+        self.stats.requests += 1
+
+        uptime = time.monotonic() - self.started
+        if any(start <= uptime < start + duration for start, duration in self.outages):
+            self.stats.outages += 1
+            return 503, {"error": {"message": "Service unavailable"}}
+        if self._random.random() < self.hang_rate:
+            self.stats.hung += 1
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.latency())
+        if self._random.random() < self.error_rate:
+            self.stats.errors += 1
+            return 500, {"error": {"message": "Internal error"}}
+        if self._random.random() < self.throttle_rate:
+            self.stats.throttled += 1
+            return 429, {"error": {"message": "Rate limit exceeded"}}
+
+        messages = json.loads(body)["messages"]
+        # The translator sends "<language>>>> <text>" as the user message.
+        _, _, text = messages[-1]["content"].partition(">>> ")
+        self.stats.ok += 1
+        return 200, {
+            "id": f"chatcmpl-fake-{self.stats.requests}",
+            "object": "chat.completion",
+            "model": "fake",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(self.answer(text))},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the fake server's behaviour options to ``parser``."""
+    parser.add_argument("--latency", default="lognormal:0.8,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--outage", action="append", default=[], type=parse_outage)
+    parser.add_argument("--responses", help="JSON file mapping message text to an answer")
+    parser.add_argument("--seed", type=int)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeLLM:
+    responses = None
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as fh:
+            responses = json.load(fh)
+    return FakeLLM(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        hang_rate=args.hang_rate,
+        outages=args.outage,
+        responses=responses,
+        seed=args.seed,
+    )
+
+
+async def serve(fake: FakeLLM, host: str, port: int) -> None:
+    async with StubServer(fake, host, port) as server:
+        print(f"fake LLM listening on {server.url}/v1/chat/completions")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            print(fake.stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(from_arguments(args), args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
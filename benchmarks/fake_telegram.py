@@ -0,0 +1,321 @@
+"""Fake Telegram Bot API that replays synthetic traffic and times the replies.
+
+Usage::
+
+    python -m benchmarks.fake_telegram --port 8081 --users 200 --rate 20 --duration 60
+    TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_SECRET=bench-secret \\
+        python -m tg_cal_reminder.main
+
+The server answers ``getUpdates`` (with long polling), ``sendMessage`` and
+``setMyCommands`` for any bot token. ``--users`` simulated users send
+messages at ``--rate`` per second in total (Poisson arrivals), starting with
+``--secret`` to authorize. ``sendMessage`` is rate limited like Telegram,
+``--chat-rate`` per chat and ``--global-rate`` overall, and answers 429 with
+``retry_after`` beyond that. The latency of an update is the time from
+queueing it until the next reply to its chat arrives, so it includes
+polling, handling and outbound rate limiting. Replies are matched to a chat's
+updates in order; a message that can only be a further chunk of a long reply
+(see ``split_message``) is not counted as a reply.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from benchmarks.stub_server import StubServer
+from tg_cal_reminder.bot.sender import MAX_MESSAGE_LENGTH
+
+FIRST_CHAT_ID = 100_000
+
+# (message text, weight). Commands, fast-path free text and text for the LLM.
+TRAFFIC = [
+    ("/list_events", 30),
+    ("/add_event 2030-01-02 10:00 Planning", 20),
+    ("/help", 5),
+    ("my events", 20),
+    ("help", 5),
+    ("dentist tomorrow at 10", 10),
+    ("what do I have on friday?", 10),
+]
+
+
+class _Bucket:
+    """Token bucket allowing bursts of ``burst`` at a sustained ``rate``."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def retry_after(self, now: float) -> int:
+        """Take a token, or return the whole seconds to wait for one."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return max(1, math.ceil((1 - self.tokens) / self.rate))
+
+
+@dataclass
+class FakeTelegramStats:
+    """Traffic seen by the fake Bot API."""
+
+    updates: int = 0
+    replies: int = 0
+    extra_messages: int = 0
+    rate_limited: int = 0
+    polls: int = 0
+    commands_set: int = 0
+
+    @property
+    def unanswered(self) -> int:
+        return self.updates - self.replies
+
+
+class FakeTelegram:
+    """Request handler imitating the parts of the Bot API the bot uses."""
+
+    def __init__(
+        self, *, chat_rate: float = 1.0, chat_burst: float = 3.0, global_rate: float = 30.0
+    ) -> None:
+        self.stats = FakeTelegramStats()
+        self.latencies: list[float] = []
+        self._updates: deque[dict[str, Any]] = deque()
+        self._next_update_id = 1
+        self._message_id = 0
+        self._arrived = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # Queue times of updates still waiting for a reply, per chat.
+        self._waiting: dict[int, deque[float]] = {}
+        # Length of the last message sent to each chat.
+        self._last_length: dict[int, int] = {}
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chats: dict[int, _Bucket] = {}
+        self._global = _Bucket(global_rate, global_rate)
+
+    def push(self, chat_id: int, text: str) -> None:
+        """Queue a text message from user ``chat_id`` for ``getUpdates``."""
+        self._updates.append(
+            {
+                "update_id": self._next_update_id,
+                "message": {
+                    "message_id": self._next_update_id,
+                    "date": int(time.time()),
+                    "text": text,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "username": f"user{chat_id}"},
+                },
+            }
+        )
+        self._next_update_id += 1
+        self._waiting.setdefault(chat_id, deque()).append(time.monotonic())
+        self.stats.updates += 1
+        self._drained.clear()
+        self._arrived.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until every queued update is answered; ``False`` on timeout."""
+        try:
+            async with asyncio.timeout(timeout):
+                await self._drained.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    async def __call__(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        params: dict[str, Any] = dict(parse_qsl(url.query))
+        if body.startswith(b"{"):
+            params.update(json.loads(body))
+        elif body:
+            params.update(parse_qsl(body.decode()))
+
+        api_method = url.path.rsplit("/", 1)[-1]
+        if api_method == "getUpdates":
+            return await self._get_updates(params)
+        if api_method == "sendMessage":
+            return self._send_message(params)
+        if api_method == "setMyCommands":
+            self.stats.commands_set += 1
+            return 200, {"ok": True, "result": True}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    async def _get_updates(self, params: dict[str, Any]) -> tuple[int, Any]:
+        self.stats.polls += 1
+        offset = int(params.get("offset") or 0)
+        # Like Telegram, updates below ``offset`` count as confirmed.
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        timeout = float(params.get("timeout") or 0)
+        if not self._updates and timeout > 0:
+            self._arrived.clear()
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(timeout):
+                    await self._arrived.wait()
+        limit = int(params.get("limit") or 100)
+        return 200, {"ok": True, "result": list(self._updates)[:limit]}
+
+    def _send_message(self, params: dict[str, Any]) -> tuple[int, Any]:
+        chat_id = int(params["chat_id"])
+        now = time.monotonic()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Bucket(self._chat_rate, self._chat_burst)
+        retry_after = chat.retry_after(now)
+        if not retry_after:
+            retry_after = self._global.retry_after(now)
+            if retry_after:
+                chat.tokens += 1
+        if retry_after:
+            self.stats.rate_limited += 1
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }
+
+        text = params.get("text", "")
+        # ``split_message`` only starts a new chunk when the next line does not
+        # fit, so a message whose first line would have fit is a new reply.
+        previous = self._last_length.get(chat_id, 0)
+        continued = previous + 1 + len(text.split("\n", 1)[0]) > MAX_MESSAGE_LENGTH
+        self._last_length[chat_id] = len(text)
+        waiting = self._waiting.get(chat_id)
+        if waiting and not continued:
+            self.latencies.append(now - waiting.popleft())
+            self.stats.replies += 1
+            if self.stats.replies == self.stats.updates:
+                self._drained.set()
+        else:
+            # Further chunks of a long reply, reminders or digests.
+            self.stats.extra_messages += 1
+        self._message_id += 1
+        return 200, {
+            "ok": True,
+            "result": {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": text,
+            },
+        }
+
+    def report(self) -> str:
+        """Return a summary of the traffic and reply latencies."""
+        latencies = sorted(self.latencies)
+
+        def quantile(q: float) -> str:
+            if not latencies:
+                return "-"
+            return f"{latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000:.0f}ms"
+
+        stats = self.stats
+        return "\n".join(
+            [
+                f"updates: {stats.updates}, replies: {stats.replies}, "
+                f"unanswered: {stats.unanswered}, extra messages: {stats.extra_messages}",
+                f"429 responses: {stats.rate_limited}, getUpdates calls: {stats.polls}",
+                "update to reply: "
+                + ", ".join(
+                    f"{name}={quantile(q)}"
+                    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+                ),
+            ]
+        )
+
+
+async def replay(
+    fake: FakeTelegram,
+    *,
+    users: int,
+    rate: float,
+    duration: float,
+    secret: str | None = None,
+    seed: int | None = None,
+) -> None:
+    """Push messages from ``users`` simulated users at ``rate`` per second.
+
+    With ``secret`` each user's first message is the secret, so later ones
+    reach the authorized command handlers.
+    """
+    rng = random.Random(seed)
+    texts, weights = zip(*TRAFFIC, strict=True)
+    authorized: set[int] = set()
+    loop = asyncio.get_running_loop()
+    next_at = started = loop.time()
+    while next_at < started + duration:
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        user = rng.randrange(users)
+        if secret is not None and user not in authorized:
+            authorized.add(user)
+            text = secret
+        else:
+            text = rng.choices(texts, weights)[0]
+        fake.push(FIRST_CHAT_ID + user, text)
+        # Scheduled from the previous arrival so the rate does not drift.
+        next_at += rng.expovariate(rate)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the traffic and rate limit options to ``parser``."""
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=10.0, help="messages per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--drain", type=float, default=30.0, help="seconds to await replies")
+    parser.add_argument("--secret", default="bench-secret", help="BOT_SECRET of the bot")
+    parser.add_argument("--chat-rate", type=float, default=1.0)
+    parser.add_argument("--chat-burst", type=float, default=3.0)
+    parser.add_argument("--global-rate", type=float, default=30.0)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeTelegram:
+    return FakeTelegram(
+        chat_rate=args.chat_rate, chat_burst=args.chat_burst, global_rate=args.global_rate
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    fake = from_arguments(args)
+    async with StubServer(fake, args.host, args.port) as server:
+        print(f"fake Telegram listening on {server.url}; waiting for the bot to poll")
+        while not fake.stats.polls:
+            await asyncio.sleep(0.1)
+        await replay(
+            fake,
+            users=args.users,
+            rate=args.rate,
+            duration=args.duration,
+            secret=args.secret,
+            seed=args.seed,
+        )
+        await fake.drain(args.drain)
+        print(fake.report())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--seed", type=int)
+    add_arguments(parser)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
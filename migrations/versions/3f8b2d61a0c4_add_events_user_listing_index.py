@@ -0,0 +1,30 @@
+"""add composite index for per-user event listings
+
+Revision ID: 3f8b2d61a0c4
+Revises: 7c1e4a9d2f60
+Create Date: 2025-06-12 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "3f8b2d61a0c4"
+down_revision: str | None = "7c1e4a9d2f60"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_events_user_id_is_closed_start_time",
+        "events",
+        ["user_id", "is_closed", "start_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_events_user_id_is_closed_start_time", table_name="events")
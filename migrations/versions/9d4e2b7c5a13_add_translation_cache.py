@@ -0,0 +1,36 @@
+"""add shared translation cache table
+
+Revision ID: 9d4e2b7c5a13
+Revises: 3f8b2d61a0c4
+Create Date: 2025-06-20 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "9d4e2b7c5a13"
+down_revision: str | None = "3f8b2d61a0c4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "translation_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        "ix_translation_cache_expires_at", "translation_cache", ["expires_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_translation_cache_expires_at", table_name="translation_cache")
+    op.drop_table("translation_cache")
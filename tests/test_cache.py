@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache, UserSnapshot
+from tg_cal_reminder.db.models import Base
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+def _snapshot(user_id: int, telegram_id: int, language: str = "en") -> UserSnapshot:
+    return UserSnapshot(
+        id=user_id,
+        telegram_id=telegram_id,
+        username=None,
+        language=language,
+        timezone="UTC",
+        is_authorized=True,
+        created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC),
+    )
+
+
+def test_user_cache_evicts_least_recently_used():
+    cache = UserCache(maxsize=2)
+    cache.put(_snapshot(1, 10))
+    cache.put(_snapshot(2, 20))
+    assert cache.get(10) is not None
+    cache.put(_snapshot(3, 30))
+
+    assert cache.get(20) is None
+    assert cache.get(10) is not None and cache.get(30) is not None
+    assert len(cache) == 2
+    assert cache.metrics.evictions == 1
+    assert cache.metrics.hits == 3 and cache.metrics.misses == 1
+    assert cache.metrics.hit_rate == 0.75
+
+
+def test_user_cache_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("tg_cal_reminder.db.cache.time.monotonic", lambda: now[0])
+    cache = UserCache(ttl=10)
+    cache.put(_snapshot(1, 10))
+    now[0] += 9
+    assert cache.get(10) is not None
+    now[0] += 2
+    assert cache.get(10) is None
+    assert len(cache) == 0
+
+
+def test_user_cache_invalidation():
+    cache = UserCache()
+    cache.put(_snapshot(1, 10))
+    cache.on_change(crud.Change("events", 5, 1))
+    assert cache.get(10) is not None
+
+    epoch = cache.epoch()
+    cache.on_change(crud.Change("users", 1, 1))
+    assert cache.get(10) is None
+    # A snapshot read before the write must not be stored after it.
+    cache.put(_snapshot(1, 10), epoch)
+    assert cache.get(10) is None
+    cache.put(_snapshot(1, 10, "fr"), cache.epoch())
+    assert cache.get(10).language == "fr"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_attach_does_not_query(async_session: AsyncSession):
+    user = await crud.create_user(async_session, telegram_id=10)
+    snapshot = UserSnapshot.of(user)
+    async_session.expunge_all()
+
+    statements: list[str] = []
+    sync_engine = async_session.bind.sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        attached = snapshot.attach(async_session)
+        assert attached.telegram_id == 10 and attached.language == "en"
+        assert statements == []
+        await crud.update_user_language(async_session, attached, "fr")
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert any(statement.startswith("UPDATE users") for statement in statements)
+    reloaded = await crud.get_user_by_telegram_id(async_session, 10)
+    assert reloaded is not None and reloaded.language == "fr"
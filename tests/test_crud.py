@@ -2,6 +2,7 @@ import datetime
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from tg_cal_reminder.db import crud
@@ -148,3 +149,249 @@ async def test_close_events_empty_and_cross_user(async_session: AsyncSession):
     refreshed = await crud.list_events(async_session, user2.id)
     assert refreshed[0].is_closed is False
 
+
+@pytest.mark.asyncio
+async def test_update_offset_only_moves_forward(async_session: AsyncSession) -> None:
+    assert await crud.get_update_offset(async_session) is None
+
+    await crud.advance_update_offset(async_session, 10)
+    await async_session.commit()
+    assert await crud.get_update_offset(async_session) == 10
+
+    await crud.advance_update_offset(async_session, 7)
+    await async_session.commit()
+    assert await crud.get_update_offset(async_session) == 10
+
+    await crud.advance_update_offset(async_session, 12)
+    await async_session.commit()
+    assert await crud.get_update_offset(async_session) == 12
+
+
+@pytest.mark.asyncio
+async def test_mark_update_processed_is_idempotent(async_session: AsyncSession) -> None:
+    assert await crud.is_update_processed(async_session, 42) is False
+
+    await crud.mark_update_processed(async_session, 42)
+    await crud.mark_update_processed(async_session, 42)
+    await async_session.commit()
+
+    assert await crud.is_update_processed(async_session, 42) is True
+    assert await crud.is_update_processed(async_session, 43) is False
+
+
+@pytest.mark.asyncio
+async def test_purge_processed_updates(async_session: AsyncSession) -> None:
+    await crud.mark_update_processed(async_session, 1)
+    await async_session.commit()
+    now = datetime.datetime.now(datetime.UTC)
+
+    assert await crud.purge_processed_updates(async_session, now - datetime.timedelta(hours=1)) == 0
+    assert await crud.purge_processed_updates(async_session, now + datetime.timedelta(hours=1)) == 1
+    assert await crud.is_update_processed(async_session, 1) is False
+
+
+@pytest.mark.asyncio
+async def test_list_upcoming_events(async_session: AsyncSession) -> None:
+    user = await crud.create_user(async_session, telegram_id=80)
+    other = await crud.create_user(async_session, telegram_id=81)
+    now = datetime.datetime.now(datetime.UTC)
+    hour = datetime.timedelta(hours=1)
+
+    await crud.create_event(async_session, user.id, now - hour, "past")
+    later = await crud.create_event(async_session, user.id, now + 2 * hour, "later")
+    soon = await crud.create_event(async_session, user.id, now + hour, "soon")
+    closed = await crud.create_event(async_session, user.id, now + hour, "closed")
+    await crud.close_events(async_session, user.id, [closed.id])
+    await crud.create_event(async_session, other.id, now + hour, "other")
+
+    events = await crud.list_upcoming_events(async_session, user.id, now)
+    assert [e.id for e in events] == [soon.id, later.id]
+
+    limited = await crud.list_upcoming_events(async_session, user.id, now, limit=1)
+    assert [e.id for e in limited] == [soon.id]
+
+
+async def _query_plans(session: AsyncSession, call) -> list[str]:
+    """Run ``call`` and return SQLite's query plan for each SELECT it issued."""
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await call()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    plans = []
+    for statement, parameters in captured:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plans.append(" | ".join(row[-1] for row in result.all()))
+    return plans
+
+
+@pytest.mark.asyncio
+async def test_listing_queries_use_user_index(async_session: AsyncSession) -> None:
+    user = await crud.create_user(async_session, telegram_id=70)
+    now = datetime.datetime.now(datetime.UTC)
+    for hours in range(3):
+        await crud.create_event(async_session, user.id, now + datetime.timedelta(hours=hours), "e")
+
+    calls = [
+        lambda: crud.list_events(async_session, user.id),
+        lambda: crud.list_events(async_session, user.id, include_closed=False),
+        lambda: crud.list_events_between(async_session, user.id, now),
+        lambda: crud.list_events_between(async_session, user.id, after=(False, now, 1), limit=10),
+        lambda: crud.list_upcoming_events(async_session, user.id, now, limit=10),
+        lambda: crud.get_events_between(
+            async_session, user.id, now, now + datetime.timedelta(days=1)
+        ),
+    ]
+    for call in calls:
+        plans = await _query_plans(async_session, call)
+        assert plans
+        for plan in plans:
+            assert "ix_events_user_id_is_closed_start_time" in plan, plan
+            assert "SCAN events" not in plan, plan
+            assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.asyncio
+async def test_changes_are_dispatched_on_commit_only(async_session: AsyncSession) -> None:
+    received: list[crud.Change] = []
+    crud.add_change_listener(received.append)
+    try:
+        user = await crud.create_user(async_session, telegram_id=90)
+        start = datetime.datetime(2030, 1, 1, 9, 0, tzinfo=datetime.UTC)
+        event = await crud.create_event(async_session, user.id, start, "e")
+        assert received == [crud.Change("events", event.id, user.id, start)]
+
+        await crud.update_user_language(async_session, user, "fr")
+        assert received[-1] == crud.Change("users", user.id, user.id)
+
+        received.clear()
+        crud._publish(async_session, crud.Change("events", event.id, user.id))
+        await async_session.rollback()
+        await async_session.commit()
+        assert received == []
+    finally:
+        crud.remove_change_listener(received.append)
+
+
+@pytest.mark.asyncio
+async def test_upsert_user_inserts_then_refreshes_username(async_session: AsyncSession) -> None:
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = async_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        created = await crud.upsert_user(async_session, telegram_id=100, username="old")
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    # SQLite reads the user first; PostgreSQL does both in one statement.
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT"]
+    assert created.id is not None
+    assert created.language == "en" and created.timezone == "UTC"
+    assert created.is_authorized is False and created.created_at is not None
+
+    await crud.authorize_user(async_session, created)
+    again = await crud.upsert_user(async_session, telegram_id=100, username="new")
+    assert again.id == created.id
+    assert again.username == "new"
+    # Existing columns are kept on conflict.
+    assert again.is_authorized is True
+
+    fetched = await crud.get_user_by_telegram_id(async_session, 100)
+    assert fetched is not None and fetched.username == "new"
+
+
+@pytest.mark.asyncio
+async def test_upsert_user_only_writes_changed_usernames(async_session: AsyncSession) -> None:
+    changes: list[crud.Change] = []
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    crud.add_change_listener(changes.append)
+    sync_engine = async_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        created = await crud.upsert_user(async_session, telegram_id=101, username="eve")
+        assert changes == []
+
+        same = await crud.upsert_user(async_session, telegram_id=101, username="eve")
+        assert same.id == created.id and same.username == "eve"
+        # The unchanged row is not returned by the upsert and read instead.
+        assert statements[-1].startswith("SELECT")
+        assert changes == []
+
+        renamed = await crud.upsert_user(async_session, telegram_id=101, username="mallory")
+        assert renamed.username == "mallory"
+        assert changes == [crud.Change("users", created.id, created.id)]
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+        crud.remove_change_listener(changes.append)
+
+
+@pytest.mark.asyncio
+async def test_writes_return_rows_without_refresh(async_session: AsyncSession) -> None:
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = async_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        user = await crud.create_user(async_session, telegram_id=110, username="dave")
+        updated = await crud.update_user_timezone(async_session, user, "Asia/Tokyo")
+        start = datetime.datetime(2030, 1, 1, 9, 0, tzinfo=datetime.UTC)
+        created = await crud.create_event(async_session, user.id, start, "Standup")
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert [statement.split()[0] for statement in statements] == ["INSERT", "UPDATE", "INSERT"]
+    assert updated is user and user.timezone == "Asia/Tokyo"
+    assert user.created_at is not None
+    assert created.id is not None and created.title == "Standup"
+    assert created.is_closed is False and created.created_at is not None
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_defers_commit_to_caller(async_session: AsyncSession) -> None:
+    commits: list[None] = []
+    received: list[crud.Change] = []
+
+    def count(conn):
+        commits.append(None)
+
+    sync_engine = async_session.bind.sync_engine
+    event.listen(sync_engine, "commit", count)
+    crud.add_change_listener(received.append)
+    try:
+        crud.begin_unit_of_work(async_session)
+        user = await crud.create_user(async_session, telegram_id=120)
+        await crud.authorize_user(async_session, user)
+        start = datetime.datetime(2030, 1, 1, 9, 0, tzinfo=datetime.UTC)
+        event_ = await crud.create_event(async_session, user.id, start, "e")
+        assert commits == [] and received == []
+
+        await async_session.commit()
+    finally:
+        event.remove(sync_engine, "commit", count)
+        crud.remove_change_listener(received.append)
+
+    assert len(commits) == 1
+    assert received == [
+        crud.Change("users", user.id, user.id),
+        crud.Change("events", event_.id, user.id, start),
+    ]
@@ -0,0 +1,116 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from tg_cal_reminder.bot import digests, scheduler
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.models import Base
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+NOW = datetime.datetime(2024, 3, 6, 12, 0, tzinfo=datetime.UTC)
+
+
+class RecordingSender:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        alice = await crud.create_user(session, 100, is_authorized=True)
+        bob = await crud.create_user(session, 200, language="ru", is_authorized=True)
+        stranger = await crud.create_user(session, 300, is_authorized=False)
+        await crud.create_event(session, alice.id, NOW + datetime.timedelta(hours=3), "Lunch")
+        await crud.create_event(session, alice.id, NOW - datetime.timedelta(hours=3), "Gym")
+        closed = await crud.create_event(session, alice.id, NOW, "Closed")
+        await crud.close_events(session, alice.id, [closed.id])
+        await crud.create_event(session, bob.id, NOW + datetime.timedelta(hours=1), "Call")
+        await crud.create_event(session, bob.id, NOW + datetime.timedelta(days=1), "Tomorrow")
+        await crud.create_event(session, stranger.id, NOW, "Hidden")
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_collect_digests_groups_by_user_in_one_query(engine, session_factory):
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        start, end = scheduler.morning_window(NOW)
+        async with session_factory() as session:
+            result = await digests.collect_digests(session, "morning", start, end)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert len(statements) == 1
+    assert [d.chat_id for d in result] == [100, 200]
+    alice_lines = result[0].text.splitlines()
+    assert alice_lines[0] == "Today's events:"
+    assert [line.split(" | ")[0] for line in alice_lines[1:]] == ["09:00 Gym", "15:00 Lunch"]
+    assert result[1].text.splitlines() == ["События на сегодня:", "13:00 Call | id=4"]
+
+
+@pytest.mark.asyncio
+async def test_digest_tick_sends_due_buckets(session_factory):
+    sender = RecordingSender()
+    evening = datetime.datetime(2024, 3, 6, 19, 0, tzinfo=datetime.UTC)
+
+    assert await scheduler.digest_tick(session_factory, sender, evening) == 1
+    assert sender.sent == [(200, "События на завтра:\n12:00 Tomorrow | id=5")]
+
+    sender.sent.clear()
+    monday = datetime.datetime(2024, 3, 4, 8, 0, tzinfo=datetime.UTC)
+    assert await scheduler.digest_tick(session_factory, sender, monday) == 2
+    assert [chat_id for chat_id, _ in sender.sent] == [100, 200]
+    assert "Thu 2024-03-07 12:00 Tomorrow" in sender.sent[1][1]
+
+
+@pytest.mark.asyncio
+async def test_digest_tick_uses_local_time(session_factory):
+    async with session_factory() as session:
+        bob = await crud.get_user_by_telegram_id(session, 200)
+        await crud.update_user_timezone(session, bob, "Asia/Tokyo")
+
+    sender = RecordingSender()
+    # 08:00 in Tokyo: only Bob's morning digest is due.
+    tokyo_morning = datetime.datetime(2024, 3, 5, 23, 0, tzinfo=datetime.UTC)
+    assert await scheduler.digest_tick(session_factory, sender, tokyo_morning) == 1
+    assert sender.sent[0][0] == 200
+    assert "13:00 Call" in sender.sent[0][1]
+
+    sender.sent.clear()
+    # 08:00 UTC: Alice's digest, Bob is no longer in that bucket.
+    utc_morning = datetime.datetime(2024, 3, 6, 8, 0, tzinfo=datetime.UTC)
+    assert await scheduler.digest_tick(session_factory, sender, utc_morning) == 1
+    assert sender.sent[0][0] == 100
+
+
+@pytest.mark.asyncio
+async def test_collect_digests_empty_window(session_factory):
+    start = NOW + datetime.timedelta(days=30)
+    async with session_factory() as session:
+        result = await digests.collect_digests(
+            session, "morning", start, start + datetime.timedelta(days=1)
+        )
+    assert result == []
@@ -0,0 +1,72 @@
+import json
+import random
+
+import httpx
+import pytest
+
+from benchmarks.fake_llm import UNRECOGNIZED, FakeLLM, parse_latency, parse_outage
+from benchmarks.stub_server import StubServer
+
+CHAT_PATH = "/v1/chat/completions"
+
+
+def _request(text: str) -> dict:
+    return {"model": "fake", "messages": [{"role": "user", "content": f"en>>> {text}"}]}
+
+
+def test_parse_latency():
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.25", rng)() == 0.25
+    uniform = parse_latency("uniform:0.1,0.2", rng)
+    assert all(0.1 <= uniform() <= 0.2 for _ in range(100))
+    assert all(parse_latency("lognormal:0.8,0.5", rng)() > 0 for _ in range(100))
+    for spec in ("fixed", "uniform:1", "normal:1,2"):
+        with pytest.raises(ValueError):
+            parse_latency(spec, rng)
+    assert parse_outage("10:5.5") == (10.0, 5.5)
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_answers_over_http():
+    canned = {"command": "/add_event", "args": ["2030-01-01 10:00 Dentist"]}
+    fake = FakeLLM(responses={"dentist on new year": canned})
+
+    async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+        answers = []
+        for text in ("dentist on new year", "help", "sing me a song"):
+            response = await client.post(CHAT_PATH, json=_request(text))
+            assert response.status_code == 200
+            answers.append(json.loads(response.json()["choices"][0]["message"]["content"]))
+        missing = await client.get("/v1/models")
+
+    assert answers == [canned, {"command": "/help", "args": []}, UNRECOGNIZED]
+    assert missing.status_code == 404
+    assert fake.stats.requests == 3 and fake.stats.ok == 3
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_injects_failures():
+    async def status(fake: FakeLLM) -> int:
+        async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+            return (await client.post(CHAT_PATH, json=_request("help"))).status_code
+
+    errors = FakeLLM(error_rate=1.0)
+    throttled = FakeLLM(throttle_rate=1.0)
+    down = FakeLLM(outages=[(0.0, 60.0)], error_rate=1.0)
+
+    assert await status(errors) == 500 and errors.stats.errors == 1
+    assert await status(throttled) == 429 and throttled.stats.throttled == 1
+    # Outages are answered before any other failure is drawn.
+    assert await status(down) == 503
+    assert down.stats.outages == 1 and down.stats.errors == 0
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_hangs_until_the_client_gives_up():
+    fake = FakeLLM(hang_rate=1.0)
+
+    async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+        with pytest.raises(httpx.ReadTimeout):
+            await client.post(CHAT_PATH, json=_request("help"), timeout=0.05)
+
+    assert fake.stats.hung == 1 and fake.stats.ok == 0
@@ -0,0 +1,73 @@
+import httpx
+import pytest
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.stub_server import StubServer
+from tg_cal_reminder.bot.sender import split_message
+
+
+async def _send(client: httpx.AsyncClient, chat_id: int, text: str) -> httpx.Response:
+    return await client.post("/botTOKEN/sendMessage", data={"chat_id": chat_id, "text": text})
+
+
+@pytest.mark.asyncio
+async def test_fake_telegram_confirms_updates_below_offset():
+    fake = FakeTelegram()
+    fake.push(1, "/start")
+    fake.push(2, "/help")
+
+    async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+        first = (await client.post("/botTOKEN/getUpdates", json={"limit": 1})).json()
+        again = (await client.get("/botTOKEN/getUpdates", params={"offset": 1})).json()
+        rest = (await client.get("/botTOKEN/getUpdates", params={"offset": 2})).json()
+        empty = (await client.get("/botTOKEN/getUpdates", params={"offset": 3})).json()
+        missing = await client.post("/botTOKEN/getMe")
+
+    assert [u["update_id"] for u in first["result"]] == [1]
+    assert [u["update_id"] for u in again["result"]] == [1, 2]
+    assert [u["message"]["text"] for u in rest["result"]] == ["/help"]
+    assert empty["result"] == []
+    assert missing.status_code == 404
+    assert fake.stats.polls == 4
+
+
+@pytest.mark.asyncio
+async def test_fake_telegram_rate_limits_chats_with_retry_after():
+    fake = FakeTelegram(chat_rate=1.0, chat_burst=2.0)
+
+    async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+        statuses = [(await _send(client, 7, "hi")).status_code for _ in range(3)]
+        limited = await _send(client, 7, "hi")
+        other_chat = await _send(client, 8, "hi")
+
+    assert statuses == [200, 200, 429]
+    assert limited.json()["parameters"]["retry_after"] == 1
+    assert other_chat.status_code == 200
+    assert fake.stats.rate_limited == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_telegram_times_replies_in_order_per_chat():
+    fake = FakeTelegram(chat_burst=10.0)
+    fake.push(1, "/list_events")
+    fake.push(1, "/help")
+    fake.push(2, "/help")
+
+    async with StubServer(fake) as server, httpx.AsyncClient(base_url=server.url) as client:
+        # The first reply is long enough to be split; its second chunk must
+        # not be taken for the reply to "/help".
+        for chunk in split_message("\n".join(["x" * 100] * 60)):
+            await _send(client, 1, chunk)
+        assert fake.stats.replies == 1 and fake.stats.extra_messages == 1
+        assert not await fake.drain(0.01)
+
+        await _send(client, 1, "help text")
+        await _send(client, 2, "help text")
+        assert await fake.drain(1.0)
+        # A reminder with no update waiting is not a reply.
+        await _send(client, 2, "Reminder: dentist")
+
+    assert fake.stats.updates == fake.stats.replies == 3
+    assert fake.stats.unanswered == 0 and fake.stats.extra_messages == 2
+    assert len(fake.latencies) == 3 and all(latency >= 0 for latency in fake.latencies)
+    assert "updates: 3, replies: 3" in fake.report()
@@ -9,6 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from tg_cal_reminder.bot import handlers
 from tg_cal_reminder.db import crud
 from tg_cal_reminder.db.models import Base, User
+from tg_cal_reminder.i18n.messages import get_message
+from tg_cal_reminder.llm.client import LLMUnavailableError
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -57,6 +59,26 @@ async def test_dispatch_direct_add_event(async_session: AsyncSession, user: User
 
 
 
+@pytest.mark.asyncio
+async def test_dispatch_fast_path_skips_translator(async_session: AsyncSession, user: User):
+    translator = AsyncMock()
+
+    result = await handlers.dispatch(async_session, user, "help", "en", translator)
+
+    translator.assert_not_called()
+    assert result == await handlers.dispatch(async_session, user, "/help", "en", translator)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_llm_unavailable_suggests_commands(async_session: AsyncSession, user: User):
+    translator = AsyncMock(side_effect=LLMUnavailableError("down"))
+
+    with pytest.raises(handlers.HandlerError) as excinfo:
+        await handlers.dispatch(async_session, user, "what can you do?", "ru", translator)
+
+    assert str(excinfo.value) == get_message("llm_unavailable", "ru")
+
+
 @pytest.mark.asyncio
 async def test_dispatch_free_text_uses_translator(async_session: AsyncSession, user: User):
     translator = AsyncMock(return_value={"command": "/help", "args": []})
@@ -151,6 +173,50 @@ async def test_handle_list_all_events(async_session: AsyncSession, user: User):
     assert str(event1.id) not in filtered_ids and str(event2.id) in filtered_ids
 
 
+@pytest.mark.asyncio
+async def test_handle_list_all_events_pages(
+    async_session: AsyncSession, user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(handlers, "LIST_ALL_EVENTS_PAGE_SIZE", 2)
+    now = datetime.datetime.now(datetime.UTC).replace(second=0, microsecond=0)
+    # Two events share a start time so the page boundary falls between them.
+    starts = [now, now + datetime.timedelta(hours=1), now + datetime.timedelta(hours=1)]
+    events = [
+        await crud.create_event(async_session, user.id, start, f"E{i}")
+        for i, start in enumerate(starts)
+    ]
+    closed = await crud.create_event(async_session, user.id, now, "Closed")
+    await crud.close_events(async_session, user.id, [closed.id])
+
+    ctx = handlers.CommandContext(async_session, user)
+    args = now.strftime("%Y-%m-%d %H:%M")
+    seen: list[int] = []
+    pages = 0
+    while True:
+        text = await handlers.handle_list_all_events(ctx, args)
+        pages += 1
+        lines = text.splitlines()
+        if lines[-1].startswith("Next page: "):
+            command = lines.pop().removeprefix("Next page: ")
+            assert command.startswith(f"/list_all_events {now:%Y-%m-%d %H:%M} after=")
+            args = command.removeprefix("/list_all_events ")
+        else:
+            args = ""
+        seen += [int(line.split()[0]) for line in lines]
+        if not args:
+            break
+
+    assert pages == 2
+    assert seen == [events[0].id, events[1].id, events[2].id, closed.id]
+
+
+@pytest.mark.asyncio
+async def test_handle_list_all_events_bad_cursor(async_session: AsyncSession, user: User) -> None:
+    ctx = handlers.CommandContext(async_session, user)
+    with pytest.raises(handlers.HandlerError):
+        await handlers.handle_list_all_events(ctx, "after=nope")
+
+
 @pytest.mark.asyncio
 async def test_handle_edit_event(async_session: AsyncSession, user: User) -> None:
     now = datetime.datetime.now(datetime.UTC)
@@ -193,6 +259,27 @@ async def test_secret_flow(async_session: AsyncSession, monkeypatch):
     assert refreshed is not None and refreshed.is_authorized is True
 
 
+@pytest.mark.asyncio
+async def test_handle_list_events_limit(
+    async_session: AsyncSession, user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(handlers, "LIST_EVENTS_LIMIT", 2)
+    start = datetime.datetime.now(datetime.UTC) + datetime.timedelta(hours=1)
+    events = [
+        await crud.create_event(
+            async_session, user.id, start + datetime.timedelta(minutes=i), f"E{i}"
+        )
+        for i in range(3)
+    ]
+
+    ctx = handlers.CommandContext(async_session, user)
+    text = await handlers.handle_list_events(ctx, "")
+    assert f"id={events[0].id}" in text
+    assert f"id={events[1].id}" in text
+    assert f"id={events[2].id}" not in text
+    assert text.endswith("...")
+
+
 @pytest.mark.asyncio
 async def test_handle_list_events_grouping(
     async_session: AsyncSession, user: User, monkeypatch
@@ -0,0 +1,52 @@
+import pytest
+
+from tg_cal_reminder.llm.intent import IntentParser, parse_intent
+
+
+@pytest.mark.parametrize(
+    ("text", "command", "args"),
+    [
+        ("help", "/help", []),
+        ("  Help! ", "/help", []),
+        ("list", "/list_events", []),
+        ("My events?", "/list_events", []),
+        ("все события", "/list_all_events", []),
+        ("close 5 7", "/close_event", ["5", "7"]),
+        ("Done 3, 4", "/close_event", ["3", "4"]),
+        ("lang ru", "/lang", ["ru"]),
+        ("timezone Europe/Paris", "/timezone", ["Europe/Paris"]),
+        ("2025-01-02 10:00 Dentist", "/add_event", ["2025-01-02 10:00 Dentist"]),
+        (
+            "2025-01-02  10:00 2025-01-02 11:00 Team Sync",
+            "/add_event",
+            ["2025-01-02 10:00 2025-01-02 11:00 Team Sync"],
+        ),
+    ],
+)
+def test_parse_intent_matches(text, command, args):
+    intent = parse_intent(text)
+    assert intent is not None and intent.confidence == 1.0
+    assert intent.as_result() == {"command": command, "args": args}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "what do I have today",
+        "dentist tomorrow at 10",
+        "timezone Mars/Olympus",
+        "2025-13-02 10:00 Dentist",
+        "close the meeting",
+    ],
+)
+def test_parse_intent_leaves_other_text_to_llm(text):
+    assert parse_intent(text) is None
+
+
+def test_parser_falls_back_on_low_confidence():
+    parser = IntentParser()
+    assert parse_intent("help me move my meeting").confidence < parser.threshold
+    assert parser.parse("help me move my meeting") is None
+    assert parser.parse("help") == {"command": "/help", "args": []}
+    assert parser.metrics.matched == 1 and parser.metrics.fallbacks == 1
+    assert parser.metrics.coverage == 0.5
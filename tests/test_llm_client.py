@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from tg_cal_reminder.llm.client import CircuitBreaker, LLMUnavailableError, ResilientTranslator
+from tg_cal_reminder.llm.translator import LLMRequestError
+
+RESULT = {"command": "/help", "args": []}
+
+
+def _client(translate, **kwargs) -> ResilientTranslator:
+    kwargs.setdefault("backoff_base", 0.0)
+    return ResilientTranslator(translate, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_failures():
+    calls = []
+
+    async def translate(text, lang, tz):
+        calls.append(text)
+        if len(calls) < 3:
+            raise LLMRequestError("boom")
+        return RESULT
+
+    client = _client(translate, max_attempts=3)
+    assert await client("hi", "en", "UTC") == RESULT
+    assert len(calls) == 3
+    assert client.metrics.retries == 2 and client.metrics.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_attempt_timeout_and_total_deadline():
+    async def translate(text, lang, tz):
+        await asyncio.sleep(10)
+        return RESULT
+
+    client = _client(translate, attempt_timeout=0.05, total_timeout=0.13, max_attempts=10)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(LLMUnavailableError):
+        await client("hi", "en", "UTC")
+
+    assert loop.time() - started < 0.5
+    assert client.metrics.attempts == 3
+    assert client.metrics.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    async def translate(text, lang, tz):
+        calls.append(text)
+        raise LLMRequestError("bad request", retryable=False)
+
+    client = _client(translate)
+    with pytest.raises(LLMRequestError):
+        await client("hi", "en", "UTC")
+    assert len(calls) == 1
+    assert client.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_then_probes(monkeypatch):
+    healthy = False
+
+    async def translate(text, lang, tz):
+        if not healthy:
+            raise LLMRequestError("down")
+        return RESULT
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+    client = _client(translate, max_attempts=1, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            await client("hi", "en", "UTC")
+    assert breaker.state == "open"
+
+    with pytest.raises(LLMUnavailableError):
+        await client("hi", "en", "UTC")
+    assert client.metrics.short_circuits == 1
+    assert client.metrics.attempts == 2
+
+    # After ``reset_timeout`` one probe goes through and closes the circuit.
+    monkeypatch.setattr(breaker, "_opened_at", breaker._opened_at - 30.0)
+    assert breaker.state == "half_open"
+    healthy = True
+    assert await client("hi", "en", "UTC") == RESULT
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_primary():
+    delays = [1.0, 0.0]
+
+    async def translate(text, lang, tz):
+        await asyncio.sleep(delays.pop(0))
+        return RESULT
+
+    client = _client(translate, hedge=True, hedge_min_samples=1)
+    client.metrics.latencies.append(0.02)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await client("hi", "en", "UTC") == RESULT
+    assert loop.time() - started < 0.5
+    assert client.metrics.hedges == 1 and client.metrics.hedge_wins == 1
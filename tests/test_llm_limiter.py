@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from tg_cal_reminder.llm.limiter import TranslationGate, current_user
+
+RESULT = {"command": "/help", "args": []}
+
+
+async def _as_user(gate, user, text):
+    current_user.set(user)
+    return await gate(text, "en", "UTC")
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call():
+    calls = []
+    release = asyncio.Event()
+
+    async def translate(text, lang, tz):
+        calls.append(text)
+        await release.wait()
+        return RESULT
+
+    gate = TranslationGate(translate)
+    first = asyncio.create_task(gate("Dentist tomorrow", "en", "UTC"))
+    second = asyncio.create_task(gate("dentist   tomorrow.", "en", "UTC"))
+    other_lang = asyncio.create_task(gate("Dentist tomorrow", "ru", "UTC"))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == RESULT and await second == RESULT
+    assert await other_lang == RESULT
+    assert len(calls) == 2
+    assert gate.metrics.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_fair_between_users():
+    order = []
+    release = asyncio.Event()
+
+    async def translate(text, lang, tz):
+        order.append(text)
+        await release.wait()
+        return RESULT
+
+    gate = TranslationGate(translate, max_concurrency=1)
+    tasks = [asyncio.create_task(_as_user(gate, 1, f"a{i}")) for i in range(3)]
+    tasks.append(asyncio.create_task(_as_user(gate, 2, "b0")))
+    await asyncio.sleep(0.01)
+
+    assert gate.metrics.in_flight == 1
+    assert gate.metrics.queued == 3
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # Users take turns: user 2 does not wait for all of user 1's backlog.
+    assert order == ["a0", "a1", "b0", "a2"]
+    assert gate.metrics.max_in_flight == 1
+    assert gate.metrics.in_flight == 0 and gate.metrics.queued == 0
+    assert gate.metrics.waits == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_leak_slot():
+    release = asyncio.Event()
+
+    async def translate(text, lang, tz):
+        await release.wait()
+        return RESULT
+
+    gate = TranslationGate(translate, max_concurrency=1)
+    running = asyncio.create_task(gate("one", "en", "UTC"))
+    queued = asyncio.create_task(gate("two", "en", "UTC"))
+    await asyncio.sleep(0.01)
+    queued.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await running == RESULT
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    # The abandoned request still completes; its slot is returned afterwards.
+    await asyncio.sleep(0.01)
+    assert gate.metrics.in_flight == 0
+    assert await gate("three", "en", "UTC") == RESULT
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    release = asyncio.Event()
+
+    async def translate(text, lang, tz):
+        await release.wait()
+        return RESULT
+
+    gate = TranslationGate(translate, max_concurrency=1)
+    running = asyncio.create_task(gate("one", "en", "UTC"))
+    await asyncio.sleep(0.01)
+    current_user.set(7)
+    queued = asyncio.create_task(gate("two", "en", "UTC"))
+    await asyncio.sleep(0.01)
+    # Cancelling the shared request itself, e.g. on shutdown.
+    gate._in_flight[("two", "en", "UTC")].cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    assert not gate._waiters
+    assert gate.metrics.queued == 0
+    release.set()
+    assert await running == RESULT
+    assert gate.metrics.in_flight == 0
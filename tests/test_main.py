@@ -5,6 +5,7 @@ import pytest
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from tg_cal_reminder import main as main_mod
+from tg_cal_reminder.db.models import Base
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -13,16 +14,19 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 async def test_main_initializes_components(monkeypatch):
     os.environ["BOT_TOKEN"] = "TOKEN"
     os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    monkeypatch.setenv("TELEGRAM_API_URL", "http://127.0.0.1:8081/")
 
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
     monkeypatch.setattr(main_mod, "get_engine", lambda: engine)
-    monkeypatch.setattr(main_mod, "get_sessionmaker", lambda e: session_maker)
+    monkeypatch.setattr(main_mod, "get_sessionmaker", lambda e, r=None: session_maker)
 
     handle_called = {}
 
-    async def dummy_handle(update, tg_client, session_factory, translator):
+    async def dummy_handle(update, tg_client, session_factory, translator, **kwargs):
         handle_called["called"] = True
 
     monkeypatch.setattr(main_mod, "handle_update", dummy_handle)
@@ -47,21 +51,25 @@ async def test_main_initializes_components(monkeypatch):
             self.stopped = True
 
     scheduler_instance = DummyScheduler()
-    monkeypatch.setattr(main_mod.scheduler, "create_scheduler", lambda: scheduler_instance)
+    monkeypatch.setattr(main_mod.scheduler, "create_scheduler", lambda *a: scheduler_instance)
 
     class DummyPoller:
-        def __init__(self, token, handler, *, client=None, timeout=30):
+        def __init__(self, token, handler, *, client=None, timeout=30, **kwargs):
             self.token = token
             self.handler = handler
+            self.client = client
             self.run_called = False
 
+        def committed_offset(self, update_id):
+            return update_id + 1
+
         async def run(self):
             self.run_called = True
             await self.handler({"message": {"text": "hi", "chat": {"id": 1}, "from": {"id": 5}}})
 
     poller_instance = DummyPoller("TOKEN", lambda u: None)
 
-    def poller_factory(token, handler, *, client=None, timeout=30):
+    def poller_factory(token, handler, *, client=None, timeout=30, **kwargs):
         nonlocal poller_instance
         poller_instance = DummyPoller(token, handler, client=client, timeout=timeout)
         return poller_instance
@@ -73,6 +81,7 @@ async def test_main_initializes_components(monkeypatch):
     assert logging.getLogger().level == logging.INFO
 
     assert poller_instance.run_called
+    assert poller_instance.client.base_url == "http://127.0.0.1:8081/botTOKEN/"
     assert scheduler_instance.started and scheduler_instance.stopped
     assert handle_called.get("called") is True
     assert registered.get("called") is True
@@ -70,3 +70,335 @@ async def test_offset_passed_in_subsequent_requests():
 
     assert history[0].params.get("offset") is None
     assert history[1].params.get("offset") == "6"
+
+
+def _message(update_id: int, chat_id: int, text: str = "hi") -> dict:
+    return {"update_id": update_id, "message": {"text": text, "chat": {"id": chat_id}}}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dispatch_keeps_per_chat_order():
+    updates = [_message(1, 10), _message(2, 20), _message(3, 10), _message(4, 20)]
+    events: list[tuple[str, int]] = []
+
+    async def handler(update: dict) -> None:
+        events.append(("start", update["update_id"]))
+        # The first update of each chat is slow; later ones must still wait for it.
+        await asyncio.sleep(0.02 if update["update_id"] in (1, 2) else 0)
+        events.append(("end", update["update_id"]))
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "result": updates})
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=4)
+        await poller.poll_once()
+
+    assert poller.offset == 5
+    # Both chats started before either slow handler finished.
+    assert events[:2] == [("start", 1), ("start", 2)]
+    assert events.index(("end", 1)) < events.index(("start", 3))
+    assert events.index(("end", 2)) < events.index(("start", 4))
+
+
+@pytest.mark.asyncio
+async def test_committed_offset_waits_for_earlier_updates():
+    updates = [_message(1, 10), _message(2, 20)]
+    committed: dict[int, int] = {}
+
+    async def handler(update: dict) -> None:
+        await asyncio.sleep(0.02 if update["update_id"] == 1 else 0)
+        committed[update["update_id"]] = poller.committed_offset(update["update_id"])
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "result": updates})
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=4)
+        await poller.poll_once()
+
+    # Update 2 finished first: a restart must still fetch update 1.
+    assert committed == {2: 1, 1: 3}
+    assert poller.committed_offset(3) == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dispatch_caps_in_flight_handlers():
+    updates = [_message(i, i) for i in range(1, 7)]
+    in_flight = 0
+    peak = 0
+
+    async def handler(update: dict) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "result": updates})
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=2)
+        await poller.poll_once()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dispatch_isolates_handler_errors():
+    updates = [_message(1, 10), _message(2, 10), _message(3, 20)]
+    called: list[int] = []
+
+    async def handler(update: dict) -> None:
+        called.append(update["update_id"])
+        if update["update_id"] == 1:
+            raise ValueError("boom")
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "result": updates})
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=3)
+        await poller.poll_once()
+
+    assert sorted(called) == [1, 2, 3]
+
+
+class _StopPollingError(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_run_long_polling_does_not_sleep_between_polls(monkeypatch):
+    sleeps: list[float] = []
+    calls = 0
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    async def fake_poll_once() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise _StopPollingError
+
+    poller = Poller("TOKEN", lambda u: asyncio.sleep(0), client=httpx.AsyncClient())
+    monkeypatch.setattr(poller, "poll_once", fake_poll_once)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    with pytest.raises(_StopPollingError):
+        await poller.run()
+
+    assert sleeps == []
+    assert poller.metrics.mode == "long_poll"
+
+
+@pytest.mark.asyncio
+async def test_run_backs_off_exponentially_on_errors(monkeypatch):
+    sleeps: list[float] = []
+    calls = 0
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    async def fake_poll_once() -> None:
+        nonlocal calls
+        calls += 1
+        if calls <= 4:
+            raise httpx.ConnectError("down")
+        if calls == 5:
+            assert poller.metrics.mode == "backoff"
+            return
+        raise _StopPollingError
+
+    poller = Poller("TOKEN", lambda u: asyncio.sleep(0), client=httpx.AsyncClient())
+    monkeypatch.setattr(poller, "poll_once", fake_poll_once)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    with pytest.raises(_StopPollingError):
+        await poller.run()
+
+    assert len(sleeps) == 4
+    for attempt, delay in enumerate(sleeps):
+        cap = 2**attempt
+        assert cap / 2 <= delay <= cap
+    assert poller.metrics.errors == 4
+    assert poller.metrics.mode == "long_poll"
+
+
+@pytest.mark.asyncio
+async def test_run_short_polling_uses_adaptive_interval(monkeypatch):
+    sleeps: list[float] = []
+    calls = 0
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    async def fake_poll_once() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise _StopPollingError
+
+    poller = Poller("TOKEN", lambda u: asyncio.sleep(0), client=httpx.AsyncClient(), timeout=0)
+    monkeypatch.setattr(poller, "poll_once", fake_poll_once)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    with pytest.raises(_StopPollingError):
+        await poller.run()
+
+    assert sleeps == [1, 1]
+    assert poller.metrics.mode == "short_poll"
+
+
+@pytest.mark.asyncio
+async def test_poll_once_records_dispatch_delay():
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True, "result": [_message(1, 1), _message(2, 1)]})
+
+    async def handler(update: dict) -> None:
+        await asyncio.sleep(0.01)
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client)
+        await poller.poll_once()
+
+    assert poller.metrics.polls == 1
+    assert poller.metrics.dispatched == 2
+    # The second update waited behind the first one's handler.
+    assert poller.metrics.max_dispatch_delay >= 0.01
+    assert 0 < poller.metrics.avg_dispatch_delay <= poller.metrics.max_dispatch_delay
+
+
+async def _wait_for(condition, timeout: float = 1.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_pipelined_fetches_next_batch_while_handling():
+    batches = [[_message(1, 10), _message(2, 20)], [_message(3, 10)]]
+    log: list[str] = []
+    release = asyncio.Event()
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        index = sum(1 for entry in log if entry.startswith("fetch"))
+        log.append(f"fetch {request.url.params.get('offset')}")
+        if index < len(batches):
+            return httpx.Response(200, json={"ok": True, "result": batches[index]})
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={"ok": True, "result": []})
+
+    async def handler(update: dict) -> None:
+        log.append(f"start {update['update_id']}")
+        if update["update_id"] == 1:
+            await release.wait()
+        log.append(f"end {update['update_id']}")
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=2, queue_size=10)
+        task = asyncio.create_task(poller.run())
+        # The second and third fetches happen while update 1 is still blocked,
+        # and leave it unconfirmed.
+        await _wait_for(lambda: log.count("fetch 1") == 2)
+        await _wait_for(lambda: "end 2" in log)
+        assert "end 1" not in log
+        assert "start 3" not in log  # same chat as update 1, must wait
+        release.set()
+        await _wait_for(lambda: "end 3" in log)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert log.index("end 1") < log.index("start 3")
+    assert poller.offset == 4
+
+
+@pytest.mark.asyncio
+async def test_pipelined_queue_applies_backpressure():
+    fetches: list[str | None] = []
+    release = asyncio.Event()
+    started: list[int] = []
+    next_id = 0
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        nonlocal next_id
+        fetches.append(request.url.params.get("offset"))
+        batch = [_message(next_id + i, next_id + i) for i in range(1, 3)]
+        next_id += 2
+        return httpx.Response(200, json={"ok": True, "result": batch})
+
+    async def handler(update: dict) -> None:
+        started.append(update["update_id"])
+        await release.wait()
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=1, queue_size=2)
+        task = asyncio.create_task(poller.run())
+        await asyncio.sleep(0.05)
+        # One update is being handled, two are queued and the producer is
+        # blocked on the fourth, so no further getUpdates calls are made.
+        assert started == [1]
+        assert len(fetches) == 2
+        assert poller.metrics.queue_depth == 2
+        assert poller.offset == 4
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_pipelined_does_not_confirm_updates_in_flight():
+    # Like Telegram: updates below the requested offset are deleted.
+    pending = [_message(1, 10), _message(2, 20)]
+    offsets: list[str | None] = []
+    handled: list[int] = []
+    release = asyncio.Event()
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        offset = int(request.url.params.get("offset", 0))
+        offsets.append(request.url.params.get("offset"))
+        pending[:] = [u for u in pending if u["update_id"] >= offset]
+        if not pending:
+            await asyncio.sleep(10)
+        return httpx.Response(200, json={"ok": True, "result": pending})
+
+    async def handler(update: dict) -> None:
+        if update["update_id"] == 1:
+            await release.wait()
+        handled.append(update["update_id"])
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        poller = Poller("TOKEN", handler, client=client, max_concurrency=2, queue_size=10)
+        task = asyncio.create_task(poller.run())
+        await _wait_for(lambda: handled == [2])
+        await asyncio.sleep(0.02)
+        # Update 1 is still with Telegram, and the producer waits instead of
+        # fetching it over and over.
+        assert pending and pending[0]["update_id"] == 1
+        assert len(offsets) <= 3
+        release.set()
+        await _wait_for(lambda: offsets[-1] == "3")
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert handled == [2, 1]
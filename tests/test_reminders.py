@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from tg_cal_reminder.bot.reminders import ReminderEngine
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.models import Base
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+LEAD = datetime.timedelta(minutes=15)
+HORIZON = datetime.timedelta(hours=1)
+
+
+class RecordingSender:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str]] = []
+
+    async def send(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def user(session_factory):
+    async with session_factory() as session:
+        return await crud.create_user(session, 77, is_authorized=True)
+
+
+def _minutes(value: int) -> datetime.timedelta:
+    return datetime.timedelta(minutes=value)
+
+
+def test_heap_schedule_cancel_and_pop_order():
+    engine = ReminderEngine(None, None)
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+    engine.schedule(1, base + _minutes(30))
+    engine.schedule(2, base + _minutes(10))
+    engine.schedule(3, base + _minutes(20))
+    engine.schedule(1, base + _minutes(5))  # moved earlier
+    engine.cancel(3)
+
+    assert len(engine) == 2
+    assert engine.next_due == base + _minutes(5)
+    assert engine.pop_due(base + _minutes(60)) == [1, 2]
+    assert engine.next_due is None
+
+
+def test_heap_compacts_dead_entries():
+    engine = ReminderEngine(None, None)
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    for i in range(1000):
+        engine.schedule(1, base + _minutes(i))
+    assert len(engine) == 1
+    assert len(engine._heap) < 100
+
+
+@pytest.mark.asyncio
+async def test_refill_loads_only_the_horizon(session_factory, user):
+    now = datetime.datetime.now(datetime.UTC)
+    async with session_factory() as session:
+        soon = await crud.create_event(session, user.id, now + _minutes(30), "Soon")
+        later = await crud.create_event(session, user.id, now + _minutes(150), "Later")
+        closed = await crud.create_event(session, user.id, now + _minutes(20), "Closed")
+        await crud.close_events(session, user.id, [closed.id])
+
+    engine = ReminderEngine(session_factory, RecordingSender(), lead=LEAD, horizon=HORIZON)
+    assert await engine.refill(now) == 1
+    assert engine.next_due == now + _minutes(15)
+
+    # The next refill only reads the newly uncovered slice of time.
+    assert await engine.refill(now + _minutes(30)) == 0
+    assert await engine.refill(now + _minutes(100)) == 1
+    assert engine.pop_due(now + _minutes(200)) == [soon.id, later.id]
+
+
+@pytest.mark.asyncio
+async def test_crud_changes_update_the_heap(session_factory, user):
+    sender = RecordingSender()
+    engine = ReminderEngine(session_factory, sender, lead=LEAD, horizon=HORIZON)
+    now = datetime.datetime.now(datetime.UTC)
+    await engine.refill(now)
+
+    crud.add_change_listener(engine.on_change)
+    try:
+        async with session_factory() as session:
+            event = await crud.create_event(session, user.id, now + _minutes(40), "Call")
+            assert len(engine) == 1
+            far = await crud.create_event(session, user.id, now + _minutes(300), "Far")
+            assert len(engine) == 1  # outside the loaded horizon
+
+            await crud.update_event(session, user.id, event.id, now + _minutes(20), "Call")
+            assert engine.next_due == now + _minutes(5)
+
+            await crud.update_event(session, user.id, far.id, now + _minutes(50), "Far")
+            assert len(engine) == 2
+
+            await crud.close_events(session, user.id, [event.id, far.id])
+            assert len(engine) == 0
+    finally:
+        crud.remove_change_listener(engine.on_change)
+
+
+@pytest.mark.asyncio
+async def test_fire_due_sends_and_rechecks_database(session_factory, user):
+    sender = RecordingSender()
+    engine = ReminderEngine(session_factory, sender, lead=LEAD, horizon=HORIZON)
+    now = datetime.datetime(2030, 1, 1, 12, 0, tzinfo=datetime.UTC)
+    async with session_factory() as session:
+        event = await crud.create_event(session, user.id, now + _minutes(15), "Dentist")
+        moved = await crud.create_event(session, user.id, now + _minutes(10), "Moved")
+        closed = await crud.create_event(session, user.id, now + _minutes(10), "Closed")
+        # Changes below bypass the engine (no listener registered).
+        await crud.update_event(session, user.id, moved.id, now + _minutes(45), "Moved")
+        await crud.close_events(session, user.id, [closed.id])
+
+    engine.schedule(event.id, now)
+    engine.schedule(moved.id, now - _minutes(5))
+    engine.schedule(closed.id, now - _minutes(5))
+
+    assert await engine.fire_due(now) == 1
+    assert sender.sent == [(77, f"Reminder: 12:15 Dentist | id={event.id}")]
+    # The moved event was rescheduled from the database, the closed one dropped.
+    assert len(engine) == 1
+    assert engine.next_due == now + _minutes(30)
+
+
+@pytest.mark.asyncio
+async def test_run_sends_reminder_when_due(session_factory, user):
+    sender = RecordingSender()
+    lead = datetime.timedelta(seconds=1)
+    engine = ReminderEngine(session_factory, sender, lead=lead, horizon=HORIZON)
+    now = datetime.datetime.now(datetime.UTC)
+    async with session_factory() as session:
+        await crud.create_event(session, user.id, now + datetime.timedelta(seconds=1.1), "Soon")
+
+    task = asyncio.create_task(engine.run())
+    try:
+        async with asyncio.timeout(2):
+            while not sender.sent:
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert "Soon" in sender.sent[0][1]
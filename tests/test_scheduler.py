@@ -1,9 +1,12 @@
 import datetime
+from zoneinfo import ZoneInfo
 
 from apscheduler.triggers.cron import CronTrigger
 
 from tg_cal_reminder.bot.scheduler import (
+    MAX_OVERLAPPING_TICKS,
     create_scheduler,
+    due_digests,
     evening_window,
     morning_window,
     weekly_window,
@@ -11,24 +14,16 @@ from tg_cal_reminder.bot.scheduler import (
 
 
 def test_create_scheduler_jobs() -> None:
-    scheduler = create_scheduler()
+    scheduler = create_scheduler(None, None)
     job_ids = {job.id for job in scheduler.get_jobs()}
-    assert job_ids == {"morning_digest", "evening_digest", "weekly_digest"}
+    assert job_ids == {"digest_tick", "processed_updates_purge"}
 
-    morning = scheduler.get_job("morning_digest")
-    assert isinstance(morning.trigger, CronTrigger)
-    assert str(morning.trigger.fields[5].expressions[0]) == "6"
-    assert str(morning.trigger.fields[6].expressions[0]) == "0"
-    assert morning.trigger.timezone == datetime.UTC
-
-    evening = scheduler.get_job("evening_digest")
-    assert isinstance(evening.trigger, CronTrigger)
-    assert str(evening.trigger.fields[5].expressions[0]) == "17"
-    assert str(evening.trigger.fields[6].expressions[0]) == "0"
-
-    weekly = scheduler.get_job("weekly_digest")
-    assert isinstance(weekly.trigger, CronTrigger)
-    assert str(weekly.trigger.fields[4].expressions[0]) == "mon"
+    tick = scheduler.get_job("digest_tick")
+    assert isinstance(tick.trigger, CronTrigger)
+    assert str(tick.trigger.fields[6].expressions[0]) == "*/15"
+    assert tick.trigger.timezone == datetime.UTC
+    # A tick still queueing digests must not make the next one skip.
+    assert tick.max_instances == MAX_OVERLAPPING_TICKS > 1
 
 
 def test_digest_time_windows() -> None:
@@ -45,3 +40,51 @@ def test_digest_time_windows() -> None:
     start, end = weekly_window(sample)
     assert start == datetime.datetime(2024, 3, 4, 0, 0, tzinfo=datetime.UTC)
     assert end == datetime.datetime(2024, 3, 10, 23, 59, 59, tzinfo=datetime.UTC)
+
+
+def test_local_windows_follow_dst() -> None:
+    new_york = ZoneInfo("America/New_York")
+    # 2024-03-10 is the day New York springs forward: a 23 hour local day.
+    sample = datetime.datetime(2024, 3, 10, 13, 0, tzinfo=datetime.UTC)
+
+    start, end = morning_window(sample, new_york)
+    assert start == datetime.datetime(2024, 3, 10, 5, 0, tzinfo=datetime.UTC)
+    assert end == datetime.datetime(2024, 3, 11, 3, 59, 59, tzinfo=datetime.UTC)
+
+
+def test_due_digests_groups_zones_by_offset() -> None:
+    zones = ["Europe/Paris", "Europe/Berlin", "Europe/London", "UTC", "Asia/Kathmandu"]
+    # Wednesday 07:00 UTC is 08:00 in Paris and Berlin (UTC+1 in winter).
+    buckets = due_digests(zones, datetime.datetime(2024, 3, 6, 7, 3, tzinfo=datetime.UTC))
+
+    assert len(buckets) == 1
+    bucket = buckets[0]
+    assert bucket.kind == "morning"
+    assert bucket.timezones == ("Europe/Berlin", "Europe/Paris")
+    assert bucket.start == datetime.datetime(2024, 3, 5, 23, 0, tzinfo=datetime.UTC)
+
+    # Kathmandu is UTC+5:45, so its 19:00 falls on a quarter-hour tick.
+    buckets = due_digests(zones, datetime.datetime(2024, 3, 6, 13, 15, tzinfo=datetime.UTC))
+    assert [(b.kind, b.timezones) for b in buckets] == [("evening", ("Asia/Kathmandu",))]
+
+    assert due_digests(zones, datetime.datetime(2024, 3, 6, 7, 15, tzinfo=datetime.UTC)) == []
+
+
+def test_due_digests_adds_weekly_on_monday() -> None:
+    buckets = due_digests(["UTC"], datetime.datetime(2024, 3, 4, 8, 0, tzinfo=datetime.UTC))
+    assert [b.kind for b in buckets] == ["morning", "weekly"]
+    weekly = buckets[1]
+    assert weekly.start == datetime.datetime(2024, 3, 4, 0, 0, tzinfo=datetime.UTC)
+    assert weekly.end == datetime.datetime(2024, 3, 10, 23, 59, 59, tzinfo=datetime.UTC)
+
+
+def test_due_digests_tracks_dst_shift() -> None:
+    zones = ["America/New_York"]
+    winter = datetime.datetime(2024, 3, 8, 13, 0, tzinfo=datetime.UTC)
+    summer = datetime.datetime(2024, 3, 11, 12, 0, tzinfo=datetime.UTC)
+
+    assert [b.kind for b in due_digests(zones, winter)] == ["morning"]
+    assert due_digests(zones, winter - datetime.timedelta(hours=1)) == []
+    # After the switch 08:00 local is an hour earlier in UTC.
+    assert [b.kind for b in due_digests(zones, summer)] == ["morning", "weekly"]
+    assert due_digests(zones, summer + datetime.timedelta(hours=1)) == []
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from tg_cal_reminder.bot.sender import OutboundSender, TokenBucket, split_message
+
+BASE_URL = "https://api.telegram.org/botTOKEN/"
+
+
+def _parse(request: httpx.Request) -> tuple[int, str]:
+    fields = dict(pair.split("=", 1) for pair in request.content.decode().split("&"))
+    return int(fields["chat_id"]), fields["text"]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    # The first token is free, the remaining four take 10ms each.
+    assert time.monotonic() - started >= 0.035
+
+
+def test_split_message_prefers_line_breaks():
+    assert split_message("") == [""]
+    assert split_message("short") == ["short"]
+    assert split_message("aaa\nbbb\nccc", limit=7) == ["aaa\nbbb", "ccc"]
+    assert split_message("abcdefghij", limit=4) == ["abcd", "efgh", "ij"]
+    chunks = split_message("\n".join(["x" * 100] * 100))
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert "\n".join(chunks) == "\n".join(["x" * 100] * 100)
+
+
+@pytest.mark.asyncio
+async def test_sender_splits_long_messages():
+    sent: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(_parse(request)[1])
+        return httpx.Response(200, json={"ok": True})
+
+    transport = httpx.MockTransport(handler)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client,
+        OutboundSender(client, global_rate=1000, per_chat_rate=1000) as sender,
+    ):
+        await sender.send(1, "x" * 5000)
+
+    assert [len(text) for text in sent] == [4096, 904]
+    assert sender.metrics.sent == 2
+
+
+@pytest.mark.asyncio
+async def test_sender_keeps_per_chat_order_and_spacing():
+    sent: list[tuple[int, str, float]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        chat_id, text = _parse(request)
+        sent.append((chat_id, text, time.monotonic()))
+        return httpx.Response(200, json={"ok": True})
+
+    transport = httpx.MockTransport(handler)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client,
+        OutboundSender(client, global_rate=1000, per_chat_rate=50) as sender,
+    ):
+        for i in range(3):
+            await sender.send(1, f"a{i}")
+            await sender.send(2, f"b{i}")
+
+    assert [text for chat, text, _ in sent if chat == 1] == ["a0", "a1", "a2"]
+    assert [text for chat, text, _ in sent if chat == 2] == ["b0", "b1", "b2"]
+    times = [at for chat, _, at in sent if chat == 1]
+    assert all(later - earlier >= 0.015 for earlier, later in zip(times, times[1:], strict=False))
+    assert sender.metrics.sent == 6
+    assert sender.metrics.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_sender_retries_after_429():
+    attempts: list[float] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return httpx.Response(
+                429,
+                json={"ok": False, "error_code": 429, "parameters": {"retry_after": 0.05}},
+            )
+        return httpx.Response(200, json={"ok": True})
+
+    transport = httpx.MockTransport(handler)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client,
+        OutboundSender(client) as sender,
+    ):
+        await sender.send(1, "hello")
+
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.05
+    assert sender.metrics.rate_limited == 1
+    assert sender.metrics.retried == 1
+    assert sender.metrics.sent == 1
+
+
+@pytest.mark.asyncio
+async def test_sender_drops_rejected_messages():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(403, json={"ok": False, "description": "bot was blocked"})
+
+    transport = httpx.MockTransport(handler)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client,
+        OutboundSender(client) as sender,
+    ):
+        await sender.send(1, "hello")
+
+    assert sender.metrics.dropped == 1
+    assert sender.metrics.retried == 0
+
+
+@pytest.mark.asyncio
+async def test_sender_buffer_is_bounded():
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={"ok": True})
+
+    transport = httpx.MockTransport(handler)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client,
+        OutboundSender(client, max_pending=2, workers=1) as sender,
+    ):
+        await sender.send(1, "one")
+        await sender.send(2, "two")
+        blocked = asyncio.create_task(sender.send(3, "three"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        release.set()
+        await blocked
+
+    assert sender.metrics.sent == 3
@@ -1,16 +1,26 @@
+import datetime
 
 import pytest
 import pytest_asyncio
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine
 
-from tg_cal_reminder.db import sessions
+from tg_cal_reminder.db import crud, sessions
 from tg_cal_reminder.db.models import Base, User
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-def test_get_engine_from_env(monkeypatch):
+@pytest.fixture(autouse=True)
+def _reset_registry():
+    yield
+    sessions._engines.clear()
+    sessions._sessionmakers.clear()
+    sessions._metrics.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_engine_from_env(monkeypatch):
     monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
     engine = sessions.get_engine()
     try:
@@ -18,18 +28,17 @@ def test_get_engine_from_env(monkeypatch):
         assert str(engine.url) == TEST_DATABASE_URL
     finally:
         # Ensure disposal even if assertions fail
-        import asyncio
-        asyncio.run(engine.dispose())
+        await engine.dispose()
 
 
-def test_get_engine_custom_url(monkeypatch):
+@pytest.mark.asyncio
+async def test_get_engine_custom_url(monkeypatch):
     monkeypatch.delenv("DATABASE_URL", raising=False)
     engine = sessions.get_engine(TEST_DATABASE_URL)
     try:
         assert str(engine.url) == TEST_DATABASE_URL
     finally:
-        import asyncio
-        asyncio.run(engine.dispose())
+        await engine.dispose()
 
 
 def test_get_engine_missing_env(monkeypatch):
@@ -57,3 +66,89 @@ async def test_session_context(engine):
     async with sessions.get_session(engine) as session:
         result = await session.execute(select(User))
         assert result.scalar_one().telegram_id == 1
+
+
+@pytest.mark.asyncio
+async def test_get_engine_is_shared_per_url(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    engine = sessions.get_engine()
+    try:
+        assert sessions.get_engine(TEST_DATABASE_URL) is engine
+        assert sessions.get_sessionmaker() is sessions.get_sessionmaker(engine)
+    finally:
+        await sessions.dispose_engines()
+    assert sessions._engines == {}
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_MAX_OVERFLOW", "5")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "0")
+    settings = sessions.PoolSettings.from_env()
+    assert settings.pool_size == 20 and settings.max_overflow == 5
+    assert settings.pool_pre_ping is False
+    assert settings.pool_recycle == sessions.PoolSettings().pool_recycle
+
+    options = settings.engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["pool_size"] == 20 and options["max_overflow"] == 5
+    assert options["connect_args"] == {"statement_cache_size": 0}
+    # SQLite pools take no size limits.
+    assert "pool_size" not in settings.engine_options(TEST_DATABASE_URL)
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts(tmp_path):
+    engine = sessions.get_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(select(1))
+            await second.execute(select(1))
+            assert sessions.pool_metrics(engine).checked_out == 2
+        metrics = sessions.pool_metrics(engine)
+        assert metrics.checked_out == 0
+        assert metrics.checkouts == 2 and metrics.max_checked_out == 2
+        assert metrics.connects == 2
+    finally:
+        await sessions.dispose_engines()
+
+
+@pytest_asyncio.fixture
+async def primary_and_replica(tmp_path):
+    engines = []
+    for name in ("primary", "replica"):
+        engine = sessions.get_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        engines.append(engine)
+    yield engines
+    await sessions.dispose_engines()
+
+
+@pytest.mark.asyncio
+async def test_listing_reads_are_routed_to_replica(primary_and_replica, monkeypatch):
+    primary, replica = primary_and_replica
+    factory = sessions.get_sessionmaker(primary, replica)
+    start = datetime.datetime(2030, 1, 1, 9, 0, tzinfo=datetime.UTC)
+
+    async with factory() as session:
+        user = await crud.create_user(session, telegram_id=1)
+        await crud.create_event(session, user.id, start, "Dentist")
+
+    # The write is visible on the primary right away.
+    async with factory() as session:
+        assert [e.title for e in await crud.list_events(session, user.id)] == ["Dentist"]
+
+    # Once the read-your-writes window has passed, listings use the replica,
+    # which never received the event in this test.
+    monkeypatch.setattr(crud, "READ_YOUR_WRITES_WINDOW", 0.0)
+    async with factory() as session:
+        assert await crud.list_events(session, user.id) == []
+        assert await crud.list_events_between(session, user.id) == []
+        # Lookups outside listings and writes stay on the primary.
+        assert await crud.get_user_by_telegram_id(session, 1) is not None
+        changed = await crud.close_events(session, user.id, [1])
+        assert changed == [1]
+
+    async with sessions.get_session(primary) as session:
+        assert (await crud.list_events(session, user.id))[0].is_closed
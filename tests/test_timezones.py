@@ -7,6 +7,7 @@ from tg_cal_reminder.utils.timezones import (
     day_bounds,
     to_utc,
     week_bounds,
+    zone_or_utc,
 )
 
 
@@ -39,3 +40,11 @@ def test_week_bounds():
     start, end = week_bounds(dt)
     assert start == datetime.datetime(2024, 1, 1, 0, 0, tzinfo=UTC)
     assert end == datetime.datetime(2024, 1, 7, 23, 59, tzinfo=UTC)
+
+
+def test_zone_or_utc_falls_back_to_utc():
+    assert str(zone_or_utc("Europe/Berlin")) == "Europe/Berlin"
+    assert zone_or_utc("Not/AZone") is UTC
+    assert zone_or_utc("") is UTC
+    assert zone_or_utc("Europe") is UTC
+    assert zone_or_utc("A" * 300) is UTC
@@ -0,0 +1,103 @@
+from datetime import UTC, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from tg_cal_reminder.db.models import Base
+from tg_cal_reminder.llm.cache import TranslationCache, normalize_text
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def test_normalize_text():
+    assert normalize_text("What  do I have\ttoday?! ") == "what do I have today"
+    assert normalize_text("close 5 7") == "close 5 7"
+
+
+@pytest.mark.asyncio
+async def test_wrap_reuses_results_for_equivalent_messages():
+    calls: list[tuple[str, str, str]] = []
+
+    async def translator(text: str, lang: str, tz: str) -> dict:
+        calls.append((text, lang, tz))
+        return {"command": "/list_events", "args": []}
+
+    cache = TranslationCache()
+    cached = cache.wrap(translator)
+    first = await cached("What do I have today?", "en", "UTC")
+    second = await cached("what do I have today", "en", "UTC")
+    await cached("what do I have today", "ru", "UTC")
+
+    assert first == second == {"command": "/list_events", "args": []}
+    assert len(calls) == 2
+    assert cache.metrics.hits == 1 and cache.metrics.misses == 2
+    assert cache.metrics.hit_rate == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_key_changes_with_local_date():
+    cache = TranslationCache()
+    evening = datetime(2024, 3, 5, 22, 30, tzinfo=UTC)
+    await cache.put("today", "en", "Europe/Berlin", {"command": "/list_events"}, evening)
+
+    # 22:30 UTC is 23:30 in Berlin; an hour later the local date has changed.
+    assert await cache.get("today", "en", "Europe/Berlin", evening) is not None
+    next_day = datetime(2024, 3, 5, 23, 30, tzinfo=UTC)
+    assert await cache.get("today", "en", "Europe/Berlin", next_day) is None
+    # Entries never outlive the local day they were computed for.
+    assert cache._lifetime("Europe/Berlin", evening) == pytest.approx(1800)
+
+
+@pytest.mark.asyncio
+async def test_relative_times_are_cached_per_minute():
+    cache = TranslationCache()
+    text = "remind me in 30 minutes to call mom"
+    sent = datetime(2024, 3, 5, 9, 0, 10, tzinfo=UTC)
+    result = {"command": "/add_event", "args": ["2024-03-05 09:30 Call mom"]}
+    await cache.put(text, "en", "UTC", result, sent)
+
+    assert await cache.get(text, "en", "UTC", sent.replace(second=50)) == result
+    # A few minutes later "in 30 minutes" is another time: ask the LLM again.
+    assert await cache.get(text, "en", "UTC", sent.replace(minute=4)) is None
+    assert cache._lifetime("UTC", sent, per_minute=True) == 50
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    cache = TranslationCache(maxsize=2)
+    for text in ("a", "b"):
+        await cache.put(text, "en", "UTC", {"command": "/help"})
+    assert await cache.get("a", "en", "UTC") is not None
+    await cache.put("c", "en", "UTC", {"command": "/help"})
+
+    assert len(cache) == 2
+    assert await cache.get("b", "en", "UTC") is None
+    assert await cache.get("a", "en", "UTC") is not None
+    assert cache.metrics.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_backend(session_factory):
+    result = {"command": "/add_event", "args": ["2030-01-01 10:00 Dentist"]}
+    writer = TranslationCache(session_factory=session_factory)
+    reader = TranslationCache(session_factory=session_factory)
+    now = datetime.now(UTC).replace(second=0)
+
+    await writer.put("Dentist tomorrow at 10", "en", "UTC", result, now)
+    assert await reader.get("Dentist tomorrow at 10", "en", "UTC", now) == result
+    assert reader.metrics.shared_hits == 1
+    # The shared hit is now cached locally.
+    assert await reader.get("Dentist tomorrow at 10", "en", "UTC", now) == result
+    assert reader.metrics.hits == 1
+
+    assert await writer.purge() == 0
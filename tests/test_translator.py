@@ -88,3 +88,38 @@ async def test_translate_message_logging(monkeypatch):
     assert result == expected
     assert any("LLM request messages" in r for r in dummy.records)
     assert any("LLM parsed result" in r for r in dummy.records)
+
+
+def test_system_prompt_starts_with_static_prefix(monkeypatch):
+    monkeypatch.setattr(translator, "get_current_time", lambda tz: f"2024-01-01 00:00 {tz}")
+
+    berlin = build_system_prompt("Europe/Berlin")
+    tokyo = build_system_prompt("Asia/Tokyo")
+
+    assert berlin.startswith(translator.SYSTEM_PROMPT_PREFIX)
+    assert tokyo.startswith(translator.SYSTEM_PROMPT_PREFIX)
+    assert berlin.endswith("Current time: 2024-01-01 00:00 Europe/Berlin.")
+    # Prompts are built once per timezone and minute.
+    assert build_system_prompt("Europe/Berlin") is berlin
+
+
+def test_get_current_time_has_minute_granularity():
+    assert translator.get_current_time("Not/AZone").endswith(" UTC")
+    assert len(translator.get_current_time("Asia/Tokyo").split()[1]) == len("00:00")
+
+
+@pytest.mark.asyncio
+async def test_translate_message_uses_configured_url(monkeypatch):
+    monkeypatch.setenv("LLM_API_URL", "http://127.0.0.1:8089/v1/chat/completions")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    expected = {"command": "/help", "args": []}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url == httpx.URL("http://127.0.0.1:8089/v1/chat/completions")
+        assert "authorization" not in request.headers
+        data = {"choices": [{"message": {"content": json.dumps(expected)}}]}
+        return httpx.Response(200, json=data)
+
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport) as client:
+        assert await translate_message(client, "hello", "en") == expected
@@ -1,11 +1,14 @@
 import httpx
 import pytest
 import pytest_asyncio
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from tg_cal_reminder.bot.update import handle_update
 from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache
 from tg_cal_reminder.db.models import Base
+from tg_cal_reminder.llm.intent import IntentParser
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -33,7 +36,7 @@ async def test_handle_update_creates_user_and_sends_message(monkeypatch, session
         transport=transport, base_url="https://api.telegram.org/botTOKEN/"
     ) as tg_client:
 
-        async def dummy_dispatch(session, user, text, lang, translator):
+        async def dummy_dispatch(session, user, text, lang, translator, matched=None):
             return "ok"
 
         monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", dummy_dispatch)
@@ -70,3 +73,282 @@ async def test_handle_update_ignores_invalid_update(session_factory):
     async with session_factory() as session:
         result = await crud.get_user_by_telegram_id(session, 5)
         assert result is None
+
+
+async def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"ok": True})
+
+
+def _update(update_id: int, text: str = "/help") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {"text": text, "chat": {"id": 1}, "from": {"id": 5}},
+    }
+
+
+@pytest.mark.asyncio
+async def test_handle_update_persists_offset(monkeypatch, session_factory):
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"ok": True})
+
+    async def dummy_dispatch(session, user, text, lang, translator, matched=None):
+        return "ok"
+
+    monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", dummy_dispatch)
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as tg_client:
+        await handle_update(_update(7), tg_client, session_factory, lambda *_: None)
+
+    async with session_factory() as session:
+        assert await crud.get_update_offset(session) == 8
+        # Without dedupe the processed-update log is not written.
+        assert await crud.is_update_processed(session, 7) is False
+
+
+@pytest.mark.asyncio
+async def test_handle_update_dedupe_skips_redelivered_update(monkeypatch, session_factory):
+    sent: list[httpx.Request] = []
+    dispatched: list[str] = []
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    async def dummy_dispatch(session, user, text, lang, translator, matched=None):
+        dispatched.append(text)
+        return "ok"
+
+    monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", dummy_dispatch)
+
+    transport = httpx.MockTransport(transport_handler)
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as tg_client:
+        for _ in range(2):
+            await handle_update(
+                _update(11), tg_client, session_factory, lambda *_: None, dedupe=True
+            )
+
+    assert dispatched == ["/help"]
+    assert len(sent) == 1
+    async with session_factory() as session:
+        assert await crud.is_update_processed(session, 11) is True
+        assert await crud.get_update_offset(session) == 12
+
+
+@pytest.mark.asyncio
+async def test_handle_update_marks_updates_handled_out_of_order(monkeypatch, session_factory):
+    dispatched: list[str] = []
+
+    async def dummy_dispatch(session, user, text, lang, translator, matched=None):
+        dispatched.append(text)
+        return "ok"
+
+    monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", dummy_dispatch)
+
+    base_url = "https://api.telegram.org/botTOKEN/"
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_ok), base_url=base_url) as tg:
+
+        async def handle(update_id: int, next_offset: int) -> None:
+            await handle_update(
+                _update(update_id),
+                tg,
+                session_factory,
+                lambda *_: None,
+                next_offset=lambda _: next_offset,
+            )
+
+        # Update 8 is still in flight while 9 is handled.
+        await handle(9, 8)
+        async with session_factory() as session:
+            assert await crud.get_update_offset(session) == 8
+            assert await crud.is_update_processed(session, 9) is True
+        await handle(8, 10)
+        # After a crash Telegram redelivers from offset 8; 9 is dropped.
+        await handle(9, 10)
+
+    assert dispatched == ["/help", "/help"]
+    async with session_factory() as session:
+        assert await crud.get_update_offset(session) == 10
+        assert await crud.is_update_processed(session, 8) is False
+
+
+@pytest.mark.asyncio
+async def test_handle_update_replies_through_sender(monkeypatch, session_factory):
+    class RecordingSender:
+        def __init__(self) -> None:
+            self.sent: list[tuple[int, str]] = []
+
+        async def send(self, chat_id: int, text: str) -> None:
+            self.sent.append((chat_id, text))
+
+    async def dummy_dispatch(session, user, text, lang, translator, matched=None):
+        return "ok"
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("reply must not bypass the sender")
+
+    monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", dummy_dispatch)
+    sender = RecordingSender()
+
+    transport = httpx.MockTransport(transport_handler)
+    async with httpx.AsyncClient(transport=transport) as tg_client:
+        await handle_update(
+            _update(3), tg_client, session_factory, lambda *_: None, sender=sender
+        )
+
+    assert sender.sent == [(1, "ok")]
+
+
+@pytest.mark.asyncio
+async def test_handle_update_user_cache_is_invalidated_by_writes(monkeypatch, session_factory):
+    class RecordingSender:
+        def __init__(self) -> None:
+            self.sent: list[str] = []
+
+        async def send(self, chat_id: int, text: str) -> None:
+            self.sent.append(text)
+
+    monkeypatch.setenv("BOT_SECRET", "sesame")
+    cache = UserCache()
+    crud.add_change_listener(cache.on_change)
+    sender = RecordingSender()
+    try:
+        async with httpx.AsyncClient() as tg_client:
+            for i, text in enumerate(["/start", "sesame", "/lang fr", "/help", "/help"]):
+                await handle_update(
+                    _update(i, text),
+                    tg_client,
+                    session_factory,
+                    lambda *_: None,
+                    sender=sender,
+                    user_cache=cache,
+                )
+    finally:
+        crud.remove_change_listener(cache.on_change)
+
+    assert sender.sent[1].startswith("Please write your preferred language")
+    # The authorization evicted the cached (unauthorized) user.
+    assert sender.sent[2] == "Language updated to fr"
+    snapshot = cache.get(5)
+    assert snapshot is not None and snapshot.language == "fr" and snapshot.is_authorized
+    # "sesame", the second "/help" and the lookup above hit the cache.
+    assert cache.metrics.hits == 3
+    assert cache.metrics.invalidations == 2
+
+
+@pytest.mark.asyncio
+async def test_handle_update_unit_of_work_commits_once(monkeypatch, session_factory):
+    commits: list[None] = []
+
+    def count(conn):
+        commits.append(None)
+
+    monkeypatch.setenv("BOT_SECRET", "sesame")
+    sync_engine = session_factory.kw["bind"].sync_engine
+    event.listen(sync_engine, "commit", count)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(_ok), base_url="https://api.telegram.org/botTOKEN/"
+        ) as tg_client:
+            await handle_update(
+                _update(21, "sesame"),
+                tg_client,
+                session_factory,
+                lambda *_: None,
+                unit_of_work=True,
+            )
+    finally:
+        event.remove(sync_engine, "commit", count)
+
+    # Creating the user, authorizing it and storing the offset share a commit.
+    assert len(commits) == 1
+    async with session_factory() as session:
+        user = await crud.get_user_by_telegram_id(session, 5)
+        assert user is not None and user.is_authorized
+        assert await crud.get_update_offset(session) == 22
+
+
+@pytest.mark.asyncio
+async def test_handle_update_unit_of_work_rolls_back_on_failure(monkeypatch, session_factory):
+    async def failing_dispatch(session, user, text, lang, translator, matched=None):
+        await crud.update_user_language(session, user, "fr")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("tg_cal_reminder.bot.handlers.dispatch", failing_dispatch)
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(_ok), base_url="https://api.telegram.org/botTOKEN/"
+    ) as tg_client:
+        with pytest.raises(RuntimeError):
+            await handle_update(
+                _update(30), tg_client, session_factory, lambda *_: None, unit_of_work=True
+            )
+
+    async with session_factory() as session:
+        assert await crud.get_user_by_telegram_id(session, 5) is None
+        assert await crud.get_update_offset(session) is None
+
+
+@pytest.mark.asyncio
+async def test_handle_update_translates_before_opening_transaction(session_factory):
+    async with session_factory() as session:
+        user = await crud.create_user(session, 5)
+        await crud.authorize_user(session, user)
+
+    open_transactions: list[None] = []
+    sync_engine = session_factory.kw["bind"].sync_engine
+    listeners = {
+        "begin": lambda conn: open_transactions.append(None),
+        "commit": lambda conn: open_transactions.pop(),
+        "rollback": lambda conn: open_transactions and open_transactions.pop(),
+    }
+    seen: list[int] = []
+
+    async def translator(text, lang, tz):
+        seen.append(len(open_transactions))
+        return {"command": "/help", "args": []}
+
+    for name, listener in listeners.items():
+        event.listen(sync_engine, name, listener)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(_ok), base_url="https://api.telegram.org/botTOKEN/"
+        ) as tg_client:
+            await handle_update(
+                _update(40, "lunch with Ann next thursday"),
+                tg_client,
+                session_factory,
+                translator,
+                unit_of_work=True,
+            )
+    finally:
+        for name, listener in listeners.items():
+            event.remove(sync_engine, name, listener)
+
+    assert seen == [0]
+    async with session_factory() as session:
+        assert await crud.get_update_offset(session) == 41
+
+
+@pytest.mark.asyncio
+async def test_handle_update_counts_free_text_once(monkeypatch, session_factory):
+    parser = IntentParser()
+    monkeypatch.setattr("tg_cal_reminder.llm.intent.fast_path", parser)
+    async with session_factory() as session:
+        user = await crud.create_user(session, 5)
+        await crud.authorize_user(session, user)
+        await crud.create_user(session, 6)
+
+    async def translator(text, lang, tz):
+        return {"command": "/help", "args": []}
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(_ok), base_url="https://api.telegram.org/botTOKEN/"
+    ) as tg_client:
+        await handle_update(_update(1, "my events"), tg_client, session_factory, translator)
+        await handle_update(_update(2, "what is on?"), tg_client, session_factory, translator)
+        unauthorized = {"message": {"text": "help", "chat": {"id": 2}, "from": {"id": 6}}}
+        await handle_update(unauthorized, tg_client, session_factory, translator)
+
+    assert parser.metrics.matched == 1 and parser.metrics.fallbacks == 1
@@ -0,0 +1,83 @@
+"""Batched rendering and delivery of morning, evening and weekly digests."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from tg_cal_reminder.bot.sender import OutboundSender
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.i18n.messages import get_message
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("morning", "evening", "weekly")
+
+
+@dataclass(frozen=True)
+class Digest:
+    chat_id: int
+    text: str
+
+
+def render_digest(kind: str, language: str, rows: Sequence[Row[Any]]) -> str:
+    """Return the digest text for one user's ``rows``."""
+    time_format = "%a %Y-%m-%d %H:%M" if kind == "weekly" else "%H:%M"
+    lines = [get_message(f"digest_{kind}", language)]
+    for row in rows:
+        start = row.start_time
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=UTC)
+        lines.append(f"{start.astimezone(UTC).strftime(time_format)} {row.title} | id={row.id}")
+    return "\n".join(lines)
+
+
+async def collect_digests(
+    session: AsyncSession,
+    kind: str,
+    start: datetime,
+    end: datetime,
+    timezones: Sequence[str] | None = None,
+) -> list[Digest]:
+    """Render one digest per user with open events between ``start`` and ``end``.
+
+    All users are read with one streamed query ordered by user, so each digest
+    is rendered as soon as that user's rows are complete.
+    """
+    digests: list[Digest] = []
+    rows: list[Row[Any]] = []
+    async for row in crud.stream_digest_rows(session, start, end, timezones=timezones):
+        if rows and row.telegram_id != rows[0].telegram_id:
+            digests.append(Digest(rows[0].telegram_id, render_digest(kind, rows[0].language, rows)))
+            rows = []
+        rows.append(row)
+    if rows:
+        digests.append(Digest(rows[0].telegram_id, render_digest(kind, rows[0].language, rows)))
+    return digests
+
+
+async def run_digest(
+    session_factory: async_sessionmaker[AsyncSession],
+    sender: OutboundSender,
+    kind: str,
+    start: datetime,
+    end: datetime,
+    timezones: Sequence[str] | None = None,
+) -> int:
+    """Build the ``kind`` digests and queue them on ``sender``.
+
+    The session is closed before sending starts, so the database connection is
+    not held while the rate limited sender drains. Returns the digest count.
+    """
+    async with session_factory() as session:
+        digests = await collect_digests(session, kind, start, end, timezones)
+    for digest in digests:
+        await sender.send(digest.chat_id, digest.text)
+    logger.info("queued %d %s digests", len(digests), kind)
+    return len(digests)
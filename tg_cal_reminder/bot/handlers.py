@@ -5,13 +5,18 @@ import re
 import textwrap
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from typing import Any
 from zoneinfo import ZoneInfo
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from tg_cal_reminder.db import crud
 from tg_cal_reminder.db.models import Event, User
+from tg_cal_reminder.i18n.messages import get_message
+from tg_cal_reminder.llm import intent
+from tg_cal_reminder.llm.client import LLMUnavailableError
+from tg_cal_reminder.llm.limiter import current_user
 
 
 def get_secret() -> str:
@@ -26,6 +31,15 @@ _EVENT_RE = re.compile(
 )
 
 
+# Maximum number of events shown by ``/list_events``.
+LIST_EVENTS_LIMIT = 50
+# Number of events per ``/list_all_events`` page.
+LIST_ALL_EVENTS_PAGE_SIZE = 50
+# ``/list_all_events`` continuation argument carrying the last key of a page.
+_CURSOR_PREFIX = "after="
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
 class HandlerError(Exception):
     """Raised when incoming command arguments are invalid."""
 
@@ -123,14 +137,48 @@ def _parse_range(args: str) -> tuple[datetime | None, datetime | None]:
     return start, end
 
 
+def _encode_cursor(event: Event) -> str:
+    start = event.start_time
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=UTC)
+    micros = (start - _EPOCH) // timedelta(microseconds=1)
+    return f"{int(event.is_closed)}.{micros}.{event.id}"
+
+
+def _decode_cursor(token: str) -> tuple[bool, datetime, int]:
+    try:
+        closed, micros, event_id = token.split(".")
+        return bool(int(closed)), _EPOCH + timedelta(microseconds=int(micros)), int(event_id)
+    except ValueError as exc:
+        raise HandlerError("Invalid page cursor") from exc
+
+
 async def handle_list_all_events(ctx: CommandContext, args: str) -> str:
-    start, end = _parse_range(args)
-    events = await crud.list_events_between(ctx.session, ctx.user.id, start, end)
-    lines = []
-    for ev in events:
+    parts = args.split()
+    after = None
+    if parts and parts[-1].startswith(_CURSOR_PREFIX):
+        after = _decode_cursor(parts.pop()[len(_CURSOR_PREFIX) :])
+    range_args = " ".join(parts)
+    start, end = _parse_range(range_args)
+
+    # Each page is a keyset seek, so its cost does not grow with the page
+    # number. One extra row is read to tell whether another page follows.
+    lines: list[str] = []
+    last: Event | None = None
+    more = False
+    async for ev in crud.stream_events_between(
+        ctx.session, ctx.user.id, start, end, after=after, limit=LIST_ALL_EVENTS_PAGE_SIZE + 1
+    ):
+        if len(lines) == LIST_ALL_EVENTS_PAGE_SIZE:
+            more = True
+            continue
         end_str = ev.end_time.isoformat() if ev.end_time else "-"
         status = "closed" if ev.is_closed else "open"
         lines.append(f"{ev.id} {ev.start_time.isoformat()} {end_str} {ev.title} [{status}]")
+        last = ev
+    if more and last is not None:
+        command = " ".join(["/list_all_events", *parts, _CURSOR_PREFIX + _encode_cursor(last)])
+        lines.append(f"Next page: {command}")
     return "\n".join(lines)
 
 
@@ -152,8 +200,6 @@ def _date_label(dt: datetime, now: datetime) -> str:
 
 
 async def handle_list_events(ctx: CommandContext, args: str) -> str:
-    events = await crud.list_events(ctx.session, ctx.user.id, include_closed=False)
-
     tz = ZoneInfo(ctx.user.timezone)
     now_local = datetime.now(tz)
     today_start_utc = (
@@ -161,14 +207,12 @@ async def handle_list_events(ctx: CommandContext, args: str) -> str:
         .astimezone(UTC)
     )
     now = now_local.astimezone(UTC)
-    filtered: list[Event] = []
-    for ev in events:
-        dt = ev.start_time
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=UTC)
-        if dt >= today_start_utc:
-            filtered.append(ev)
-    events = filtered
+    # Fetch one extra row to tell whether the listing was truncated.
+    events = await crud.list_upcoming_events(
+        ctx.session, ctx.user.id, today_start_utc, limit=LIST_EVENTS_LIMIT + 1
+    )
+    truncated = len(events) > LIST_EVENTS_LIMIT
+    events = events[:LIST_EVENTS_LIMIT]
     if not events:
         return "No events found"
     lines: list[str] = []
@@ -183,6 +227,8 @@ async def handle_list_events(ctx: CommandContext, args: str) -> str:
             dt = dt.replace(tzinfo=UTC)
         time_str = dt.astimezone(UTC).strftime("%H:%M")
         lines.append(f"{time_str} {ev.title} | id={ev.id}")
+    if truncated:
+        lines.append("...")
     return "\n".join(lines)
 
 
@@ -215,6 +261,7 @@ async def handle_help(ctx: CommandContext, args: str) -> str:
             Example: /list_all_events
             Example: /list_all_events 2024-05-01 00:00
             Example: /list_all_events 2024-05-01 00:00 2024-05-31 23:59
+            Long listings end with a "Next page" command to continue
         /timezone <name>
             Example: /timezone Europe/Moscow
             Example: /timezone Europe/Paris
@@ -246,7 +293,14 @@ async def dispatch(
     text: str,
     language_code: str,
     translator: Callable[[str, str, str], Awaitable[dict]] | None = None,
+    *,
+    matched: dict[str, Any] | None = None,
 ) -> str:
+    """Answer ``text`` from ``user``.
+
+    ``matched`` is the fast path's result for free text when the caller
+    already has it, so the text is not parsed again.
+    """
     ctx = CommandContext(session=session, user=user)
 
     if not user.is_authorized:
@@ -260,9 +314,19 @@ async def dispatch(
     if text.startswith("/"):
         command, _, args = text.partition(" ")
     else:
-        if translator is None:
-            raise HandlerError("No translator provided for free text")
-        result = await translator(text, language_code, user.timezone)
+        # Trivial messages are mapped locally; only the rest goes to the LLM.
+        result = intent.fast_path.match(text) if matched is None else matched
+        intent.fast_path.record(result)
+        if result is None:
+            if translator is None:
+                raise HandlerError("No translator provided for free text")
+            token = current_user.set(user.id)
+            try:
+                result = await translator(text, language_code, user.timezone)
+            except LLMUnavailableError as exc:
+                raise HandlerError(get_message("llm_unavailable", language_code)) from exc
+            finally:
+                current_user.reset(token)
         error = result.get("error")
         if error:
             raise HandlerError(error)
@@ -4,13 +4,66 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections.abc import Awaitable, Callable, Iterable
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PollerMetrics:
+    """Counters describing the polling loop."""
+
+    mode: str = "long_poll"
+    polls: int = 0
+    errors: int = 0
+    queue_depth: int = 0
+    dispatched: int = 0
+    last_dispatch_delay: float = 0.0
+    max_dispatch_delay: float = 0.0
+    total_dispatch_delay: float = 0.0
+
+    def record_dispatch_delay(self, delay: float) -> None:
+        self.dispatched += 1
+        self.last_dispatch_delay = delay
+        self.max_dispatch_delay = max(self.max_dispatch_delay, delay)
+        self.total_dispatch_delay += delay
+
+    @property
+    def avg_dispatch_delay(self) -> float:
+        """Average seconds between receiving an update and starting its handler."""
+        if not self.dispatched:
+            return 0.0
+        return self.total_dispatch_delay / self.dispatched
+
+
+@dataclass
+class _ChatLock:
+    """Lock keeping one chat's updates in order in the pipelined mode."""
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Workers holding or waiting for ``lock``; the entry is dropped at zero.
+    users: int = 0
+
+
+def chat_key(update: dict) -> int | str:
+    """Return the key that keeps updates from the same chat strictly ordered.
+
+    Updates without a chat (e.g. unsupported update types) get a unique key so
+    they never block each other.
+    """
+    message = update.get("message") or update.get("edited_message") or {}
+    chat_id = message.get("chat", {}).get("id")
+    if chat_id is None:
+        return f"update:{update.get('update_id')}"
+    return int(chat_id)
+
+
 class Poller:
     """Simple long polling client for the Telegram Bot API."""
 
@@ -21,21 +74,44 @@ class Poller:
         *,
         client: httpx.AsyncClient | None = None,
         timeout: int = 30,
+        max_concurrency: int = 1,
+        offset: int | None = None,
+        queue_size: int = 0,
     ) -> None:
         self.token = token
         self.handler = handler
         self.timeout = timeout
         base_url = f"https://api.telegram.org/bot{token}/"
         self.client = client or httpx.AsyncClient(base_url=base_url)
-        self.offset: int | None = None
+        self.offset: int | None = offset
         self.poll_interval = 1
         self._min_interval = 1
         self._max_interval = 5
+        # Jittered exponential backoff, only applied after failed polls.
+        self._backoff_base = 1.0
+        self._backoff_max = 60.0
+        self._failures = 0
+        self.metrics = PollerMetrics(mode=self._idle_mode)
+        # ``max_concurrency`` caps the number of handlers in flight. Updates for
+        # different chats run in parallel, updates for one chat stay ordered.
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        # A positive ``queue_size`` enables the pipelined mode, where fetching
+        # the next batch overlaps with handling the current one.
+        self.queue_size = queue_size
+        # Fetched updates whose handler has not finished yet, and an event set
+        # whenever one of them finishes.
+        self._in_flight: set[int] = set()
+        self._settled = asyncio.Event()
+        self._chat_locks: dict[int | str, _ChatLock] = {}
 
     async def get_updates(self) -> list[dict]:
         params = {"timeout": self.timeout}
-        if self.offset is not None:
-            params["offset"] = self.offset
+        # Telegram deletes the updates below ``offset``, so updates still in
+        # flight are not confirmed until their handler has finished.
+        offset = min(self._in_flight, default=self.offset)
+        if offset is not None:
+            params["offset"] = offset
         # Use a network timeout that exceeds the long polling timeout to avoid
         # `httpx.ReadTimeout` errors while waiting for Telegram to respond.
         response = await self.client.get(
@@ -48,26 +124,181 @@ class Poller:
         updates: Iterable[dict] = payload.get("result", [])
         return list(updates)
 
-    async def dispatch(self, update: dict) -> None:
+    @property
+    def long_polling(self) -> bool:
+        return self.timeout > 0
+
+    @property
+    def _idle_mode(self) -> str:
+        return "long_poll" if self.long_polling else "short_poll"
+
+    def backoff_delay(self) -> float:
+        """Return the delay before retrying after ``self._failures`` failed polls."""
+        exponent = max(0, self._failures - 1)
+        cap = min(self._backoff_max, self._backoff_base * 2.0**exponent)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def committed_offset(self, update_id: int) -> int:
+        """Return the offset that is safe to persist once ``update_id`` is handled.
+
+        Handlers finish out of order when they run concurrently, so the offset
+        stays at the earliest other update still queued or being handled and
+        a crash cannot skip it. Without one it is the offset of the next fetch.
+        """
+        pending = [other for other in self._in_flight if other != update_id]
+        if pending:
+            return min(pending)
+        return max(update_id + 1, self.offset or 0)
+
+    async def dispatch(self, update: dict, received_at: float | None = None) -> None:
+        if received_at is not None:
+            self.metrics.record_dispatch_delay(time.monotonic() - received_at)
         try:
             await self.handler(update)
         except Exception:  # noqa: BLE001 - handler errors must not crash polling
             logger.exception("handler failed")
+        finally:
+            self._in_flight.discard(update["update_id"])
+            self._settled.set()
 
-    async def poll_once(self) -> None:
+    async def _dispatch_chat(self, updates: list[dict], received_at: float) -> None:
+        for update in updates:
+            async with self._slots:
+                await self.dispatch(update, received_at)
+
+    async def dispatch_concurrently(
+        self, updates: list[dict], received_at: float | None = None
+    ) -> None:
+        """Dispatch ``updates`` in parallel while preserving per-chat order."""
+        if received_at is None:
+            received_at = time.monotonic()
+        by_chat: dict[int | str, list[dict]] = {}
+        for update in updates:
+            by_chat.setdefault(chat_key(update), []).append(update)
+        await asyncio.gather(
+            *(self._dispatch_chat(group, received_at) for group in by_chat.values())
+        )
+
+    async def _fetch(self) -> tuple[list[dict], float]:
         updates = await self.get_updates()
+        received_at = time.monotonic()
+        self.metrics.polls += 1
         if updates:
-            for update in updates:
-                self.offset = update["update_id"] + 1
-                await self.dispatch(update)
             self.poll_interval = self._min_interval
         else:
             self.poll_interval = min(self._max_interval, self.poll_interval + 1)
+        return updates, received_at
+
+    async def poll_once(self) -> None:
+        updates, received_at = await self._fetch()
+        self._in_flight.update(update["update_id"] for update in updates)
+        if self.max_concurrency > 1 and updates:
+            self.offset = updates[-1]["update_id"] + 1
+            await self.dispatch_concurrently(updates, received_at)
+            return
+        for update in updates:
+            self.offset = update["update_id"] + 1
+            await self.dispatch(update, received_at)
+
+    async def _poll_failed(self) -> None:
+        self._failures += 1
+        self.metrics.errors += 1
+        self.metrics.mode = "backoff"
+        delay = self.backoff_delay()
+        logger.exception("polling failed, retrying in %.1fs", delay)
+        await asyncio.sleep(delay)
+
+    async def _poll_succeeded(self) -> None:
+        self._failures = 0
+        self.metrics.mode = self._idle_mode
+        if not self.long_polling:
+            await asyncio.sleep(self.poll_interval)
 
     async def run(self) -> None:
+        """Poll forever.
+
+        ``getUpdates`` already blocks for up to ``timeout`` seconds, so with
+        long polling the next request is issued right away. The adaptive
+        ``poll_interval`` only applies to short polling (``timeout=0``) and
+        failures back off exponentially with jitter.
+        """
+        if self.queue_size > 0:
+            await self.run_pipelined()
+            return
         while True:
             try:
                 await self.poll_once()
-            except httpx.HTTPError:
-                logger.exception("polling failed")
-            await asyncio.sleep(self.poll_interval)
+            except (httpx.HTTPError, RuntimeError):
+                await self._poll_failed()
+                continue
+            await self._poll_succeeded()
+
+    # --- Pipelined mode -----------------------------------------------------
+
+    @asynccontextmanager
+    async def _chat_lock(self, key: int | str) -> AsyncIterator[None]:
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = _ChatLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del self._chat_locks[key]
+
+    async def _produce(self, queue: asyncio.Queue[tuple[dict, float]]) -> None:
+        while True:
+            self._settled.clear()
+            try:
+                updates, received_at = await self._fetch()
+            except (httpx.HTTPError, RuntimeError):
+                await self._poll_failed()
+                continue
+            # Updates still in flight come back until they are confirmed; every
+            # update below ``offset`` has been queued before.
+            fresh = [u for u in updates if self.offset is None or u["update_id"] >= self.offset]
+            for update in fresh:
+                self._in_flight.add(update["update_id"])
+                # ``put`` blocks while the queue is full, so slow handlers stop
+                # the producer from fetching more updates.
+                await queue.put((update, received_at))
+                self.offset = update["update_id"] + 1
+                self.metrics.queue_depth = queue.qsize()
+            if updates and not fresh:
+                # Nothing new: fetching again returns at once, so wait until a
+                # handler finishes and its update can be confirmed.
+                await self._settled.wait()
+                continue
+            await self._poll_succeeded()
+
+    async def _consume(self, queue: asyncio.Queue[tuple[dict, float]]) -> None:
+        while True:
+            update, received_at = await queue.get()
+            self.metrics.queue_depth = queue.qsize()
+            try:
+                # Workers take updates in FIFO order and grab the chat lock
+                # without yielding first, so one chat's updates stay ordered.
+                async with self._chat_lock(chat_key(update)):
+                    await self.dispatch(update, received_at)
+            finally:
+                queue.task_done()
+
+    async def run_pipelined(self) -> None:
+        """Fetch the next batch while ``max_concurrency`` workers handle the last one.
+
+        ``getUpdates`` only confirms updates below the earliest one still
+        queued or being handled, so Telegram redelivers those after a crash
+        and a restart from :meth:`committed_offset` gets them back. Updates
+        that come back while still in flight are skipped.
+        """
+        queue: asyncio.Queue[tuple[dict, float]] = asyncio.Queue(maxsize=self.queue_size)
+        workers = [asyncio.create_task(self._consume(queue)) for _ in range(self.max_concurrency)]
+        try:
+            await self._produce(queue)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,183 @@
+"""Per-event reminders sent a fixed lead time before ``Event.start_time``."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from tg_cal_reminder.bot.sender import OutboundSender
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.i18n.messages import get_message
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+class ReminderEngine:
+    """Fire reminders ``lead`` before each open event starts.
+
+    Only events whose reminder falls within the next ``horizon`` are kept in
+    memory, in a heap keyed by reminder time; the horizon is refilled with
+    indexed range queries as time advances. Writes made through
+    :mod:`tg_cal_reminder.db.crud` are applied through a change listener:
+    inserts and reschedules are ``O(log n)``, cancellations mark the heap
+    entry dead and it is discarded when it reaches the top.
+
+    Nothing is persisted. After a restart the horizon is loaded from the
+    current time, so reminders already sent are not repeated, but reminders
+    that fell due while the process was down are skipped.
+    """
+
+    RETRY_DELAY = 5.0
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sender: OutboundSender,
+        *,
+        lead: timedelta = timedelta(minutes=15),
+        horizon: timedelta = timedelta(hours=1),
+    ) -> None:
+        self.session_factory = session_factory
+        self.sender = sender
+        self.lead = lead
+        self.horizon = horizon
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._entries: dict[int, tuple[datetime, int, int]] = {}
+        self._seq = itertools.count()
+        self._loaded_until: datetime | None = None
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def next_due(self) -> datetime | None:
+        """Return the earliest pending reminder time."""
+        self._drop_dead()
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, event_id: int, remind_at: datetime) -> None:
+        """Add or move the reminder for ``event_id``."""
+        entry = (remind_at, next(self._seq), event_id)
+        self._entries[event_id] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+        # Rebuild once dead entries dominate so memory stays proportional to
+        # the live reminders.
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def cancel(self, event_id: int) -> None:
+        self._entries.pop(event_id, None)
+
+    def _drop_dead(self) -> None:
+        while self._heap and self._entries.get(self._heap[0][2]) is not self._heap[0]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """Remove and return the events whose reminder time is ``<= now``."""
+        due: list[int] = []
+        self._drop_dead()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, event_id = heapq.heappop(self._heap)
+            del self._entries[event_id]
+            due.append(event_id)
+            self._drop_dead()
+        return due
+
+    def on_change(self, change: crud.Change) -> None:
+        """Apply an event write reported by :mod:`tg_cal_reminder.db.crud`."""
+        if change.table != "events":
+            return
+        if change.start_time is None or self._loaded_until is None:
+            self.cancel(change.id)
+            return
+        start = _as_utc(change.start_time)
+        remind_at = start - self.lead
+        now = datetime.now(UTC)
+        if start <= now or remind_at >= self._loaded_until:
+            # Past events need no reminder; later ones arrive with a refill.
+            self.cancel(change.id)
+            return
+        self.schedule(change.id, max(remind_at, now))
+
+    async def refill(self, now: datetime | None = None) -> int:
+        """Load reminders due before ``now + horizon`` that are not loaded yet."""
+        now = now or datetime.now(UTC)
+        start = self._loaded_until or now
+        end = now + self.horizon
+        if end <= start:
+            return 0
+        async with self.session_factory() as session:
+            rows = await crud.list_reminder_rows(session, start + self.lead, end + self.lead)
+        for row in rows:
+            self.schedule(row.id, _as_utc(row.start_time) - self.lead)
+        self._loaded_until = end
+        return len(rows)
+
+    async def fire_due(self, now: datetime | None = None) -> int:
+        """Send every reminder due at ``now``. Returns the number sent."""
+        now = now or datetime.now(UTC)
+        sent = 0
+        for event_id in self.pop_due(now):
+            async with self.session_factory() as session:
+                row = await crud.get_reminder_row(session, event_id)
+            if row is None:
+                continue
+            start = _as_utc(row.start_time)
+            # Re-check against the database in case a change was missed.
+            if start - self.lead > now:
+                self.schedule(event_id, start - self.lead)
+                continue
+            text = get_message("reminder", row.language).format(
+                time=start.strftime("%H:%M"), title=row.title, id=row.id
+            )
+            await self.sender.send(row.telegram_id, text)
+            sent += 1
+        return sent
+
+    async def _wait(self) -> None:
+        self._wakeup.clear()
+        if self._loaded_until is None:
+            # Nothing loaded yet; let ``run`` refill right away.
+            return
+        # Keep at least half a horizon loaded ahead of the clock.
+        wake_at = self._loaded_until - self.horizon / 2
+        next_due = self.next_due
+        if next_due is not None:
+            wake_at = min(wake_at, next_due)
+        delay = (wake_at - datetime.now(UTC)).total_seconds()
+        if delay > 0:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+
+    async def run(self) -> None:
+        crud.add_change_listener(self.on_change)
+        try:
+            while True:
+                now = datetime.now(UTC)
+                try:
+                    if self._loaded_until is None or now >= self._loaded_until - self.horizon / 2:
+                        await self.refill(now)
+                    await self.fire_due(now)
+                except Exception:  # noqa: BLE001 - keep the reminder loop alive
+                    logger.exception("reminder loop failed")
+                    await asyncio.sleep(self.RETRY_DELAY)
+                    continue
+                await self._wait()
+        finally:
+            crud.remove_change_listener(self.on_change)
@@ -1,42 +1,129 @@
 from __future__ import annotations
 
-from datetime import UTC, date, datetime, time, timedelta
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta, tzinfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-
-
-async def morning_digest() -> None:
-    """Placeholder morning digest task."""
-    # TODO: implement sending morning digest to users
-    return
-
-
-async def evening_digest() -> None:
-    """Placeholder evening digest task."""
-    # TODO: implement sending evening digest to users
-    return
-
-
-async def weekly_digest() -> None:
-    """Placeholder weekly digest task."""
-    # TODO: implement sending weekly digest to users
-    return
-
-
-def create_scheduler() -> AsyncIOScheduler:
-    """Return an ``AsyncIOScheduler`` pre-configured with digest jobs in UTC."""
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from tg_cal_reminder.bot.digests import run_digest
+from tg_cal_reminder.bot.sender import OutboundSender
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.utils.timezones import zone_or_utc
+
+# Digests go out at these local times; the weekly digest joins the Monday
+# morning one. Every UTC offset in use is a multiple of 15 minutes, so a
+# quarter-hourly tick reaches each offset exactly at its local digest time.
+MORNING_TIME = time(8, 0)
+EVENING_TIME = time(19, 0)
+TICK_MINUTES = 15
+# A tick waits while its digests queue on the rate limited sender, which for
+# large buckets outlasts the tick interval (about 27k messages at 30/s). Later
+# ticks then run alongside it rather than being skipped; APScheduler logs a
+# warning for any tick skipped beyond this many running at once.
+MAX_OVERLAPPING_TICKS = 4
+# Telegram drops unconfirmed updates after 24 hours, so older records of
+# processed updates can no longer match a redelivery.
+PROCESSED_UPDATES_RETENTION = timedelta(days=2)
+
+
+@dataclass(frozen=True)
+class DigestBucket:
+    """Timezones that share a digest window at a given tick."""
+
+    kind: str
+    start: datetime
+    end: datetime
+    timezones: tuple[str, ...]
+
+
+def _floor_tick(now: datetime) -> datetime:
+    now = now.astimezone(UTC)
+    minute = now.minute - now.minute % TICK_MINUTES
+    return now.replace(minute=minute, second=0, microsecond=0)
+
+
+def _due_windows(local: datetime, tz: tzinfo) -> Iterator[tuple[str, datetime, datetime]]:
+    local_time = local.time().replace(tzinfo=None)
+    if local_time == MORNING_TIME:
+        yield ("morning", *morning_window(local, tz))
+        if local.isoweekday() == 1:
+            yield ("weekly", *weekly_window(local, tz))
+    elif local_time == EVENING_TIME:
+        yield ("evening", *evening_window(local, tz))
+
+
+def due_digests(timezones: Iterable[str], now: datetime | None = None) -> list[DigestBucket]:
+    """Return the digests due at the tick containing ``now`` for ``timezones``.
+
+    Offsets are resolved at the tick itself, so DST changes are picked up
+    without rescheduling. Zones that currently share an offset (and hence the
+    same UTC window) are merged into one bucket, so the work per tick grows
+    with the number of distinct offsets rather than users.
+    """
+    tick = _floor_tick(now or datetime.now(UTC))
+    buckets: dict[tuple[str, datetime, datetime], list[str]] = {}
+    for name in timezones:
+        tz = zone_or_utc(name)
+        for key in _due_windows(tick.astimezone(tz), tz):
+            buckets.setdefault(key, []).append(name)
+    return [
+        DigestBucket(kind, start, end, tuple(sorted(names)))
+        for (kind, start, end), names in sorted(buckets.items())
+    ]
+
+
+async def digest_tick(
+    session_factory: async_sessionmaker[AsyncSession],
+    sender: OutboundSender,
+    now: datetime | None = None,
+) -> int:
+    """Send the digests due now in any user's local time. Returns the count."""
+    async with session_factory() as session:
+        timezones = await crud.list_user_timezones(session)
+    sent = 0
+    for bucket in due_digests(timezones, now):
+        sent += await run_digest(
+            session_factory, sender, bucket.kind, bucket.start, bucket.end, bucket.timezones
+        )
+    return sent
+
+
+async def purge_processed_updates(
+    session_factory: async_sessionmaker[AsyncSession], now: datetime | None = None
+) -> int:
+    """Forget processed updates older than the retention. Returns the count."""
+    cutoff = (now or datetime.now(UTC)) - PROCESSED_UPDATES_RETENTION
+    async with session_factory() as session:
+        return await crud.purge_processed_updates(session, cutoff)
+
+
+def create_scheduler(
+    session_factory: async_sessionmaker[AsyncSession], sender: OutboundSender
+) -> AsyncIOScheduler:
+    """Return an ``AsyncIOScheduler`` with a quarter-hourly local-time digest tick.
+
+    An hourly job also purges old records of processed updates.
+    """
     scheduler = AsyncIOScheduler(timezone=UTC)
     scheduler.add_job(
-        morning_digest, CronTrigger(hour=6, minute=0, timezone=UTC), id="morning_digest"
-    )
-    scheduler.add_job(
-        evening_digest, CronTrigger(hour=17, minute=0, timezone=UTC), id="evening_digest"
+        digest_tick,
+        CronTrigger(minute=f"*/{TICK_MINUTES}", timezone=UTC),
+        args=[session_factory, sender],
+        id="digest_tick",
+        coalesce=True,
+        misfire_grace_time=TICK_MINUTES * 60 // 2,
+        max_instances=MAX_OVERLAPPING_TICKS,
     )
     scheduler.add_job(
-        weekly_digest,
-        CronTrigger(day_of_week="mon", hour=6, minute=0, timezone=UTC),
-        id="weekly_digest",
+        purge_processed_updates,
+        "interval",
+        hours=1,
+        args=[session_factory],
+        id="processed_updates_purge",
+        coalesce=True,
     )
     return scheduler
 
@@ -44,28 +131,28 @@ def create_scheduler() -> AsyncIOScheduler:
 # --- Time window helpers ----------------------------------------------------
 
 
-def _day_window(target: date) -> tuple[datetime, datetime]:
-    start_local = datetime.combine(target, time.min, tzinfo=UTC)
-    end_local = datetime.combine(target, time(23, 59, 59), tzinfo=UTC)
+def _day_window(target: date, tz: tzinfo = UTC) -> tuple[datetime, datetime]:
+    start_local = datetime.combine(target, time.min, tzinfo=tz)
+    end_local = datetime.combine(target, time(23, 59, 59), tzinfo=tz)
     return start_local.astimezone(UTC), end_local.astimezone(UTC)
 
 
-def morning_window(now: datetime | None = None) -> tuple[datetime, datetime]:
-    now = now.astimezone(UTC) if now else datetime.now(UTC)
-    return _day_window(now.date())
+def morning_window(now: datetime | None = None, tz: tzinfo = UTC) -> tuple[datetime, datetime]:
+    now = now.astimezone(tz) if now else datetime.now(tz)
+    return _day_window(now.date(), tz)
 
 
-def evening_window(now: datetime | None = None) -> tuple[datetime, datetime]:
-    now = now.astimezone(UTC) if now else datetime.now(UTC)
+def evening_window(now: datetime | None = None, tz: tzinfo = UTC) -> tuple[datetime, datetime]:
+    now = now.astimezone(tz) if now else datetime.now(tz)
     tomorrow = now.date() + timedelta(days=1)
-    return _day_window(tomorrow)
+    return _day_window(tomorrow, tz)
 
 
-def weekly_window(now: datetime | None = None) -> tuple[datetime, datetime]:
-    now = now.astimezone(UTC) if now else datetime.now(UTC)
+def weekly_window(now: datetime | None = None, tz: tzinfo = UTC) -> tuple[datetime, datetime]:
+    now = now.astimezone(tz) if now else datetime.now(tz)
     weekday = now.isoweekday()
     monday = now.date() - timedelta(days=weekday - 1)
     sunday = monday + timedelta(days=6)
-    start_local = datetime.combine(monday, time.min, tzinfo=UTC)
-    end_local = datetime.combine(sunday, time(23, 59, 59), tzinfo=UTC)
+    start_local = datetime.combine(monday, time.min, tzinfo=tz)
+    end_local = datetime.combine(sunday, time(23, 59, 59), tzinfo=tz)
     return start_local.astimezone(UTC), end_local.astimezone(UTC)
@@ -0,0 +1,239 @@
+"""Rate limited outbound queue for Telegram ``sendMessage`` calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import TracebackType
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Limits documented by Telegram for bots: about 30 messages per second overall
+# and one message per second to the same chat.
+GLOBAL_RATE = 30.0
+PER_CHAT_RATE = 1.0
+# Telegram rejects ``sendMessage`` texts longer than this.
+MAX_MESSAGE_LENGTH = 4096
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Split ``text`` into chunks of at most ``limit`` characters.
+
+    Chunks end at line breaks where possible; a single line longer than
+    ``limit`` is cut.
+    """
+    chunks: list[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            chunks.append(text[:limit])
+            text = text[limit:]
+        else:
+            chunks.append(text[:cut])
+            text = text[cut + 1 :]
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Return seconds until a token is available (``0`` if one is now)."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self._paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` (used when Telegram returns 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        self.tokens -= 1
+
+
+@dataclass
+class SenderMetrics:
+    """Counters describing the outbound queue."""
+
+    queued: int = 0
+    sent: int = 0
+    retried: int = 0
+    rate_limited: int = 0
+    dropped: int = 0
+
+
+class OutboundSender:
+    """Deliver messages through ``sendMessage`` within Telegram's rate limits.
+
+    Messages for one chat are delivered in FIFO order, at most
+    ``per_chat_rate`` per second, while a shared token bucket caps the total
+    at ``global_rate``. At most ``max_pending`` messages are buffered;
+    :meth:`send` waits for room when the buffer is full. ``429`` responses
+    pause all sending for the ``retry_after`` seconds Telegram asks for.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        global_rate: float = GLOBAL_RATE,
+        per_chat_rate: float = PER_CHAT_RATE,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        workers: int = 4,
+    ) -> None:
+        self.client = client
+        self.max_retries = max_retries
+        self.metrics = SenderMetrics()
+        self._global = TokenBucket(global_rate)
+        self._chat_interval = 1 / per_chat_rate
+        self._chat_ready_at: dict[int, float] = {}
+        self._pending: dict[int, deque[str]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._worker_count = workers
+        self._workers: list[asyncio.Task[None]] = []
+
+    async def __aenter__(self) -> OutboundSender:
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            await self.join()
+        await self.stop()
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self._worker_count)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Wait until every queued message has been delivered or dropped."""
+        await self._drained.wait()
+
+    async def send(self, chat_id: int, text: str) -> None:
+        """Queue ``text`` for ``chat_id``, split into Telegram-sized messages."""
+        for chunk in split_message(text):
+            await self._slots.acquire()
+            self.metrics.queued += 1
+            self._drained.clear()
+            queue = self._pending.get(chat_id)
+            if queue is not None:
+                queue.append(chunk)
+                continue
+            self._pending[chat_id] = deque([chunk])
+            self._schedule(chat_id)
+
+    def _schedule(self, chat_id: int) -> None:
+        delay = self._chat_ready_at.get(chat_id, 0.0) - time.monotonic()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, chat_id)
+        else:
+            self._ready.put_nowait(chat_id)
+
+    def _forget_idle_chats(self, now: float) -> None:
+        if len(self._chat_ready_at) > 10 * len(self._pending) + 1000:
+            self._chat_ready_at = {
+                chat_id: ready_at
+                for chat_id, ready_at in self._chat_ready_at.items()
+                if ready_at > now or chat_id in self._pending
+            }
+
+    async def _worker(self) -> None:
+        while True:
+            # A chat id is in ``_ready`` at most once, so a single worker owns
+            # a chat at a time and its messages go out in order.
+            chat_id = await self._ready.get()
+            queue = self._pending[chat_id]
+            try:
+                await self._deliver(chat_id, queue[0])
+            finally:
+                queue.popleft()
+                self._slots.release()
+                self.metrics.queued -= 1
+                now = time.monotonic()
+                self._chat_ready_at[chat_id] = now + self._chat_interval
+                if queue:
+                    self._schedule(chat_id)
+                else:
+                    del self._pending[chat_id]
+                    self._forget_idle_chats(now)
+                if not self._pending:
+                    self._drained.set()
+
+    async def _deliver(self, chat_id: int, text: str) -> None:
+        for attempt in range(self.max_retries + 1):
+            await self._global.acquire()
+            try:
+                response = await self.client.post(
+                    "sendMessage", data={"chat_id": chat_id, "text": text}
+                )
+            except httpx.HTTPError:
+                logger.warning("sendMessage to %s failed", chat_id, exc_info=True)
+                retry_after = float(2**attempt)
+            else:
+                if response.status_code == 429:
+                    self.metrics.rate_limited += 1
+                    # The paused bucket delays the retry, and every other chat.
+                    self._global.pause(_retry_after(response))
+                    retry_after = 0.0
+                elif response.status_code >= 500:
+                    retry_after = float(2**attempt)
+                else:
+                    if response.is_success:
+                        self.metrics.sent += 1
+                    else:
+                        # Other 4xx errors (blocked bot, bad chat) never succeed.
+                        self.metrics.dropped += 1
+                        logger.warning(
+                            "sendMessage to %s rejected: %s", chat_id, response.status_code
+                        )
+                    return
+            if attempt < self.max_retries:
+                self.metrics.retried += 1
+                await asyncio.sleep(retry_after)
+        self.metrics.dropped += 1
+        logger.error("giving up on message to %s after %s retries", chat_id, self.max_retries)
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
@@ -7,16 +7,86 @@ import httpx
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from tg_cal_reminder.bot import handlers
+from tg_cal_reminder.bot.sender import OutboundSender, split_message
 from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache, UserSnapshot
+from tg_cal_reminder.llm import intent
+from tg_cal_reminder.llm.limiter import current_user
+
+Translator = Callable[[str, str, str], Awaitable[dict[str, Any]]]
+
+
+async def _translate_early(
+    session_factory: async_sessionmaker[AsyncSession],
+    snapshot: UserSnapshot | None,
+    telegram_id: int,
+    text: str,
+    translator: Translator,
+) -> Translator:
+    """Call ``translator`` for ``text`` now and return a translator replaying its outcome.
+
+    Without a cached ``snapshot`` the user is read in a short session of its
+    own. Unknown and unauthorized users never reach the translator, so it is
+    returned unchanged for them.
+    """
+    if snapshot is None:
+        async with session_factory() as session:
+            user = await crud.get_user_by_telegram_id(session, telegram_id)
+        if user is None:
+            return translator
+        snapshot = UserSnapshot.of(user)
+    if not snapshot.is_authorized:
+        return translator
+
+    result: dict[str, Any] = {}
+    error: Exception | None = None
+    token = current_user.set(snapshot.id)
+    try:
+        result = await translator(text, snapshot.language, snapshot.timezone)
+    except Exception as exc:
+        error = exc
+    finally:
+        current_user.reset(token)
+
+    async def translated(text: str, language: str, timezone: str) -> dict[str, Any]:
+        if error is not None:
+            raise error
+        return result
+
+    return translated
 
 
 async def handle_update(
     update: dict,
     tg_client: httpx.AsyncClient,
     session_factory: async_sessionmaker[AsyncSession],
-    translator: Callable[[str, str, str], Awaitable[dict[str, Any]]],
+    translator: Translator,
+    *,
+    dedupe: bool = False,
+    sender: OutboundSender | None = None,
+    user_cache: UserCache | None = None,
+    unit_of_work: bool = False,
+    next_offset: Callable[[int], int] | None = None,
 ) -> None:
-    """Process a single Telegram update."""
+    """Process a single Telegram update.
+
+    The update offset is persisted in the same transaction as the handler's
+    work: ``next_offset(update_id)`` when given, e.g.
+    :meth:`~tg_cal_reminder.bot.polling.Poller.committed_offset`, else the
+    offset right after the update. An update handled while an earlier one
+    is still in flight is recorded as processed, so the redelivery after a
+    restart from the lower offset is dropped. With ``dedupe`` enabled every
+    handled ``update_id`` is recorded as well and redelivered updates are
+    dropped, which makes it safe to resume from Telegram's own
+    (at-least-once) queue after a crash. Replies go
+    through ``sender`` when given so they respect Telegram's rate limits.
+    With ``user_cache`` the user row is only read when it is not cached.
+    With ``unit_of_work`` the CRUD helpers only flush and the update, from
+    creating the user to the offset bookkeeping, is committed once.
+
+    Free text for the LLM is translated before the session is opened, so no
+    transaction or row lock is held while waiting for the answer.
+    """
     message = update.get("message")
     if not message or "text" not in message:
         return
@@ -28,16 +98,57 @@ async def handle_update(
     telegram_id = message.get("from", {}).get("id")
     username = message.get("from", {}).get("username")
     text = message["text"]
+    update_id = update.get("update_id")
+
+    snapshot = None
+    epoch = None
+    if user_cache is not None:
+        snapshot = user_cache.get(telegram_id)
+        if snapshot is None:
+            epoch = user_cache.epoch()
+    # Free text is run through the fast path once; only misses go to the LLM.
+    matched = None
+    if not text.startswith("/"):
+        matched = intent.fast_path.match(text)
+        if matched is None:
+            translator = await _translate_early(
+                session_factory, snapshot, telegram_id, text, translator
+            )
 
     async with session_factory() as session:
-        user = await crud.get_user_by_telegram_id(session, telegram_id)
-        if user is None:
-            user = await crud.create_user(session, telegram_id, username=username)
+        if unit_of_work:
+            crud.begin_unit_of_work(session)
+        if (
+            (dedupe or next_offset is not None)
+            and update_id is not None
+            and await crud.is_update_processed(session, update_id)
+        ):
+            return
+        loaded = snapshot is None
+        if snapshot is not None:
+            user = snapshot.attach(session)
+        else:
+            user = await crud.upsert_user(session, telegram_id, username=username)
         try:
             reply = await handlers.dispatch(
-                session, user, text, user.language, translator
+                session, user, text, user.language, translator, matched=matched
             )
         except handlers.HandlerError as err:
             reply = str(err)
+        if update_id is not None:
+            offset = update_id + 1 if next_offset is None else next_offset(update_id)
+            await crud.advance_update_offset(session, offset)
+            if dedupe or offset <= update_id:
+                await crud.mark_update_processed(session, update_id)
+        await session.commit()
+
+    if loaded and user_cache is not None:
+        # Cache the user only once it is committed; a write made while handling
+        # the update has bumped the epoch and keeps the snapshot out.
+        user_cache.put(user, epoch)
 
-    await tg_client.post("sendMessage", data={"chat_id": chat_id, "text": reply})
+    if sender is not None:
+        await sender.send(chat_id, reply)
+    else:
+        for chunk in split_message(reply):
+            await tg_client.post("sendMessage", data={"chat_id": chat_id, "text": chunk})
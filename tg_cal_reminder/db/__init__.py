@@ -0,0 +1,2 @@
+# Register the session hooks that announce committed changes.
+from . import hooks  # noqa: F401
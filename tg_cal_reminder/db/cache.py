@@ -0,0 +1,128 @@
+"""In-process cache of ``User`` rows keyed by Telegram ID."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from . import crud
+from .models import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Column values of a ``User`` row."""
+
+    id: int
+    telegram_id: int
+    username: str | None
+    language: str
+    timezone: str
+    is_authorized: bool
+    created_at: datetime
+
+    @classmethod
+    def of(cls, user: User) -> UserSnapshot:
+        return cls(**{field.name: getattr(user, field.name) for field in fields(cls)})
+
+    def attach(self, session: AsyncSession) -> User:
+        """Return a persistent ``User`` in ``session`` without querying the database."""
+        user = User(**{field.name: getattr(self, field.name) for field in fields(self)})
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+
+@dataclass
+class CacheMetrics:
+    """Counters describing the cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class UserCache:
+    """Bounded LRU cache of user snapshots that expire after ``ttl`` seconds.
+
+    Register :meth:`on_change` with :func:`crud.add_change_listener` so
+    writes made through :mod:`tg_cal_reminder.db.crud` evict the user. A
+    snapshot read before an eviction is not stored afterwards (see
+    :meth:`epoch`), so a concurrent write cannot be masked by a stale entry.
+    On Postgres, :class:`~tg_cal_reminder.db.notify.ChangeSubscriber` passes
+    writes made by other processes on as well; otherwise they are only
+    picked up once the TTL expires.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.metrics = CacheMetrics()
+        self._entries: OrderedDict[int, tuple[float, UserSnapshot]] = OrderedDict()
+        self._telegram_ids: dict[int, int] = {}
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def epoch(self) -> int:
+        """Return a token to pass to :meth:`put` for a snapshot read after this call."""
+        return self._epoch
+
+    def get(self, telegram_id: int) -> UserSnapshot | None:
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._discard(telegram_id)
+            self.metrics.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.metrics.hits += 1
+        return entry[1]
+
+    def put(self, user: User | UserSnapshot, epoch: int | None = None) -> None:
+        """Store ``user`` unless an invalidation happened since ``epoch``."""
+        if epoch is not None and epoch != self._epoch:
+            return
+        snapshot = user if isinstance(user, UserSnapshot) else UserSnapshot.of(user)
+        self._discard(snapshot.telegram_id)
+        self._entries[snapshot.telegram_id] = (time.monotonic() + self.ttl, snapshot)
+        self._telegram_ids[snapshot.id] = snapshot.telegram_id
+        while len(self._entries) > self.maxsize:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._telegram_ids.pop(evicted.id, None)
+            self.metrics.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the entry for the user with primary key ``user_id``."""
+        self._epoch += 1
+        self.metrics.invalidations += 1
+        telegram_id = self._telegram_ids.pop(user_id, None)
+        if telegram_id is not None:
+            self._entries.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        self._telegram_ids.clear()
+
+    def _discard(self, telegram_id: int) -> None:
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None:
+            self._telegram_ids.pop(entry[1].id, None)
+
+    def on_change(self, change: crud.Change) -> None:
+        """Apply a write reported by :mod:`tg_cal_reminder.db.crud`."""
+        if change.table == "users":
+            self.invalidate(change.id)
@@ -2,13 +2,197 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
-from datetime import datetime
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
 
-from sqlalchemy import and_, select, update
+from sqlalchemy import (
+    Boolean,
+    Row,
+    Select,
+    and_,
+    delete,
+    exists,
+    false,
+    insert,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Executable
 
-from .models import Event, User
+from .models import Event, ProcessedUpdate, TranslationCacheEntry, UpdateOffset, User
+
+_OFFSET_ROW_ID = 1
+
+
+@dataclass(frozen=True)
+class Change:
+    """A write to ``users`` or ``events`` reported to change listeners."""
+
+    table: str
+    id: int
+    user_id: int
+    start_time: datetime | None = None
+
+
+ChangeListener = Callable[[Change], None]
+
+_change_listeners: list[ChangeListener] = []
+
+# Postgres channel on which committed changes are announced to other processes.
+NOTIFY_CHANNEL = "tg_cal_reminder_changes"
+# Process identifier sent with notifications so a process can skip its own.
+NOTIFY_ORIGIN = uuid.uuid4().hex[:12]
+# Postgres caps NOTIFY payloads at 8000 bytes.
+_NOTIFY_PAYLOAD_LIMIT = 7900
+_CHANGES_KEY = "tg_cal_reminder.changes"
+_UNIT_OF_WORK_KEY = "tg_cal_reminder.unit_of_work"
+
+# Execution option marking statements that may run on the read replica.
+READ_REPLICA_OPTION = "tg_cal_reminder_read_replica"
+# Seconds after a committed write during which the user's reads stay on the
+# primary, so they see their own change despite replication lag.
+READ_YOUR_WRITES_WINDOW = 5.0
+_READ_YOUR_WRITES_LIMIT = 10_000
+_recent_writes: dict[int, float] = {}
+
+
+def add_change_listener(listener: ChangeListener) -> None:
+    """Call ``listener`` for every write committed through this module."""
+    _change_listeners.append(listener)
+
+
+def remove_change_listener(listener: ChangeListener) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+
+def dispatch_changes(changes: Iterable[Change]) -> None:
+    """Pass ``changes`` to the registered change listeners."""
+    for change in changes:
+        for listener in list(_change_listeners):
+            listener(change)
+
+
+def _publish(session: AsyncSession, *changes: Change) -> None:
+    """Announce ``changes`` once the session's transaction commits."""
+    # Tie the changes to a transaction even when RETURNING left none open, so
+    # a following rollback discards them instead of the next commit sending them.
+    if not session.in_transaction():
+        session.sync_session.begin()
+    session.info.setdefault(_CHANGES_KEY, []).extend(changes)
+
+
+def encode_changes(changes: Sequence[Change]) -> list[str]:
+    """Return ``NOTIFY`` payloads describing ``changes``."""
+    payloads: list[str] = []
+    items: list[str] = []
+    size = len(NOTIFY_ORIGIN)
+    for change in changes:
+        start = change.start_time.isoformat() if change.start_time is not None else ""
+        item = f"{change.table}:{change.id}:{change.user_id}:{start}"
+        if items and size + len(item) + 1 > _NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(" ".join([NOTIFY_ORIGIN, *items]))
+            items, size = [], len(NOTIFY_ORIGIN)
+        items.append(item)
+        size += len(item) + 1
+    if items:
+        payloads.append(" ".join([NOTIFY_ORIGIN, *items]))
+    return payloads
+
+
+def decode_changes(payload: str) -> tuple[str, list[Change]]:
+    """Return the origin and changes of a payload built by :func:`encode_changes`."""
+    origin, *items = payload.split(" ")
+    changes = []
+    for item in items:
+        table, change_id, user_id, start = item.split(":", 3)
+        start_time = datetime.fromisoformat(start) if start else None
+        changes.append(Change(table, int(change_id), int(user_id), start_time))
+    return origin, changes
+
+
+def apply_committed_changes(changes: Sequence[Change]) -> None:
+    """Handle ``changes`` committed in this or another process.
+
+    The users who wrote keep reading from the primary for a while and the
+    registered change listeners are called.
+    """
+    _record_writes(changes)
+    dispatch_changes(changes)
+
+
+def _record_writes(changes: Iterable[Change]) -> None:
+    now = time.monotonic()
+    for change in changes:
+        _recent_writes.pop(change.user_id, None)
+        _recent_writes[change.user_id] = now
+    # Entries are kept in write order, so expired ones are at the front.
+    while len(_recent_writes) > _READ_YOUR_WRITES_LIMIT or (
+        _recent_writes and next(iter(_recent_writes.values())) < now - READ_YOUR_WRITES_WINDOW
+    ):
+        del _recent_writes[next(iter(_recent_writes))]
+
+
+def _for_read(session: AsyncSession, stmt: Select[Any], user_id: int | None = None) -> Select[Any]:
+    """Allow ``stmt`` to run on the read replica unless it could miss a write.
+
+    Reads stay on the primary while ``session`` holds uncommitted changes and
+    for :data:`READ_YOUR_WRITES_WINDOW` seconds after ``user_id`` committed a
+    write in this process. Sessions without a replica ignore the option.
+    """
+    if session.info.get(_CHANGES_KEY):
+        return stmt
+    if user_id is not None:
+        written = _recent_writes.get(user_id)
+        if written is not None and time.monotonic() - written < READ_YOUR_WRITES_WINDOW:
+            return stmt
+    return stmt.execution_options(**{READ_REPLICA_OPTION: True})
+
+
+def _insert(session: AsyncSession, table: type) -> postgresql.Insert | sqlite.Insert:
+    """Return a dialect-specific ``INSERT`` supporting ``ON CONFLICT`` clauses."""
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def begin_unit_of_work(session: AsyncSession) -> None:
+    """Make the write helpers of this module only flush ``session``.
+
+    The caller owns the transaction and commits it once, after all of its
+    work, so the writes of one unit of work succeed or fail together.
+    """
+    session.info[_UNIT_OF_WORK_KEY] = True
+
+
+async def _commit(session: AsyncSession) -> None:
+    """Commit ``session`` unless a unit of work is open, in which case flush it."""
+    if session.info.get(_UNIT_OF_WORK_KEY):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def _execute_returning(session: AsyncSession, stmt: Executable) -> Any:
+    """Execute an ORM ``RETURNING`` statement and return its single object.
+
+    The row is loaded into the identity map with ``populate_existing``, so an
+    instance already in ``session`` is updated in place and no follow-up
+    ``refresh()`` is needed.
+    """
+    result = await session.execute(stmt, execution_options={"populate_existing": True})
+    return result.scalar_one()
 
 
 async def create_user(
@@ -20,19 +204,98 @@ async def create_user(
     is_authorized: bool = False,
 ) -> User:
     """Create and return a new ``User`` record."""
-    user = User(
-        telegram_id=telegram_id,
-        username=username,
-        language=language,
-        timezone=timezone,
-        is_authorized=is_authorized,
-    )
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    stmt = (
+        insert(User)
+        .values(
+            telegram_id=telegram_id,
+            username=username,
+            language=language,
+            timezone=timezone,
+            is_authorized=is_authorized,
+        )
+        .returning(User)
+    )
+    user: User = await _execute_returning(session, stmt)
+    await _commit(session)
     return user
 
 
+async def upsert_user(session: AsyncSession, telegram_id: int, username: str | None = None) -> User:
+    """Return the user with ``telegram_id``, creating it if needed.
+
+    The stored ``username`` is only rewritten when it changed, which is
+    announced as a change of the user. On PostgreSQL this is one round-trip:
+    an ``INSERT ... ON CONFLICT DO UPDATE`` in a CTE, so concurrent first
+    messages from a new user cannot race, unioned with a read of the row it
+    left unchanged. SQLite cannot write in a CTE, so there the user is read
+    first and a second statement creates or renames it when needed.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        user, renamed = await _upsert_user_sqlite(session, telegram_id, username)
+    else:
+        user, renamed = await _upsert_user_postgresql(session, telegram_id, username)
+    if renamed:
+        _publish(session, Change("users", user.id, user.id))
+    await _commit(session)
+    return user
+
+
+async def _upsert_user_postgresql(
+    session: AsyncSession, telegram_id: int, username: str | None
+) -> tuple[User, bool]:
+    insert = postgresql.insert(User).values(telegram_id=telegram_id, username=username)
+    # ``xmax`` is zero for a new row and set when the upsert updated one.
+    renamed = (~literal_column("xmax = 0", Boolean)).label("renamed")
+    upsert = (
+        insert.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={"username": insert.excluded.username},
+            where=User.username.is_distinct_from(insert.excluded.username),
+        )
+        .returning(*User.__table__.c, renamed)
+        .cte("upsert")
+    )
+    unchanged = select(*User.__table__.c, false().label("renamed")).where(
+        User.telegram_id == telegram_id, ~exists(upsert.select())
+    )
+    rows = union_all(upsert.select(), unchanged).subquery()
+    stmt = select(aliased(User, rows), rows.c.renamed)
+    options = {"populate_existing": True}
+    row = (await session.execute(stmt, execution_options=options)).one_or_none()
+    if row is not None:
+        return row[0], row[1]
+    # A concurrent first message inserted the row after this statement's
+    # snapshot was taken, so only a new read sees it.
+    query = select(User).where(User.telegram_id == telegram_id)
+    return (await session.execute(query, execution_options=options)).scalar_one(), False
+
+
+async def _upsert_user_sqlite(
+    session: AsyncSession, telegram_id: int, username: str | None
+) -> tuple[User, bool]:
+    query = select(User).where(User.telegram_id == telegram_id)
+    options = {"populate_existing": True}
+    user = (await session.execute(query, execution_options=options)).scalar_one_or_none()
+    if user is None:
+        insert = sqlite.insert(User).values(telegram_id=telegram_id, username=username)
+        stmt = insert.on_conflict_do_update(
+            index_elements=[User.telegram_id], set_={"username": insert.excluded.username}
+        ).returning(User)
+        return await _execute_returning(session, stmt), False
+    if user.username == username:
+        return user, False
+    rename = update(User).where(User.id == user.id).values(username=username).returning(User)
+    return await _execute_returning(session, rename), True
+
+
+async def _update_user(session: AsyncSession, user: User, **values: Any) -> User:
+    stmt = update(User).where(User.id == user.id).values(**values).returning(User)
+    updated: User = await _execute_returning(session, stmt)
+    _publish(session, Change("users", updated.id, updated.id))
+    await _commit(session)
+    return updated
+
+
 async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> User | None:
     """Return ``User`` by Telegram ID or ``None`` if not found."""
     result = await session.execute(select(User).where(User.telegram_id == telegram_id))
@@ -41,26 +304,17 @@ async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> Us
 
 async def update_user_language(session: AsyncSession, user: User, language: str) -> User:
     """Update a user's language preference."""
-    user.language = language
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await _update_user(session, user, language=language)
 
 
 async def update_user_timezone(session: AsyncSession, user: User, timezone: str) -> User:
     """Update a user's timezone."""
-    user.timezone = timezone
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await _update_user(session, user, timezone=timezone)
 
 
 async def authorize_user(session: AsyncSession, user: User) -> User:
     """Mark ``user`` as authorized."""
-    user.is_authorized = True
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await _update_user(session, user, is_authorized=True)
 
 
 async def create_event(
@@ -71,10 +325,14 @@ async def create_event(
     end_time: datetime | None = None,
 ) -> Event:
     """Create an event for ``user_id`` and return it."""
-    event = Event(user_id=user_id, start_time=start_time, end_time=end_time, title=title)
-    session.add(event)
-    await session.commit()
-    await session.refresh(event)
+    stmt = (
+        insert(Event)
+        .values(user_id=user_id, start_time=start_time, end_time=end_time, title=title)
+        .returning(Event)
+    )
+    event: Event = await _execute_returning(session, stmt)
+    _publish(session, Change("events", event.id, user_id, start_time))
+    await _commit(session)
     return event
 
 
@@ -88,7 +346,29 @@ async def list_events(
     if not include_closed:
         stmt = stmt.where(Event.is_closed.is_(False))
     stmt = stmt.order_by(Event.is_closed, Event.start_time)
-    result = await session.execute(stmt)
+    result = await session.execute(_for_read(session, stmt, user_id))
+    return list(result.scalars())
+
+
+async def list_upcoming_events(
+    session: AsyncSession,
+    user_id: int,
+    since: datetime,
+    limit: int | None = None,
+) -> list[Event]:
+    """Return up to ``limit`` open events for ``user_id`` starting at ``since`` or later."""
+    stmt = (
+        select(Event)
+        .where(
+            Event.user_id == user_id,
+            Event.is_closed.is_(False),
+            Event.start_time >= since,
+        )
+        .order_by(Event.start_time, Event.id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await session.execute(_for_read(session, stmt, user_id))
     return list(result.scalars())
 
 
@@ -108,8 +388,10 @@ async def close_events(
         .returning(Event.id)
     )
     result = await session.execute(stmt)
-    await session.commit()
-    return [row[0] for row in result.fetchall()]
+    changed = [row[0] for row in result.fetchall()]
+    _publish(session, *(Change("events", event_id, user_id) for event_id in changed))
+    await _commit(session)
+    return changed
 
 
 async def update_event(
@@ -131,8 +413,11 @@ async def update_event(
         .returning(Event.id)
     )
     result = await session.execute(stmt)
-    await session.commit()
-    return result.scalar_one_or_none() is not None
+    updated = result.scalar_one_or_none() is not None
+    if updated:
+        _publish(session, Change("events", event_id, user_id, start_time))
+    await _commit(session)
+    return updated
 
 
 async def get_events_between(
@@ -152,22 +437,236 @@ async def get_events_between(
         )
         .order_by(Event.start_time)
     )
+    result = await session.execute(_for_read(session, stmt, user_id))
+    return list(result.scalars())
+
+
+async def list_reminder_rows(
+    session: AsyncSession, start: datetime, end: datetime
+) -> list[Row[Any]]:
+    """Return open events of authorized users starting in ``[start, end)``.
+
+    The range is served by the ``start_time`` index, so reminder horizons are
+    loaded without scanning the table. Rows carry ``id``, ``start_time``,
+    ``title``, ``telegram_id`` and ``language``.
+    """
+    stmt = (
+        select(Event.id, Event.start_time, Event.title, User.telegram_id, User.language)
+        .join(User, Event.user_id == User.id)
+        .where(
+            Event.start_time >= start,
+            Event.start_time < end,
+            Event.is_closed.is_(False),
+            User.is_authorized.is_(True),
+        )
+        .order_by(Event.start_time, Event.id)
+    )
     result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def get_reminder_row(session: AsyncSession, event_id: int) -> Row[Any] | None:
+    """Return the reminder row for an open event, or ``None`` if it is closed or gone."""
+    stmt = (
+        select(Event.id, Event.start_time, Event.title, User.telegram_id, User.language)
+        .join(User, Event.user_id == User.id)
+        .where(Event.id == event_id, Event.is_closed.is_(False), User.is_authorized.is_(True))
+    )
+    result = await session.execute(stmt)
+    return result.one_or_none()
+
+
+async def list_user_timezones(session: AsyncSession) -> list[str]:
+    """Return the distinct timezones of authorized users."""
+    stmt = select(User.timezone).where(User.is_authorized.is_(True)).distinct()
+    result = await session.execute(_for_read(session, stmt))
     return list(result.scalars())
 
 
-async def list_events_between(
+async def stream_digest_rows(
     session: AsyncSession,
+    start: datetime,
+    end: datetime,
+    *,
+    timezones: Sequence[str] | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Row[Any]]:
+    """Yield open events of all authorized users between ``start`` and ``end``.
+
+    A single set-based query replaces one ``get_events_between`` call per user.
+    Rows are ordered by user so callers can group them while streaming, and
+    carry ``telegram_id``, ``language``, ``id``, ``start_time``, ``end_time``
+    and ``title``. ``timezones`` restricts the query to users in those zones.
+    """
+    stmt = (
+        select(
+            User.telegram_id,
+            User.language,
+            Event.id,
+            Event.start_time,
+            Event.end_time,
+            Event.title,
+        )
+        .join(Event, Event.user_id == User.id)
+        .where(
+            User.is_authorized.is_(True),
+            Event.is_closed.is_(False),
+            Event.start_time >= start,
+            Event.start_time <= end,
+        )
+        .order_by(User.id, Event.start_time, Event.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if timezones is not None:
+        stmt = stmt.where(User.timezone.in_(timezones))
+    result = await session.stream(_for_read(session, stmt))
+    async for row in result:
+        yield row
+
+
+def _events_between_stmt(
     user_id: int,
-    start: datetime | None = None,
-    end: datetime | None = None,
-) -> list[Event]:
-    """Return events for ``user_id`` filtered by optional date range."""
+    start: datetime | None,
+    end: datetime | None,
+    after: tuple[bool, datetime, int] | None,
+    limit: int | None,
+) -> Select[tuple[Event]]:
     stmt = select(Event).where(Event.user_id == user_id)
     if start is not None:
         stmt = stmt.where(Event.start_time >= start)
     if end is not None:
         stmt = stmt.where(Event.start_time <= end)
-    stmt = stmt.order_by(Event.is_closed, Event.start_time)
-    result = await session.execute(stmt)
+    if after is not None:
+        columns = (Event.is_closed, Event.start_time, Event.id)
+        key = (literal(value, column.type) for value, column in zip(after, columns, strict=True))
+        stmt = stmt.where(tuple_(*columns) > tuple_(*key))
+    stmt = stmt.order_by(Event.is_closed, Event.start_time, Event.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+async def list_events_between(
+    session: AsyncSession,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    after: tuple[bool, datetime, int] | None = None,
+    limit: int | None = None,
+) -> list[Event]:
+    """Return events for ``user_id`` filtered by optional date range.
+
+    Events are ordered by ``(is_closed, start_time, id)``. ``after`` is the
+    key of the last event of the previous page and ``limit`` the page size.
+    """
+    stmt = _events_between_stmt(user_id, start, end, after, limit)
+    result = await session.execute(_for_read(session, stmt, user_id))
     return list(result.scalars())
+
+
+async def stream_events_between(
+    session: AsyncSession,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    after: tuple[bool, datetime, int] | None = None,
+    limit: int | None = None,
+    batch_size: int = 100,
+) -> AsyncIterator[Event]:
+    """Like :func:`list_events_between` but yield events as they are fetched."""
+    stmt = _events_between_stmt(user_id, start, end, after, limit).execution_options(
+        yield_per=batch_size
+    )
+    result = await session.stream_scalars(_for_read(session, stmt, user_id))
+    async for event in result:
+        yield event
+
+
+async def get_update_offset(session: AsyncSession) -> int | None:
+    """Return the persisted ``getUpdates`` offset or ``None`` if never stored."""
+    result = await session.execute(
+        select(UpdateOffset.next_offset).where(UpdateOffset.id == _OFFSET_ROW_ID)
+    )
+    return result.scalar_one_or_none()
+
+
+async def advance_update_offset(session: AsyncSession, next_offset: int) -> None:
+    """Store ``next_offset`` unless a higher offset is already persisted.
+
+    The change is not committed so it lands in the same transaction as the
+    handler's work.
+    """
+    stmt = _insert(session, UpdateOffset).values(
+        id=_OFFSET_ROW_ID, next_offset=next_offset, updated_at=datetime.now(UTC)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UpdateOffset.id],
+        set_={"next_offset": stmt.excluded.next_offset, "updated_at": stmt.excluded.updated_at},
+        where=UpdateOffset.next_offset < stmt.excluded.next_offset,
+    )
+    await session.execute(stmt)
+
+
+async def is_update_processed(session: AsyncSession, update_id: int) -> bool:
+    """Return ``True`` if ``update_id`` was already handled."""
+    result = await session.execute(
+        select(ProcessedUpdate.update_id).where(ProcessedUpdate.update_id == update_id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def mark_update_processed(session: AsyncSession, update_id: int) -> None:
+    """Record ``update_id`` as handled without committing."""
+    stmt = (
+        _insert(session, ProcessedUpdate)
+        .values(update_id=update_id, processed_at=datetime.now(UTC))
+        .on_conflict_do_nothing(index_elements=[ProcessedUpdate.update_id])
+    )
+    await session.execute(stmt)
+
+
+async def purge_processed_updates(session: AsyncSession, before: datetime) -> int:
+    """Delete updates processed before ``before`` and return how many were removed."""
+    result = await session.execute(
+        delete(ProcessedUpdate).where(ProcessedUpdate.processed_at < before)
+    )
+    await _commit(session)
+    return int(result.rowcount or 0)
+
+
+async def get_cached_translation(
+    session: AsyncSession, key: str, now: datetime
+) -> dict[str, Any] | None:
+    """Return the shared translation stored under ``key`` unless it expired by ``now``."""
+    result = await session.execute(
+        select(TranslationCacheEntry.result).where(
+            TranslationCacheEntry.key == key, TranslationCacheEntry.expires_at > now
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def put_cached_translation(
+    session: AsyncSession, key: str, result: dict[str, Any], expires_at: datetime
+) -> None:
+    """Store ``result`` under ``key`` until ``expires_at``, replacing any older entry."""
+    stmt = _insert(session, TranslationCacheEntry).values(
+        key=key, result=result, expires_at=expires_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TranslationCacheEntry.key],
+        set_={"result": stmt.excluded.result, "expires_at": stmt.excluded.expires_at},
+    )
+    await session.execute(stmt)
+    await _commit(session)
+
+
+async def purge_expired_translations(session: AsyncSession, now: datetime) -> int:
+    """Delete shared translations expired by ``now`` and return how many were removed."""
+    result = await session.execute(
+        delete(TranslationCacheEntry).where(TranslationCacheEntry.expires_at <= now)
+    )
+    await _commit(session)
+    return int(result.rowcount or 0)
@@ -0,0 +1,31 @@
+"""Session event hooks announcing the changes published by :mod:`crud`."""
+
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session, SessionTransaction
+
+from . import crud
+
+
+@listens_for(Session, "before_commit")
+def _notify_changes(session: Session) -> None:
+    # NOTIFY is transactional: other processes hear about the changes exactly
+    # when they become visible, and not at all if the commit fails.
+    changes = session.info.get(crud._CHANGES_KEY)
+    if not changes or session.get_bind().dialect.name != "postgresql":
+        return
+    for payload in crud.encode_changes(changes):
+        session.execute(select(func.pg_notify(crud.NOTIFY_CHANNEL, payload)))
+
+
+@listens_for(Session, "after_commit")
+def _dispatch_committed_changes(session: Session) -> None:
+    crud.apply_committed_changes(session.info.pop(crud._CHANGES_KEY, []))
+
+
+# "after_rollback" only fires when a database connection was rolled back.
+@listens_for(Session, "after_soft_rollback")
+def _discard_changes(session: Session, previous_transaction: SessionTransaction) -> None:
+    session.info.pop(crud._CHANGES_KEY, None)
@@ -1,6 +1,7 @@
 from datetime import UTC, datetime
+from typing import Any
 
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, String
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, ForeignKey, Index, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -59,7 +60,54 @@ class Event(Base):
     __table_args__ = (
         Index("ix_events_start_time", "start_time"),
         Index("ix_events_is_closed", "is_closed"),
+        # Serves the per-user listings, which filter on ``user_id`` and order
+        # by ``(is_closed, start_time)``.
+        Index("ix_events_user_id_is_closed_start_time", "user_id", "is_closed", "start_time"),
     )
 
     def __repr__(self) -> str:
         return f"<Event(id={self.id}, title={self.title}, start_time={self.start_time})>"
+
+
+class UpdateOffset(Base):
+    """Persisted Telegram ``getUpdates`` offset (a single row with ``id=1``)"""
+
+    __tablename__ = "update_offsets"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    next_offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC)
+    )
+
+    def __repr__(self) -> str:
+        return f"<UpdateOffset(next_offset={self.next_offset})>"
+
+
+class ProcessedUpdate(Base):
+    """Telegram update already handled, used to drop redelivered updates"""
+
+    __tablename__ = "processed_updates"
+
+    update_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    processed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC)
+    )
+
+    def __repr__(self) -> str:
+        return f"<ProcessedUpdate(update_id={self.update_id})>"
+
+
+class TranslationCacheEntry(Base):
+    """LLM translation shared between bot processes until ``expires_at``"""
+
+    __tablename__ = "translation_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    result: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_translation_cache_expires_at", "expires_at"),)
+
+    def __repr__(self) -> str:
+        return f"<TranslationCacheEntry(key={self.key}, expires_at={self.expires_at})>"
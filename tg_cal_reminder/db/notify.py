@@ -0,0 +1,98 @@
+"""Cross-process change notifications over Postgres ``LISTEN``/``NOTIFY``."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+from sqlalchemy.engine import URL, make_url
+
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+
+def _asyncpg_dsn(database_url: str | URL) -> str:
+    # ``str(URL)`` masks the password, so only plain strings are rewritten.
+    if isinstance(database_url, str):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    url = make_url(database_url)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class ChangeSubscriber:
+    """Pass changes committed by other processes to ``listener``.
+
+    Writes made through :mod:`tg_cal_reminder.db.crud` on Postgres announce
+    their changes with ``NOTIFY`` in the committing transaction. This keeps a
+    dedicated asyncpg connection listening on that channel and forwards
+    every change that did not originate in this process. Without
+    ``listener`` the changes are handled like local commits, see
+    :func:`crud.apply_committed_changes`.
+
+    Notifications sent while the connection is down are lost, so
+    ``on_reset`` is called after every (re)connect; caches should drop all
+    entries there.
+    """
+
+    RECONNECT_DELAY = 5.0
+
+    def __init__(
+        self,
+        database_url: str | URL,
+        listener: crud.ChangeListener | None = None,
+        *,
+        on_reset: Callable[[], None] | None = None,
+        channel: str = crud.NOTIFY_CHANNEL,
+    ) -> None:
+        self.dsn = _asyncpg_dsn(database_url)
+        self.listener = listener
+        self.on_reset = on_reset
+        self.channel = channel
+        self.received = 0
+        self.listening = asyncio.Event()
+
+    def _on_notification(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        try:
+            origin, changes = crud.decode_changes(payload)
+        except ValueError:
+            logger.warning("ignoring malformed change notification %r", payload)
+            return
+        if origin == crud.NOTIFY_ORIGIN:
+            return
+        self.received += len(changes)
+        if self.listener is None:
+            crud.apply_committed_changes(changes)
+            return
+        for change in changes:
+            self.listener(change)
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        await connection.add_listener(self.channel, self._on_notification)
+        if self.on_reset is not None:
+            self.on_reset()
+        self.listening.set()
+        await lost.wait()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError):
+                logger.exception("change notification connection failed")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                continue
+            try:
+                await self._listen(connection)
+            finally:
+                self.listening.clear()
+                if not connection.is_closed():
+                    await connection.close()
+            logger.warning("change notification connection lost, reconnecting")
+            await asyncio.sleep(self.RECONNECT_DELAY)
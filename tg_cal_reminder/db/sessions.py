@@ -3,32 +3,203 @@ from __future__ import annotations
 import os
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
 
 from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
+
+from .crud import READ_REPLICA_OPTION
 
 load_dotenv()
 
 
-def get_engine(database_url: str | None = None) -> AsyncEngine:
-    """Return a new ``AsyncEngine`` using ``database_url`` or ``DATABASE_URL`` env."""
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool options for an engine.
+
+    ``pool_size`` and ``max_overflow`` cap the connections held by the pool;
+    size them for ``POLL_CONCURRENCY`` plus the scheduler and reminder tasks.
+    ``statement_cache_size`` is passed to asyncpg; set it to 0 behind
+    PgBouncer in transaction mode.
+    """
+
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+
+    @classmethod
+    def from_env(cls) -> PoolSettings:
+        """Return settings read from the ``DB_POOL_*`` environment variables."""
+        default = cls()
+        return cls(
+            pool_size=_env_int("DB_POOL_SIZE", default.pool_size),
+            max_overflow=_env_int("DB_POOL_MAX_OVERFLOW", default.max_overflow),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", default.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", default.pool_recycle),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", default.pool_pre_ping),
+            statement_cache_size=_env_int("DB_STATEMENT_CACHE_SIZE", default.statement_cache_size),
+        )
+
+    def engine_options(self, url: str) -> dict[str, Any]:
+        """Return ``create_async_engine`` keyword arguments for ``url``."""
+        options: dict[str, Any] = {
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+        backend = make_url(url)
+        # SQLite uses a static or file pool without size limits.
+        if backend.get_backend_name() != "sqlite":
+            options.update(
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+            )
+        if backend.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"statement_cache_size": self.statement_cache_size}
+        return options
+
+
+@dataclass
+class PoolMetrics:
+    """Connection usage of an engine's pool."""
+
+    size: int = 0
+    checked_out: int = 0
+    checked_in: int = 0
+    overflow: int = 0
+    checkouts: int = 0
+    max_checked_out: int = 0
+    connects: int = 0
+
+
+class RoutingSession(Session):
+    """Session sending statements marked by :mod:`.crud` to a read replica.
+
+    The replica engine is taken from ``info["read_bind"]``; everything else,
+    including all writes and flushes, goes to the session's primary bind.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Engine | Connection:
+        replica = self.info.get(_READ_BIND_KEY)
+        if (
+            replica is not None
+            and clause is not None
+            and not self._flushing
+            and clause.get_execution_options().get(READ_REPLICA_OPTION)
+        ):
+            return replica  # type: ignore[no-any-return]
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+_READ_BIND_KEY = "read_bind"
+_engines: dict[str, AsyncEngine] = {}
+_sessionmakers: dict[tuple[AsyncEngine, AsyncEngine | None], async_sessionmaker[AsyncSession]] = {}
+_metrics: dict[AsyncEngine, PoolMetrics] = {}
+
+
+def _database_url(database_url: str | None) -> str:
     url = database_url or os.getenv("DATABASE_URL")
     if not url:
         raise RuntimeError("DATABASE_URL environment variable is not set")
-    url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-    return create_async_engine(url, echo=False)
+    return url.replace("postgres://", "postgresql+asyncpg://", 1)
 
 
-def get_sessionmaker(engine: AsyncEngine | None = None) -> async_sessionmaker[AsyncSession]:
-    """Return an ``async_sessionmaker`` bound to ``engine`` or the default engine."""
+def _track_pool(engine: AsyncEngine) -> None:
+    metrics = _metrics[engine] = PoolMetrics()
+
+    def on_connect(*args: object) -> None:
+        metrics.connects += 1
+
+    def on_checkout(*args: object) -> None:
+        metrics.checkouts += 1
+        metrics.checked_out += 1
+        metrics.max_checked_out = max(metrics.max_checked_out, metrics.checked_out)
+
+    def on_checkin(*args: object) -> None:
+        metrics.checked_out = max(0, metrics.checked_out - 1)
+
+    event.listen(engine.sync_engine, "connect", on_connect)
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    event.listen(engine.sync_engine, "checkin", on_checkin)
+
+
+def get_engine(
+    database_url: str | None = None, settings: PoolSettings | None = None
+) -> AsyncEngine:
+    """Return the process-wide ``AsyncEngine`` for ``database_url`` or ``DATABASE_URL``.
+
+    One engine, and so one connection pool, is created per URL and shared by
+    later calls. ``settings`` defaults to :meth:`PoolSettings.from_env` and
+    only applies when the engine is first created.
+    """
+    url = _database_url(database_url)
+    engine = _engines.get(url)
+    if engine is None:
+        settings = settings or PoolSettings.from_env()
+        engine = create_async_engine(url, echo=False, **settings.engine_options(url))
+        _track_pool(engine)
+        _engines[url] = engine
+    return engine
+
+
+def get_read_engine(settings: PoolSettings | None = None) -> AsyncEngine | None:
+    """Return the engine for ``DATABASE_READ_URL`` or ``None`` if it is not set."""
+    url = os.getenv("DATABASE_READ_URL")
+    if not url:
+        return None
+    return get_engine(url, settings)
+
+
+def get_sessionmaker(
+    engine: AsyncEngine | None = None, read_engine: AsyncEngine | None = None
+) -> async_sessionmaker[AsyncSession]:
+    """Return the ``async_sessionmaker`` bound to ``engine`` or the default engine.
+
+    With ``read_engine`` sessions are :class:`RoutingSession` instances that
+    run listing and digest queries on the replica.
+    """
     if engine is None:
         engine = get_engine()
-    return async_sessionmaker(engine, expire_on_commit=False)
+    key = (engine, read_engine)
+    session_maker = _sessionmakers.get(key)
+    if session_maker is None:
+        if read_engine is None:
+            session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        else:
+            session_maker = async_sessionmaker(
+                engine,
+                expire_on_commit=False,
+                sync_session_class=RoutingSession,
+                info={_READ_BIND_KEY: read_engine.sync_engine},
+            )
+        # Engines created elsewhere are not kept alive by the registry.
+        if engine in _metrics and (read_engine is None or read_engine in _metrics):
+            _sessionmakers[key] = session_maker
+    return session_maker
 
 
 @asynccontextmanager
@@ -37,3 +208,30 @@ async def get_session(engine: AsyncEngine | None = None) -> AsyncIterator[AsyncS
     session_maker = get_sessionmaker(engine)
     async with session_maker() as session:
         yield session
+
+
+def pool_metrics(engine: AsyncEngine) -> PoolMetrics:
+    """Return the current pool usage of ``engine``.
+
+    Checkout and connect counters are only kept for engines created by
+    :func:`get_engine`.
+    """
+    metrics = _metrics.get(engine) or PoolMetrics()
+    pool: Any = engine.pool
+    # Only queue pools report their size; static and null pools do not.
+    if hasattr(pool, "checkedin"):
+        metrics.size = pool.size()
+        metrics.checked_in = pool.checkedin()
+        metrics.checked_out = pool.checkedout()
+        metrics.overflow = pool.overflow()
+    return metrics
+
+
+async def dispose_engines() -> None:
+    """Close the pools of all engines created by :func:`get_engine` and forget them."""
+    engines = list(_engines.values())
+    _engines.clear()
+    _sessionmakers.clear()
+    for engine in engines:
+        _metrics.pop(engine, None)
+        await engine.dispose()
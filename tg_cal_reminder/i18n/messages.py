@@ -19,6 +19,13 @@ MESSAGES: dict[str, dict[str, str]] = {
             "/timezone <name> – set timezone"
         ),
         "unknown_command": "Unknown command. Send /help for usage.",
+        "digest_morning": "Today's events:",
+        "digest_evening": "Tomorrow's events:",
+        "digest_weekly": "This week's events:",
+        "reminder": "Reminder: {time} {title} | id={id}",
+        "llm_unavailable": (
+            "I can't understand free text right now. Please use the command syntax, see /help."
+        ),
     },
     "fr": {
         "secret_prompt": "Veuillez fournir le secret",
@@ -34,6 +41,14 @@ MESSAGES: dict[str, dict[str, str]] = {
             "/timezone <nom> – fuseau horaire"
         ),
         # Intentionally omit 'unknown_command' to test fallback
+        "digest_morning": "Événements d'aujourd'hui :",
+        "digest_evening": "Événements de demain :",
+        "digest_weekly": "Événements de la semaine :",
+        "reminder": "Rappel : {time} {title} | id={id}",
+        "llm_unavailable": (
+            "Je ne peux pas comprendre le texte libre pour le moment. "
+            "Utilisez la syntaxe des commandes, voir /help."
+        ),
     },
     "ru": {
         "secret_prompt": "Пожалуйста, отправьте секретное слово",
@@ -48,6 +63,14 @@ MESSAGES: dict[str, dict[str, str]] = {
             "/lang <code> – изменить язык\n"
             "/timezone <название> – часовой пояс"
         ),
+        "digest_morning": "События на сегодня:",
+        "digest_evening": "События на завтра:",
+        "digest_weekly": "События на этой неделе:",
+        "reminder": "Напоминание: {time} {title} | id={id}",
+        "llm_unavailable": (
+            "Сейчас я не могу разобрать свободный текст. "
+            "Пожалуйста, используйте команды, см. /help."
+        ),
     },
 }
 
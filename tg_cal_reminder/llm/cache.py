@@ -0,0 +1,198 @@
+"""Cache of LLM translations keyed by normalized text, language and local date or minute."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.llm.translator import Translator
+from tg_cal_reminder.utils.timezones import zone_or_utc
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Trailing punctuation does not change the command a message maps to.
+_TRAILING_PUNCTUATION = " .!?…"
+# Dates or times in an answer may have been worked out from the current time
+# ("in 30 minutes"), which the prompt states to the minute.
+_DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}|\d{1,2}:\d{2}")
+
+
+def normalize_text(text: str) -> str:
+    """Return ``text`` with whitespace collapsed and trailing punctuation removed.
+
+    Only the first letter is lower-cased, which phone keyboards capitalize on
+    their own; the rest keeps its case because it may end up in event titles.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip(_TRAILING_PUNCTUATION)
+    return text[:1].lower() + text[1:]
+
+
+def depends_on_time(result: dict[str, Any]) -> bool:
+    """Return ``True`` if ``result`` carries a date or time in its arguments."""
+    args = result.get("args") or []
+    if not isinstance(args, list):
+        args = [args]
+    return any(_DATETIME_RE.search(str(arg)) for arg in args)
+
+
+@dataclass
+class TranslationCacheMetrics:
+    """Counters describing the translation cache."""
+
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered without calling the LLM."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return (self.hits + self.shared_hits) / lookups if lookups else 0.0
+
+
+class TranslationCache:
+    """Bounded LRU cache of translator results.
+
+    Results that mention "today" or "tomorrow" depend on the user's local
+    date, so the key includes it and entries expire at local midnight at the
+    latest. Results carrying a date or time may depend on the current minute
+    ("in 2 hours"), so they are keyed by the local minute instead and expire
+    with it. With ``session_factory`` entries are also shared with other bot
+    processes through the ``translation_cache`` table.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 3600.0,
+        *,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.metrics = TranslationCacheMetrics()
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self, text: str, language: str, timezone: str, now: datetime, *, per_minute: bool = False
+    ) -> str:
+        """Return the cache key of a message sent at ``now``.
+
+        The key covers the local date of ``now``, or its local minute with
+        ``per_minute``.
+        """
+        local = now.astimezone(zone_or_utc(timezone))
+        stamp = local.strftime("%Y-%m-%d %H:%M") if per_minute else local.date().isoformat()
+        raw = "\x1f".join([normalize_text(text), language, timezone, stamp])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _lifetime(self, timezone: str, now: datetime, *, per_minute: bool = False) -> float:
+        local = now.astimezone(zone_or_utc(timezone))
+        if per_minute:
+            end = local.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        else:
+            tomorrow = local.date() + timedelta(days=1)
+            end = datetime.combine(tomorrow, datetime.min.time(), local.tzinfo)
+        return min(self.ttl, (end - local).total_seconds())
+
+    async def get(
+        self, text: str, language: str, timezone: str, now: datetime | None = None
+    ) -> dict[str, Any] | None:
+        now = now or datetime.now(UTC)
+        keys = [
+            (self.key(text, language, timezone, now, per_minute=per_minute), per_minute)
+            for per_minute in (False, True)
+        ]
+        for key, _ in keys:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.metrics.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        if self.session_factory is not None:
+            for key, per_minute in keys:
+                result = None
+                try:
+                    async with self.session_factory() as session:
+                        result = await crud.get_cached_translation(session, key, now)
+                except SQLAlchemyError:
+                    logger.warning("shared translation cache lookup failed", exc_info=True)
+                if result is not None:
+                    lifetime = self._lifetime(timezone, now, per_minute=per_minute)
+                    self._store(key, result, lifetime)
+                    self.metrics.shared_hits += 1
+                    return result
+        self.metrics.misses += 1
+        return None
+
+    async def put(
+        self,
+        text: str,
+        language: str,
+        timezone: str,
+        result: dict[str, Any],
+        now: datetime | None = None,
+    ) -> None:
+        now = now or datetime.now(UTC)
+        per_minute = depends_on_time(result)
+        key = self.key(text, language, timezone, now, per_minute=per_minute)
+        lifetime = self._lifetime(timezone, now, per_minute=per_minute)
+        self._store(key, result, lifetime)
+        if self.session_factory is not None:
+            try:
+                async with self.session_factory() as session:
+                    await crud.put_cached_translation(
+                        session, key, result, now + timedelta(seconds=lifetime)
+                    )
+            except SQLAlchemyError:
+                logger.warning("shared translation cache store failed", exc_info=True)
+
+    def _store(self, key: str, result: dict[str, Any], lifetime: float) -> None:
+        self._entries[key] = (time.monotonic() + lifetime, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def purge(self) -> int:
+        """Delete expired entries from the shared table and return how many were removed."""
+        if self.session_factory is None:
+            return 0
+        async with self.session_factory() as session:
+            return await crud.purge_expired_translations(session, datetime.now(UTC))
+
+    def wrap(self, translator: Translator) -> Translator:
+        """Return ``translator`` answering repeated messages from the cache."""
+
+        async def cached(text: str, language: str, timezone: str) -> dict[str, Any]:
+            now = datetime.now(UTC)
+            result = await self.get(text, language, timezone, now)
+            if result is None:
+                result = await translator(text, language, timezone)
+                await self.put(text, language, timezone, result, now)
+            return dict(result)
+
+        return cached
@@ -0,0 +1,218 @@
+"""Resilient wrapper around the LLM translator: deadlines, retries, hedging, breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from tg_cal_reminder.llm.translator import LLMRequestError, Translator
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the LLM cannot answer in time or the circuit breaker is open."""
+
+
+@dataclass
+class LLMClientMetrics:
+    """Counters describing calls to the LLM."""
+
+    requests: int = 0
+    attempts: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+    short_circuits: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def latency_quantile(self, q: float) -> float | None:
+        """Return the ``q`` quantile of recent successful call latencies."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Fail fast after ``failure_threshold`` consecutive failed requests.
+
+    The circuit stays open for ``reset_timeout`` seconds, then lets a single
+    probe request through: its success closes the circuit, a failure opens it
+    again. A probe that never reports back is replaced after another
+    ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probe_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return ``True`` if a request may be sent now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        now = time.monotonic()
+        if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_started = None
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning("LLM circuit opened after %d failures", self.failures)
+            self._opened_at = time.monotonic()
+
+
+class ResilientTranslator:
+    """Call ``translate`` with deadlines, jittered retries and optional hedging.
+
+    Each attempt is limited to ``attempt_timeout`` seconds and the whole call
+    to ``total_timeout``. Failed attempts are retried with jittered
+    exponential backoff. With ``hedge`` a second request is sent when the
+    first one is slower than the recent ``hedge_quantile`` latency and the
+    faster answer wins. Once the breaker opens, calls fail immediately with
+    :class:`LLMUnavailableError`.
+    """
+
+    def __init__(
+        self,
+        translate: Translator,
+        *,
+        attempt_timeout: float = 10.0,
+        total_timeout: float = 25.0,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.translate = translate
+        self.attempt_timeout = attempt_timeout
+        self.total_timeout = total_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = LLMClientMetrics()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return the delay before retrying after ``attempt`` failed attempts."""
+        cap = min(self.backoff_max, self.backoff_base * 2.0 ** (attempt - 1))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def hedge_delay(self) -> float | None:
+        """Return when to send a hedged request, or ``None`` to send none."""
+        if not self.hedge or len(self.metrics.latencies) < self.hedge_min_samples:
+            return None
+        return self.metrics.latency_quantile(self.hedge_quantile)
+
+    async def __call__(self, text: str, language: str, timezone: str) -> dict[str, Any]:
+        self.metrics.requests += 1
+        if not self.breaker.allow():
+            self.metrics.short_circuits += 1
+            raise LLMUnavailableError("LLM circuit is open")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+        last_error: BaseException | None = None
+        for attempt in range(1, self.max_attempts + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if attempt > 1:
+                self.metrics.retries += 1
+            try:
+                result = await self._attempt(
+                    text, language, timezone, min(self.attempt_timeout, remaining)
+                )
+            except LLMRequestError as exc:
+                if not exc.retryable:
+                    # The service answered; the request itself is at fault.
+                    self.breaker.record_success()
+                    raise
+                last_error = exc
+            except TimeoutError as exc:
+                last_error = exc
+            except Exception:
+                # Malformed answers are not a sign of an unavailable service.
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            logger.warning("LLM attempt %d failed: %r", attempt, last_error)
+            if attempt < self.max_attempts:
+                delay = min(self.backoff_delay(attempt), deadline - loop.time())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+        self.metrics.failures += 1
+        self.breaker.record_failure()
+        raise LLMUnavailableError("LLM did not answer in time") from last_error
+
+    async def _call(self, text: str, language: str, timezone: str) -> dict[str, Any]:
+        self.metrics.attempts += 1
+        started = time.monotonic()
+        result = await self.translate(text, language, timezone)
+        self.metrics.latencies.append(time.monotonic() - started)
+        return result
+
+    async def _attempt(
+        self, text: str, language: str, timezone: str, timeout: float
+    ) -> dict[str, Any]:
+        primary = asyncio.ensure_future(self._call(text, language, timezone))
+        tasks = {primary}
+        try:
+            async with asyncio.timeout(timeout):
+                delay = self.hedge_delay()
+                if delay is not None and delay < timeout:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        self.metrics.hedges += 1
+                        tasks.add(asyncio.ensure_future(self._call(text, language, timezone)))
+                error: BaseException | None = None
+                while tasks:
+                    done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is not primary:
+                                self.metrics.hedge_wins += 1
+                            return task.result()
+                        error = task.exception()
+                raise error or LLMRequestError("LLM request failed")
+        finally:
+            for task in tasks:
+                task.cancel()
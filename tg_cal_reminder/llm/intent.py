@@ -0,0 +1,130 @@
+"""Rule-based intent parser answering trivial free-text messages without the LLM."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from tg_cal_reminder.utils.parser import EventParseError, parse_event_line
+
+# Intents at or above this confidence are used instead of calling the LLM.
+CONFIDENCE_THRESHOLD = 0.9
+
+_KEYWORDS: dict[str, str] = {
+    "help": "/help",
+    "commands": "/help",
+    "помощь": "/help",
+    "справка": "/help",
+    "list": "/list_events",
+    "events": "/list_events",
+    "list events": "/list_events",
+    "my events": "/list_events",
+    "agenda": "/list_events",
+    "список": "/list_events",
+    "события": "/list_events",
+    "мои события": "/list_events",
+    "list all": "/list_all_events",
+    "all events": "/list_all_events",
+    "list all events": "/list_all_events",
+    "все события": "/list_all_events",
+}
+_CLOSE_RE = re.compile(r"^(?:close|done|закрыть|закрой)\s+(\d+(?:[\s,]+\d+)*)$")
+_LANG_RE = re.compile(r"^(?:lang|language|язык)\s+([a-z]{2})$")
+_TIMEZONE_RE = re.compile(r"^(?:timezone|tz|часовой пояс)\s+(\S+)$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A command recognized in free text, in the translator's result shape."""
+
+    command: str
+    args: list[str]
+    confidence: float
+
+    def as_result(self) -> dict[str, Any]:
+        return {"command": self.command, "args": list(self.args)}
+
+
+@dataclass
+class IntentMetrics:
+    """Counters describing how much free text skips the LLM."""
+
+    matched: int = 0
+    fallbacks: int = 0
+
+    @property
+    def coverage(self) -> float:
+        """Share of free-text messages answered without the LLM."""
+        total = self.matched + self.fallbacks
+        return self.matched / total if total else 0.0
+
+
+def parse_intent(text: str) -> Intent | None:
+    """Return the command ``text`` maps to, or ``None`` if no rule applies.
+
+    Keywords and command grammars that match the whole message are certain.
+    A keyword followed by other words ("help me move my meeting") only gets a
+    low confidence, leaving the message to the LLM.
+    """
+    stripped = _WHITESPACE_RE.sub(" ", text).strip()
+    folded = stripped.casefold().rstrip(" .!?")
+    command = _KEYWORDS.get(folded)
+    if command is not None:
+        return Intent(command, [], 1.0)
+    if match := _CLOSE_RE.match(folded):
+        return Intent("/close_event", re.split(r"[\s,]+", match.group(1)), 1.0)
+    if match := _LANG_RE.match(folded):
+        return Intent("/lang", [match.group(1)], 1.0)
+    if _TIMEZONE_RE.match(folded):
+        zone = stripped.split()[-1]
+        try:
+            ZoneInfo(zone)
+        except Exception:
+            return None
+        return Intent("/timezone", [zone], 1.0)
+    try:
+        parse_event_line(stripped)
+    except EventParseError:
+        pass
+    else:
+        # Titles keep the user's spelling, so the original text is passed on.
+        return Intent("/add_event", [stripped], 1.0)
+    first_word = folded.split(" ", 1)[0]
+    command = _KEYWORDS.get(first_word)
+    if command is not None:
+        return Intent(command, [], 0.5)
+    return None
+
+
+class IntentParser:
+    """Apply :func:`parse_intent` and count how often the LLM is skipped."""
+
+    def __init__(self, threshold: float = CONFIDENCE_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.metrics = IntentMetrics()
+
+    def parse(self, text: str) -> dict[str, Any] | None:
+        """Return a translator-shaped result for ``text`` or ``None`` to use the LLM."""
+        result = self.match(text)
+        self.record(result)
+        return result
+
+    def match(self, text: str) -> dict[str, Any] | None:
+        """Like :meth:`parse`, but without counting the message in ``metrics``."""
+        intent = parse_intent(text)
+        if intent is None or intent.confidence < self.threshold:
+            return None
+        return intent.as_result()
+
+    def record(self, result: dict[str, Any] | None) -> None:
+        """Count a :meth:`match` result in ``metrics``."""
+        if result is None:
+            self.metrics.fallbacks += 1
+        else:
+            self.metrics.matched += 1
+
+
+fast_path = IntentParser()
@@ -0,0 +1,130 @@
+"""Bounded, per-user fair concurrency for LLM requests with coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from tg_cal_reminder.llm.cache import normalize_text
+from tg_cal_reminder.llm.translator import Translator
+
+# User on whose behalf the current task translates; set by ``handlers.dispatch``.
+current_user: ContextVar[int | None] = ContextVar("llm_current_user", default=None)
+
+
+@dataclass
+class GateMetrics:
+    """Counters describing the LLM concurrency gate."""
+
+    in_flight: int = 0
+    max_in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    waits: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    coalesced: int = 0
+
+    def record_wait(self, wait: float) -> None:
+        self.waits += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def avg_wait(self) -> float:
+        """Average seconds a request waited for a free slot."""
+        return self.total_wait / self.waits if self.waits else 0.0
+
+
+class TranslationGate:
+    """Limit concurrent calls to ``translate`` and share identical ones.
+
+    At most ``max_concurrency`` requests run at once. Waiting requests are
+    queued per user (see :data:`current_user`) and freed slots go to users in
+    turn, so one user's burst cannot starve everybody else. Requests with the
+    same normalized text, language and timezone that arrive while one is in
+    flight wait for its answer instead of opening another connection.
+    """
+
+    def __init__(self, translate: Translator, max_concurrency: int = 4) -> None:
+        self.translate = translate
+        self.max_concurrency = max(1, max_concurrency)
+        self.metrics = GateMetrics()
+        self._active = 0
+        self._waiters: OrderedDict[int | None, deque[asyncio.Future[None]]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str, str], asyncio.Future[dict[str, Any]]] = {}
+
+    async def __call__(self, text: str, language: str, timezone: str) -> dict[str, Any]:
+        key = (normalize_text(text), language, timezone)
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.metrics.coalesced += 1
+        else:
+            shared = asyncio.ensure_future(self._run(current_user.get(), text, language, timezone))
+            self._in_flight[key] = shared
+            shared.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so a caller giving up does not cancel the others' answer.
+        result = await asyncio.shield(shared)
+        return dict(result)
+
+    async def _run(
+        self, user: int | None, text: str, language: str, timezone: str
+    ) -> dict[str, Any]:
+        await self._acquire(user)
+        try:
+            return await self.translate(text, language, timezone)
+        finally:
+            self._release()
+
+    async def _acquire(self, user: int | None) -> None:
+        started = time.monotonic()
+        if self._active < self.max_concurrency and not self._waiters:
+            self._take_slot()
+            self.metrics.record_wait(0.0)
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(waiter)
+        self._set_queued(self.metrics.queued + 1)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation.
+                self._release()
+            else:
+                waiters = self._waiters[user]
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[user]
+                self._set_queued(self.metrics.queued - 1)
+            raise
+        self.metrics.record_wait(time.monotonic() - started)
+
+    def _take_slot(self) -> None:
+        self._active += 1
+        self.metrics.in_flight = self._active
+        self.metrics.max_in_flight = max(self.metrics.max_in_flight, self._active)
+
+    def _set_queued(self, queued: int) -> None:
+        self.metrics.queued = queued
+        self.metrics.max_queued = max(self.metrics.max_queued, queued)
+
+    def _release(self) -> None:
+        """Hand the slot to the oldest waiter of the next user, or free it."""
+        if self._waiters:
+            user, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(user)
+            else:
+                del self._waiters[user]
+            # Cancelled waiters leave the queue, so this one is still pending.
+            self._set_queued(self.metrics.queued - 1)
+            waiter.set_result(None)
+            return
+        self._active -= 1
+        self.metrics.in_flight = self._active
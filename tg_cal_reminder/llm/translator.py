@@ -2,23 +2,29 @@ import json
 import logging
 import os
 import textwrap
-from datetime import UTC, datetime, tzinfo
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from functools import lru_cache
 from typing import Any, cast
-from zoneinfo import ZoneInfo
 
 import httpx
 from httpx import HTTPError
 
+from tg_cal_reminder.utils.timezones import zone_or_utc
+
 logger = logging.getLogger(__name__)
 
+# Signature shared by ``translate_message`` wrappers: (text, language, timezone).
+Translator = Callable[[str, str, str], Awaitable[dict[str, Any]]]
+
 
 def get_current_time(timezone: str) -> str:
-    """Return the current time in ``timezone`` formatted for the system prompt."""
-    try:
-        tz: tzinfo = ZoneInfo(timezone)
-    except Exception:
-        tz = UTC
-    return datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S %Z")
+    """Return the current time in ``timezone`` formatted for the system prompt.
+
+    The value only changes once a minute so the prompt built from it can be
+    cached.
+    """
+    return datetime.now(zone_or_utc(timezone)).strftime("%Y-%m-%d %H:%M %Z")
 
 
 def get_current_time_utc() -> str:
@@ -26,10 +32,11 @@ def get_current_time_utc() -> str:
     return get_current_time("UTC")
 
 
-PROMPT_TEMPLATE = textwrap.dedent(
+# The static part comes first so provider-side prompt caching can reuse it;
+# only the current-time suffix changes between requests.
+SYSTEM_PROMPT_PREFIX = textwrap.dedent(
     """
     You are a translation layer for a Telegram bot.
-    Current time: {current_time}.
     Translate the user message into one of the supported commands:
     /start, /lang <code>, /add_event <event_line>, /edit_event <id event_line>,
     /list_events [username], /list_all_events [from to], /close_event <id …>,
@@ -77,9 +84,9 @@ PROMPT_TEMPLATE = textwrap.dedent(
         ),
     )
     ```
-    If the text does not map to a known command, return {{"error": "Unrecognized"}}.
+    If the text does not map to a known command, return {"error": "Unrecognized"}.
     The answer should not contain any other text than the JSON object.
-    The JSON object should begin with `{{` and end with `}}`.
+    The JSON object should begin with `{` and end with `}`.
 
     Here is the help description of all commands:
         /start
@@ -109,9 +116,21 @@ PROMPT_TEMPLATE = textwrap.dedent(
 )
 
 
+CURRENT_TIME_TEMPLATE = "Current time: {current_time}."
+
+
+@lru_cache(maxsize=1024)
+def _system_prompt(current_time: str) -> str:
+    suffix = CURRENT_TIME_TEMPLATE.format(current_time=current_time)
+    return f"{SYSTEM_PROMPT_PREFIX}\n\n{suffix}"
+
+
 def build_system_prompt(timezone: str) -> str:
-    """Return the system prompt for ``timezone``."""
-    return PROMPT_TEMPLATE.format(current_time=get_current_time(timezone))
+    """Return the system prompt for ``timezone``.
+
+    Prompts are cached per formatted time, i.e. per timezone and minute.
+    """
+    return _system_prompt(get_current_time(timezone))
 
 
 SYSTEM_PROMPT = build_system_prompt("UTC")
@@ -119,10 +138,46 @@ SYSTEM_PROMPT = build_system_prompt("UTC")
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 
+def llm_url() -> str:
+    """Return the chat-completions endpoint, ``OPENROUTER_URL`` unless overridden.
+
+    Set ``LLM_API_URL`` to use another OpenAI-compatible server, e.g. the fake
+    one in ``benchmarks/fake_llm.py``.
+    """
+    return os.environ.get("LLM_API_URL") or OPENROUTER_URL
+
+
+class LLMRequestError(RuntimeError):
+    """Raised when the request to OpenRouter fails.
+
+    ``retryable`` is ``False`` for client errors (4xx other than 429), which
+    will fail the same way when repeated.
+    """
+
+    def __init__(self, message: str, *, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _is_retryable(exc: HTTPError) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
 async def translate_message(
-    client: httpx.AsyncClient, text: str, language_code: str, timezone: str = "UTC"
+    client: httpx.AsyncClient,
+    text: str,
+    language_code: str,
+    timezone: str = "UTC",
+    *,
+    timeout: float | None = None,
 ) -> dict[str, Any]:
-    """Translate a free-form message into a bot command via OpenRouter."""
+    """Translate a free-form message into a bot command via OpenRouter.
+
+    ``timeout`` overrides the client's timeout for this request.
+    """
     system_prompt = build_system_prompt(timezone)
     payload = {
         "model": "openrouter/auto",
@@ -134,16 +189,20 @@ async def translate_message(
     }
     logger.info("LLM request messages: %s", payload["messages"])
     print(payload["messages"])
-    headers = {
-        "Authorization": f"Bearer {os.environ.get('OPENROUTER_API_KEY', '')}",
-        "Content-Type": "application/json",
-    }
+    headers = {"Content-Type": "application/json"}
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    if api_key:
+        # Local OpenAI-compatible servers usually run without a key.
+        headers["Authorization"] = f"Bearer {api_key}"
 
+    request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
     try:
-        response = await client.post(OPENROUTER_URL, json=payload, headers=headers)
+        response = await client.post(
+            llm_url(), json=payload, headers=headers, timeout=request_timeout
+        )
         response.raise_for_status()
     except HTTPError as exc:  # pragma: no cover - network path is mocked in tests
-        raise RuntimeError("LLM request failed") from exc
+        raise LLMRequestError("LLM request failed", retryable=_is_retryable(exc)) from exc
 
     try:
         data = response.json()
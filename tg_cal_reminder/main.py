@@ -1,6 +1,8 @@
 import asyncio
+import contextlib
 import logging
 import os
+from datetime import timedelta
 
 import httpx
 from alembic import command
@@ -10,10 +12,23 @@ from dotenv import load_dotenv
 from tg_cal_reminder.bot import scheduler
 from tg_cal_reminder.bot.commands import register_commands
 from tg_cal_reminder.bot.polling import Poller
+from tg_cal_reminder.bot.reminders import ReminderEngine
+from tg_cal_reminder.bot.sender import OutboundSender
 from tg_cal_reminder.bot.update import handle_update
-from tg_cal_reminder.db.sessions import get_engine, get_sessionmaker
+from tg_cal_reminder.db import crud
+from tg_cal_reminder.db.cache import UserCache
+from tg_cal_reminder.db.notify import ChangeSubscriber
+from tg_cal_reminder.db.sessions import (
+    dispose_engines,
+    get_engine,
+    get_read_engine,
+    get_sessionmaker,
+)
 from tg_cal_reminder.llm import translator
-from tg_cal_reminder.llm.translator import translate_message
+from tg_cal_reminder.llm.cache import TranslationCache
+from tg_cal_reminder.llm.client import ResilientTranslator
+from tg_cal_reminder.llm.limiter import TranslationGate
+from tg_cal_reminder.llm.translator import Translator, translate_message
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,7 +43,8 @@ async def main() -> None:
         raise RuntimeError("BOT_TOKEN environment variable is required")
 
     engine = get_engine()
-    session_factory = get_sessionmaker(engine)
+    # Listing and digest queries go to DATABASE_READ_URL when it is set.
+    session_factory = get_sessionmaker(engine, get_read_engine())
 
     # Run migrations to ensure the database schema is up to date.
     # Alembic's upgrade command uses ``asyncio.run`` internally which would
@@ -38,29 +54,114 @@ async def main() -> None:
     root_level = getattr(logging, level_name, logging.INFO)
     logging.getLogger().setLevel(root_level)
 
+    # In dedupe mode Telegram's own queue of unacknowledged updates is the
+    # source of truth and already handled updates are skipped; otherwise
+    # resume right after the last update committed before the restart.
+    dedupe = os.environ.get("UPDATE_DEDUPE", "").lower() in ("1", "true", "yes")
+    offset = None
+    if not dedupe:
+        async with session_factory() as session:
+            offset = await crud.get_update_offset(session)
+
+    # Commit each update once instead of after every CRUD write.
+    unit_of_work = os.environ.get("UNIT_OF_WORK", "").lower() in ("1", "true", "yes")
+
+    user_cache = None
+    cache_size = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+    if cache_size > 0:
+        user_cache = UserCache(cache_size, float(os.environ.get("USER_CACHE_TTL", "300")))
+        crud.add_change_listener(user_cache.on_change)
+
+    translation_cache = None
+    translation_cache_size = int(os.environ.get("TRANSLATION_CACHE_SIZE", "10000"))
+    if translation_cache_size > 0:
+        # Optionally share translations with other bot processes via the database.
+        shared = os.environ.get("TRANSLATION_CACHE_SHARED", "").lower() in ("1", "true", "yes")
+        translation_cache = TranslationCache(
+            translation_cache_size,
+            float(os.environ.get("TRANSLATION_CACHE_TTL", "3600")),
+            session_factory=session_factory if shared else None,
+        )
+
+    # Point TELEGRAM_API_URL at ``benchmarks/fake_telegram.py`` for load tests.
+    telegram_url = os.environ.get("TELEGRAM_API_URL") or "https://api.telegram.org"
     async with (
-        httpx.AsyncClient(base_url=f"https://api.telegram.org/bot{token}/") as tg_client,
+        httpx.AsyncClient(base_url=f"{telegram_url.rstrip('/')}/bot{token}/") as tg_client,
         httpx.AsyncClient() as llm_client,
+        OutboundSender(tg_client) as sender,
     ):
 
-        async def translator(text: str, lang: str, tz: str) -> dict:
-            return await translate_message(llm_client, text, lang, tz)
+        attempt_timeout = float(os.environ.get("LLM_ATTEMPT_TIMEOUT", "10"))
+
+        async def translate(text: str, lang: str, tz: str) -> dict:
+            return await translate_message(llm_client, text, lang, tz, timeout=attempt_timeout)
+
+        translator: Translator = ResilientTranslator(
+            translate,
+            attempt_timeout=attempt_timeout,
+            total_timeout=float(os.environ.get("LLM_TOTAL_TIMEOUT", "25")),
+            max_attempts=int(os.environ.get("LLM_MAX_ATTEMPTS", "3")),
+            hedge=os.environ.get("LLM_HEDGE", "").lower() in ("1", "true", "yes"),
+        )
+        translator = TranslationGate(
+            translator, max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+        )
+        if translation_cache is not None:
+            translator = translation_cache.wrap(translator)
 
         await register_commands(tg_client)
 
         poller = Poller(
             token,
-            lambda u: handle_update(u, tg_client, session_factory, translator),
+            lambda u: handle_update(
+                u,
+                tg_client,
+                session_factory,
+                translator,
+                dedupe=dedupe,
+                sender=sender,
+                user_cache=user_cache,
+                unit_of_work=unit_of_work,
+                next_offset=poller.committed_offset,
+            ),
             client=tg_client,
+            max_concurrency=int(os.environ.get("POLL_CONCURRENCY", "8")),
+            offset=offset,
+            queue_size=int(os.environ.get("POLL_QUEUE_SIZE", "0")),
         )
-        sched = scheduler.create_scheduler()
+        sched = scheduler.create_scheduler(session_factory, sender)
+        if translation_cache is not None and translation_cache.session_factory is not None:
+            sched.add_job(translation_cache.purge, "interval", hours=1, id="translation_purge")
         sched.start()
+        subscriber_task = None
+        if engine.dialect.name == "postgresql":
+            # Apply writes of other bot processes to the user cache, the
+            # reminders and the read-your-writes tracking of this one.
+            subscriber = ChangeSubscriber(
+                engine.url, on_reset=user_cache.clear if user_cache is not None else None
+            )
+            subscriber_task = asyncio.create_task(subscriber.run())
+        reminder_task = None
+        lead_minutes = int(os.environ.get("REMINDER_LEAD_MINUTES", "15"))
+        if lead_minutes > 0:
+            reminders = ReminderEngine(
+                session_factory, sender, lead=timedelta(minutes=lead_minutes)
+            )
+            reminder_task = asyncio.create_task(reminders.run())
         try:
             logger.info("Bot is now polling for updates...")
             await poller.run()
         finally:
             logger.info("Shutting down bot...")
             sched.shutdown()
+            for task in (reminder_task, subscriber_task):
+                if task is not None:
+                    task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await task
+            if user_cache is not None:
+                crud.remove_change_listener(user_cache.on_change)
+            await dispose_engines()
 
 
 if __name__ == "__main__":
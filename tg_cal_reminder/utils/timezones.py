@@ -1,10 +1,22 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime, timedelta, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 UTC = UTC
 
 
+@lru_cache(maxsize=1024)
+def zone_or_utc(name: str) -> tzinfo:
+    """Return the IANA timezone ``name``, or UTC if it is unknown or invalid."""
+    # Directories such as "Europe" and overlong names fail with ``OSError``.
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        return UTC
+
+
 def to_utc(dt: datetime) -> datetime:
     """Convert an aware ``datetime`` to UTC.
 